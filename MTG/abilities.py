@@ -50,6 +50,15 @@ class ActivatedAbility(Ability):
 
         return targets_chosen and (lambda self: eval(cost))(_card)
 
+    def could_activate(self):
+        """ side-effect free pre-check for can_activate: False only if the
+        ability certainly can't be activated right now (mana / life costs are
+        assumed payable)
+        """
+        if 'self.tap()' in self.cost:
+            return not self.card.status.tapped and not self.card.is_summoning_sick
+        return True
+
 
 class TriggeredAbility(Ability):
     def __init__(self, card, effect, requirements, target_criterias=None,
@@ -31,6 +31,10 @@ class Card(gameobject.GameObject):
     def ID(self):
         pass
 
+    def fresh_copy(self):
+        """ a new card, as this one was before any game (see Game.fork) """
+        return type(self)()
+
     def play_func(self):  # defaults to permanent
         permanent.make_permanent(self)
 
@@ -210,6 +210,17 @@ def add_static_effect(cardname, apply_to, name, value, toggle_func=lambda eff: F
 
 
 
+def clear_card_abilities(cardname):
+    """ forget a card's parsed abilities, triggers and static effects, so that
+    parsing it again doesn't add them twice """
+    if not name_to_id(cardname):
+        return
+    card = card_from_name(cardname, get_instance=False)
+    card.activated_abilities = []
+    card.triggers = {}
+    card.static_effects = []
+
+
 def indentation_lv(s):
     """ Must be tab indented """
     lv = 0
@@ -377,6 +388,10 @@ def parse_card_from_lines(lines, log=None):
 
     name = '"' + name + '"'
 
+    if abilities or _triggers or static_effects:
+        # setup_cards() may run more than once per process (e.g. once per game)
+        str_to_exe += "clear_card_abilities(%s)\n" % name
+
     if abilities:
         for cost, effect, ability_targets in abilities:
             ability_targets = '[' + ', '.join(ability_targets) + ']'
@@ -9,13 +9,107 @@ def check_valid_attack(attacker):
 
 
 def check_valid_block(attacker, defender):
+    matrix = defender.game.block_matrix.of(defender)
     for creature in defender.battlefield:
         if creature.is_creature and creature.status.is_blocking:
-            if not creature.can_block(creature.status.is_blocking):
+            blocking = creature.status.is_blocking
+            if creature.attributes.num_creatures_can_block < len(blocking):
                 return False
+            for attacker in blocking:
+                if not matrix.can_block(creature, attacker):
+                    return False
     # TODO: can't block alone
     # for creature in attacker.battlefield:
     #     if creature.is_creature:
     #         target = creature.status.is_attacking
             # if target
     return True
+
+
+LANDWALK = ("Plains", "Island", "Swamp", "Mountain", "Forest")
+
+
+def _abilities(permanent):
+    """ permanent.has_ability, with the gained abilities looked up once """
+    own = {a.name for a in permanent.characteristics.abilities}
+    gained = [effect.value for effect in permanent.get_effect('gainAbility')]
+    return lambda ability: (ability.replace(' ', '_') in own
+                            or any(ability in value for value in gained))
+
+
+def _evasion(attacker):
+    """ what it takes to block attacker: (flying, intimidate, landwalk types) """
+    has = _abilities(attacker)
+    return (has('Flying'), has('Intimidate'),
+            frozenset(t for t in LANDWALK if has(t + "walk")))
+
+
+def _blocking(blocker):
+    """ what blocker has against evasion: (flying or reach, artifact, colors) """
+    has = _abilities(blocker)
+    return (has('Flying') or has('Reach'), blocker.is_artifact,
+            set(blocker.characteristics.color))
+
+
+class BlockMatrix():
+    """ who can block whom, worked out once per board revision
+
+        matrix = game.block_matrix.of(defender)
+        matrix.attackers, matrix.blockers   # in the order the block prompts use
+        matrix.rows[i][j]                   # can blockers[j] block attackers[i]
+        matrix.can_block(blocker, attacker)
+
+    The same rules as Permanent.can_block(attacker) (flying / reach,
+    intimidate, landwalk), but each creature's abilities are read once, and
+    the defender's land types once, instead of once per pair. The matrix is
+    rebuilt when game.board_revision changes (a new step, an ability gained
+    or lost, a land entering...), so it follows abilities that change
+    mid-combat. Pairs outside it (e.g. a tapped creature) ask the permanent.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.defender = None
+        self._revision = None
+        self.attackers = []
+        self.blockers = []
+        self.rows = []
+        self._blockable = {}  # id(blocker) -> {id(attacker) it can block}
+        self._attacker_ids = set()
+
+    def of(self, defender):
+        if defender is not self.defender or self._revision != self.game.board_revision:
+            self._build(defender)
+        return self
+
+    def _build(self, defender):
+        game = self.game
+        self.defender = defender
+        self._revision = game.board_revision
+        self.attackers = game.query().battlefield() \
+            .where(lambda p: p.status.is_attacking == defender).all()
+        self.blockers = game.query().battlefield().controlled_by(defender) \
+            .where(lambda p: p.can_block()).all()
+
+        lands = {t for t in LANDWALK if defender.controls(subtype=t)}
+        blockers = [_blocking(b) for b in self.blockers]
+        self.rows = []
+        for attacker in self.attackers:
+            flying, intimidate, landwalk = _evasion(attacker)
+            if landwalk & lands:
+                self.rows.append([False] * len(blockers))
+                continue
+            colors = set(attacker.characteristics.color)
+            self.rows.append([(not flying or reach)
+                              and (not intimidate or artifact or bool(colors & color))
+                              for reach, artifact, color in blockers])
+
+        self._blockable = {id(b): {id(a) for a, row in zip(self.attackers, self.rows) if row[j]}
+                           for j, b in enumerate(self.blockers)}
+        self._attacker_ids = {id(a) for a in self.attackers}
+
+    def can_block(self, blocker, attacker):
+        blockable = self._blockable.get(id(blocker))
+        if (blockable is None or id(attacker) not in self._attacker_ids
+                or self._revision != self.game.board_revision):
+            return blocker.can_block(attacker)
+        return id(attacker) in blockable
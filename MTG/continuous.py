@@ -0,0 +1,120 @@
+"""The game's static (continuous) effects, held in one place.
+
+A lord like Paragon of New Dawns used to copy its +1/+1 onto every
+permanent its controller had, and every new permanent replayed all of its
+controller's static effects onto itself. Each copy then re-ran its toggle
+function. Now the registry holds each static effect once:
+
+    game.continuous.add(source, 'modifyPT', (1, 1), toggle_func, scope='controller')
+
+When a permanent's characteristics are read (power, has_ability, ...), the
+registry works out which static effects apply to it. It does this for all
+effect names at once, and caches the result per permanent until
+game.board_revision changes. The permanent merges the result with its own
+effects (until end of turn, auras) by timestamp and applies them layer by
+layer; see Permanent.get_effect and Permanent._calculate_pt (rule 613).
+
+scope is which permanents an effect can apply to:
+    'self'        the source only
+    'controller'  permanents controlled by the source's controller
+    'game'        every permanent
+exempt_source leaves the source itself out ("other creatures you control").
+
+toggle_func(eff) decides whether the effect applies to a permanent.
+eff.source is the effect's source, and eff.apply_target is the permanent.
+A static effect ends when its source leaves the battlefield
+(Game.end_effects_from).
+"""
+from collections import defaultdict, namedtuple
+
+
+# what a toggle_func sees
+Application = namedtuple('Application', 'source apply_target value')
+
+_NONE = {}
+
+
+class StaticEffect():
+    is_active = True
+
+    def __init__(self, source, name, value, toggle_func, scope, exempt_source, timestamp):
+        self.source = source
+        self.name = name
+        self.value = value
+        self.toggle_func = toggle_func
+        self.scope = scope
+        self.exempt_source = exempt_source
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return 'StaticEffect(%r, %r from %s, scope=%r)' % (self.name, self.value,
+                                                          self.source.name, self.scope)
+
+    def applies_to(self, permanent):
+        source = self.source
+        if permanent is source:
+            return not self.exempt_source
+        if self.scope == 'controller':
+            return permanent.controller is source.controller
+        return self.scope == 'game'
+
+
+class ContinuousEffects():
+    def __init__(self, game):
+        self.game = game
+        self.effects = []  # in timestamp order
+        self.sources = set()  # ids of the effects' sources
+        self._cache = {}  # id(permanent) -> {name: [StaticEffect]}
+        self._cache_revision = None
+        self._computing = set()
+
+    def add(self, source, name, value, toggle_func, scope, exempt_source=False):
+        eff = StaticEffect(source, name, value, toggle_func, scope, exempt_source,
+                           source.timestamp)
+        self.effects.append(eff)
+        self.effects.sort(key=lambda e: e.timestamp)
+        self.sources.add(id(source))
+        self.game.board_revision += 1
+        return eff
+
+    def remove_source(self, source):
+        """ end every static effect from source; True if there were any """
+        if id(source) not in self.sources:  # every zone move asks
+            return False
+        self.sources.discard(id(source))
+        self.effects = [eff for eff in self.effects if eff.source is not source]
+        self.game.board_revision += 1
+        return True
+
+    def applying_to(self, permanent):
+        """ {effect name: [active StaticEffect, ...]} for permanent """
+        if not self.effects:
+            return _NONE
+
+        revision = self.game.board_revision
+        if self._cache_revision != revision:
+            self._cache.clear()
+            self._cache_revision = revision
+
+        key = id(permanent)
+        found = self._cache.get(key)
+        if found is not None:
+            return found
+
+        # a toggle_func that reads this permanent's characteristics would
+        # ask again; it sees the permanent without static effects
+        if key in self._computing:
+            return _NONE
+        self._computing.add(key)
+        try:
+            found = defaultdict(list)
+            for eff in self.effects:
+                if (eff.applies_to(permanent)
+                        and eff.toggle_func(Application(eff.source, permanent, eff.value))):
+                    found[eff.name].append(eff)
+            found = dict(found)
+        finally:
+            self._computing.discard(key)
+
+        self._cache[key] = found
+        return found
@@ -0,0 +1,224 @@
+"""Decision datasets for training policies, in sharded .npy files.
+
+    with ShardWriter('data/run1', prefix='w0') as writer:
+        for game_id in ...:
+            recorder = GameRecorder(writer, game_id)
+            p0.agent = recorder.wrap(HeuristicAgent15())   # records p0's decisions
+            p1.agent = recorder.wrap(RandomAgent())
+            g.run_game()
+            recorder.finish(winner)                         # seat, or -1
+
+    shards = load_shards('data/run1')                       # memory-mapped
+    shards[0]['obs'], shards[0]['action'], ...
+
+Every decision a wrapped agent makes becomes one row:
+
+    obs      float32 (N_FEATURES,)  vecgame.features() just before deciding
+    mask     bool (N_ACTIONS,)      the well-formed answers (vecgame.answers)
+    action   int16                  the index of the answer given; -1 if it
+                                    has none in vecgame's action layout
+    kind     int8                   index into vecgame.REQUEST_KINDS
+    seat     int8                   who decided
+    outcome  int8                   for that seat: 1 won, -1 lost, 0 neither
+    game     int64                  game_id
+    turn     int32
+
+A game's rows are held until the game is over (the outcome isn't known
+before), then copied into the writer's shard buffer. A full buffer is
+handed to a background thread, which writes one .npy file per column
+(<prefix>-<shard>.<column>.npy; e.g. w0-00003.obs.npy) and renames them
+into place when done. At most max_pending buffers wait to be written;
+beyond that, adding rows blocks until the thread catches up, so memory
+stays bounded however many games are recorded. Every shard has exactly
+shard_size rows except each writer's last one.
+
+Workers writing to the same directory just need different prefixes.
+"""
+import os
+import glob
+import queue
+import threading
+
+import numpy as np
+
+from MTG import vecgame
+from MTG.stepper import DecisionRequest
+
+
+COLUMNS = (('obs', np.float32, (vecgame.N_FEATURES,)),
+           ('mask', np.bool_, (vecgame.N_ACTIONS,)),
+           ('action', np.int16, ()),
+           ('kind', np.int8, ()),
+           ('seat', np.int8, ()),
+           ('outcome', np.int8, ()),
+           ('game', np.int64, ()),
+           ('turn', np.int32, ()))
+
+_KINDS = {kind: i for i, kind in enumerate(vecgame.REQUEST_KINDS)}
+_DONE = object()
+
+
+class ShardWriter():
+    def __init__(self, directory, prefix='shard', shard_size=1 << 16, max_pending=2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.num_rows = 0
+        self.num_shards = 0
+        self._buffer = self._new_buffer()
+        self._filled = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_shards, daemon=True)
+        self._thread.start()
+
+    def _new_buffer(self):
+        return {name: np.zeros((self.shard_size,) + shape, dtype=dtype)
+                for name, dtype, shape in COLUMNS}
+
+    def add(self, rows):
+        """ rows: {column: array}, all the same length """
+        self._check()
+        n = len(rows['action'])
+        start = 0
+        while start < n:
+            take = min(n - start, self.shard_size - self._filled)
+            for name, _, _ in COLUMNS:
+                self._buffer[name][self._filled:self._filled + take] = rows[name][start:start + take]
+            self._filled += take
+            start += take
+            if self._filled == self.shard_size:
+                self._flush()
+        self.num_rows += n
+
+    def _flush(self):
+        if not self._filled:
+            return
+        buffer = self._buffer
+        if self._filled < self.shard_size:
+            buffer = {name: column[:self._filled] for name, column in buffer.items()}
+        self._queue.put((self.num_shards, buffer))  # blocks while max_pending are waiting
+        self.num_shards += 1
+        self._buffer = self._new_buffer()
+        self._filled = 0
+
+    def _path(self, shard, column):
+        return os.path.join(self.directory, '%s-%05d.%s.npy' % (self.prefix, shard, column))
+
+    def _write_shards(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if self._error is not None:
+                continue  # keep draining so add() doesn't block
+            shard, buffer = item
+            try:
+                for name, column in buffer.items():
+                    path = self._path(shard, name)
+                    with open(path + '.tmp', 'wb') as f:
+                        np.save(f, column)
+                    os.replace(path + '.tmp', path)
+            except BaseException as e:
+                self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """ write the rows still buffered (a short last shard) and wait for
+        every shard to be on disk """
+        if self._thread is None:
+            return
+        self._flush()
+        self._queue.put(_DONE)
+        self._thread.join()
+        self._thread = None
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingAgent():
+    """Plays like agent, and records its decisions with a GameRecorder."""
+
+    def __init__(self, agent, recorder):
+        self.agent = agent
+        self.recorder = recorder
+
+    def select_action(self, player, game):
+        request = DecisionRequest(game, player, 'action', None)
+        row = self.recorder.observe(request)
+        return self.recorder.answered(row, self.agent.select_action(player, game))
+
+    def select_choice(self, player, game, prompt_string):
+        request = DecisionRequest(game, player, 'choice', prompt_string)
+        row = self.recorder.observe(request)
+        return self.recorder.answered(row, self.agent.select_choice(player, game, prompt_string))
+
+
+class GameRecorder():
+    """One game's decisions, written to writer when the game is over."""
+
+    def __init__(self, writer, game_id=0, featurize=vecgame.features):
+        self.writer = writer
+        self.game_id = game_id
+        self.featurize = featurize
+        self.rows = []  # [obs, mask, answers, kind, seat, turn, action]
+
+    def wrap(self, agent):
+        return RecordingAgent(agent, self)
+
+    def observe(self, request):
+        """ the state as the decision is asked for (before the agent has
+        had a chance to add mana or anything else) """
+        kind = vecgame.request_kind(request)
+        answers = vecgame.answers(request, kind)
+        row = [self.featurize(request.game, request.player, kind),
+               [a is not None for a in answers], answers, _KINDS[kind],
+               request.player.seat, request.game.turn_num, -1]
+        self.rows.append(row)
+        return row
+
+    def answered(self, row, answer):
+        row[6] = vecgame.action_index(row[2], answer, vecgame.REQUEST_KINDS[row[3]])
+        row[2] = None
+        return answer
+
+    def finish(self, winner):
+        """ the game is over; winner is the winning seat, or -1 """
+        rows = self.rows
+        self.rows = []
+        if not rows:
+            return
+        seats = np.asarray([r[4] for r in rows], dtype=np.int8)
+        outcome = np.zeros(len(rows), dtype=np.int8)
+        if winner >= 0:
+            outcome[:] = np.where(seats == winner, 1, -1)
+        self.writer.add({'obs': np.stack([r[0] for r in rows]),
+                         'mask': np.asarray([r[1] for r in rows], dtype=np.bool_),
+                         'action': np.asarray([r[6] for r in rows], dtype=np.int16),
+                         'kind': np.asarray([r[3] for r in rows], dtype=np.int8),
+                         'seat': seats,
+                         'outcome': outcome,
+                         'game': np.full(len(rows), self.game_id, dtype=np.int64),
+                         'turn': np.asarray([r[5] for r in rows], dtype=np.int32)})
+
+
+def load_shards(directory, prefix='*', mmap_mode='r'):
+    """ [{column: array}, ...] for every complete shard in directory, by
+    file name; the arrays are memory-mapped unless mmap_mode is None """
+    shards = []
+    for path in sorted(glob.glob(os.path.join(directory, prefix + '-*.action.npy'))):
+        stem = path[:-len('.action.npy')]
+        paths = {name: '%s.%s.npy' % (stem, name) for name, _, _ in COLUMNS}
+        if all(os.path.exists(p) for p in paths.values()):
+            shards.append({name: np.load(p, mmap_mode=mmap_mode)
+                           for name, p in paths.items()})
+    return shards
@@ -0,0 +1,207 @@
+"""Compact binary event log for games.
+
+Each record is a little-endian, length-prefixed struct:
+
+    u16 record length (excluding these 2 bytes)
+    u32 game_id, u16 turn, u8 step, u8 event type,
+    i8 player seat, i8 from zone, i8 to zone, i32 amount,
+    u8 len + utf-8 name, u8 len + utf-8 target
+
+Records are only ever appended, one file per batch of games. `read_events`
+streams them back; `replay` folds one game's events into per-player state at
+any turn, and `count_events` aggregates over many files without ever parsing
+the printed narration.
+"""
+import struct
+from enum import Enum
+from collections import Counter, defaultdict, namedtuple
+
+
+MAGIC = b'MTGEV1\n'
+
+_LENGTH = struct.Struct('<H')
+_HEADER = struct.Struct('<IHBBbbbi')
+
+NO_STEP = 255
+NO_ZONE = -1
+NO_PLAYER = -1
+
+
+class EventType(Enum):
+    GAME_START = 0  # amount: starting life
+    TURN_START = 1  # player: active player, amount: turn number
+    DRAW = 2
+    CAST = 3
+    ACTIVATE = 4
+    RESOLVE = 5
+    ATTACK = 6  # target: attacked player
+    BLOCK = 7  # target: blocked creature
+    DAMAGE = 8  # name: source, target: damaged object, player: its controller
+    ZONE_ENTER = 9  # to_zone set
+    ZONE_LEAVE = 10  # from_zone set
+    LIFE_CHANGE = 11  # amount: signed delta
+    GAME_END = 12  # player: winner seat, or -1 for a draw
+
+
+Event = namedtuple('Event', ['game_id', 'turn', 'step', 'type', 'player',
+                             'from_zone', 'to_zone', 'amount', 'name', 'target'])
+
+_EVENT_TYPES = list(EventType)
+
+
+def _encode_str(s):
+    b = (s or '').encode('utf-8')[:255]
+    return bytes((len(b),)) + b
+
+
+def encode(game_id, turn, step, event_type, player=NO_PLAYER, from_zone=NO_ZONE,
+           to_zone=NO_ZONE, amount=0, name='', target=''):
+    body = (_HEADER.pack(game_id, turn, step, event_type.value, player,
+                         from_zone, to_zone, amount)
+            + _encode_str(name) + _encode_str(target))
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode(body):
+    game_id, turn, step, etype, player, from_zone, to_zone, amount = _HEADER.unpack_from(body)
+    pos = _HEADER.size
+    n = body[pos]
+    name = body[pos + 1:pos + 1 + n].decode('utf-8')
+    pos += 1 + n
+    n = body[pos]
+    target = body[pos + 1:pos + 1 + n].decode('utf-8')
+    return Event(game_id, turn, step, _EVENT_TYPES[etype], player,
+                 from_zone, to_zone, amount, name, target)
+
+
+class EventLog():
+    """Append-only writer; one instance per batch file, shared by every game in the batch."""
+
+    def __init__(self, path, buffer_size=1 << 16):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        self.f = open(path, 'ab')
+        if self.f.tell() == 0:
+            self.f.write(MAGIC)
+
+    def write(self, game, event_type, player=None, amount=0, name='', target='',
+              from_zone=None, to_zone=None):
+        self._buffer += encode(
+            game.game_id,
+            game.turn_num,
+            game.step.value if game.step is not None else NO_STEP,
+            event_type,
+            player.seat if player is not None else NO_PLAYER,
+            from_zone.value if from_zone is not None else NO_ZONE,
+            to_zone.value if to_zone is not None else NO_ZONE,
+            amount, name, target)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.f.write(self._buffer)
+            self._buffer.clear()
+        self.f.flush()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __deepcopy__(self, memo):
+        # a copied game writes to the same file
+        return self
+
+
+def read_events(path, game_id=None):
+    """Yield every Event in a log file (optionally only those of one game)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError('%s is not an event log' % path)
+
+    pos = len(MAGIC)
+    end = len(data)
+    while pos + _LENGTH.size <= end:
+        (n,) = _LENGTH.unpack_from(data, pos)
+        pos += _LENGTH.size
+        if pos + n > end:  # truncated tail (writer still running / crashed)
+            break
+        body = data[pos:pos + n]
+        pos += n
+        if game_id is not None and _HEADER.unpack_from(body)[0] != game_id:
+            continue
+        yield decode(body)
+
+
+class PlayerState():
+    """What replay() knows about a player: life, zone sizes, cards on the battlefield."""
+
+    def __init__(self, seat):
+        self.seat = seat
+        self.life = 0
+        self.zone_sizes = Counter()  # zone.ZoneType value -> number of objects
+        self.battlefield = Counter()  # card name -> count
+
+    def __repr__(self):
+        return 'PlayerState(seat=%r, life=%r, zones=%r, battlefield=%r)' % (
+            self.seat, self.life, dict(self.zone_sizes), dict(self.battlefield))
+
+
+def replay(path, game_id, turn=None, events=None):
+    """Fold a game's events up to (and including) `turn`; returns {seat: PlayerState}.
+
+    With turn=None the whole game is replayed.
+    """
+    from MTG.zone import ZoneType  # avoid importing the engine for plain log reading
+    battlefield = ZoneType.BATTLEFIELD.value
+
+    players = defaultdict(lambda: None)
+    for ev in (events if events is not None else read_events(path, game_id)):
+        if ev.game_id != game_id:
+            continue
+        if turn is not None and ev.turn > turn:
+            break
+        if ev.player == NO_PLAYER:
+            continue
+
+        state = players[ev.player]
+        if state is None:
+            state = players[ev.player] = PlayerState(ev.player)
+
+        if ev.type is EventType.GAME_START:
+            state.life = ev.amount
+        elif ev.type is EventType.LIFE_CHANGE:
+            state.life += ev.amount
+        elif ev.type is EventType.ZONE_ENTER:
+            state.zone_sizes[ev.to_zone] += 1
+            if ev.to_zone == battlefield:
+                state.battlefield[ev.name] += 1
+        elif ev.type is EventType.ZONE_LEAVE:
+            state.zone_sizes[ev.from_zone] -= 1
+            if ev.from_zone == battlefield:
+                state.battlefield[ev.name] -= 1
+                if state.battlefield[ev.name] <= 0:
+                    del state.battlefield[ev.name]
+
+    return dict(players)
+
+
+def count_events(paths, key=lambda ev: ev.type):
+    """Aggregate events over one or many log files, e.g.
+
+    count_events(files, key=lambda ev: (ev.type, ev.name))  # casts/draws per card
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    counts = Counter()
+    for path in paths:
+        counts.update(key(ev) for ev in read_events(path))
+    return counts
@@ -14,4 +14,10 @@ class ResetGameException(Exception):
 	pass
 
 class CardNotImplementedException(Exception):
-	pass
\ No newline at end of file
+	pass
+
+class ReplayDivergedException(Exception):
+	pass
+
+class GameAbortedException(Exception):
+	pass
@@ -0,0 +1,264 @@
+"""The game state as NumPy arrays, kept up to date as the game changes.
+
+    f = Featurizer(g)            # attaches itself: g.featurizer is f
+    f.vector(seat)               # 1-d float32, from that seat's side
+    f.players[seat]              # PLAYER_FEATURES
+    f.permanents[seat, i]        # PERMANENT_FEATURES of battlefield[i]
+    f.stack[i]                   # STACK_FEATURES of stack[i]
+
+The arrays are allocated once. Instead of walking the game's objects on
+every read, the featurizer is told what changed: zones report objects
+entering and leaving (Zone._emit), a permanent's Status reports every
+write to it, and a permanent reports its effects and counters changing
+(Permanent._changed). refresh() (which vector() calls) then re-reads only
+those permanents, recounts only the zones that moved, and copies the few
+per-player numbers (life, mana pool) that change without any event.
+
+Static effects (game.continuous) can change a permanent's power and
+abilities without anything happening to the permanent itself; while there
+are any, every permanent is re-read whenever game.board_revision changes.
+
+Only the first MAX_PERMANENTS permanents of each player and the first
+MAX_STACK objects on the stack (bottom first) have rows; the rest are left
+out.
+"""
+import numpy as np
+
+from MTG import mana
+from MTG.eventlog import EventType
+
+
+MAX_PERMANENTS = 24
+MAX_STACK = 8
+
+KEYWORDS = ('Flying', 'First Strike', 'Double Strike', 'Deathtouch', 'Trample',
+            'Vigilance', 'Reach', 'Lifelink', 'Haste', 'Defender', 'Hexproof',
+            'Indestructible', 'Menace')
+
+_MANA_TYPES = tuple(m for m in mana.Mana if m is not mana.Mana.GENERIC)
+
+GAME_FEATURES = ('turn', 'step', 'my_turn', 'stack_size')
+PLAYER_FEATURES = (('life',) + tuple('mana_' + m.name.lower() for m in _MANA_TYPES)
+                   + ('hand', 'hand_lands', 'hand_creatures', 'hand_instants',
+                      'hand_sorceries', 'hand_other', 'hand_cmc',
+                      'library', 'graveyard', 'exile', 'lands_played'))
+PERMANENT_FEATURES = (('present', 'creature', 'land', 'token', 'power', 'toughness',
+                       'damage', 'tapped', 'attacking', 'blocking', 'summoning_sick',
+                       'counters', 'cmc')
+                      + tuple('has_' + k.lower().replace(' ', '_') for k in KEYWORDS))
+STACK_FEATURES = ('present', 'mine', 'ability', 'creature', 'instant', 'sorcery',
+                  'cmc', 'targets')
+
+_P = {name: i for i, name in enumerate(PLAYER_FEATURES)}
+_HAND_COUNTS = slice(_P['hand'], _P['hand_cmc'] + 1)
+_MINE = STACK_FEATURES.index('mine')
+
+_cmc = {}  # mana cost string -> converted mana cost
+
+
+def converted_mana_cost(obj):
+    cost = obj.characteristics.mana_cost or ''
+    found = _cmc.get(cost)
+    if found is None:
+        found = _cmc[cost] = sum(mana.str_to_mana_dict(cost).values())
+    return found
+
+
+def vector_size(num_players=2):
+    return (len(GAME_FEATURES) + num_players * len(PLAYER_FEATURES)
+            + num_players * MAX_PERMANENTS * len(PERMANENT_FEATURES)
+            + MAX_STACK * len(STACK_FEATURES))
+
+
+def _hand_row(card):
+    """ what card adds to its owner's hand counts (hand .. hand_cmc) """
+    if card.is_land:
+        kind = 1
+    elif card.is_creature:
+        kind = 2
+    elif card.is_instant:
+        kind = 3
+    elif card.is_sorcery:
+        kind = 4
+    else:
+        kind = 5
+    row = np.zeros(_HAND_COUNTS.stop - _HAND_COUNTS.start, dtype=np.float32)
+    row[0] = 1
+    row[kind] = 1
+    row[6] = converted_mana_cost(card)
+    return row
+
+
+def _permanent_row(p):
+    status = p.status
+    counters = status.counters
+    creature = p.is_creature
+    row = [1, creature, p.is_land, p.is_token,
+           p.power if creature else 0, p.toughness if creature else 0,
+           status.damage_taken, status.tapped,
+           bool(status.is_attacking), bool(status.is_blocking),
+           creature and status.summoning_sick,
+           counters['+1/+1'] - counters['-1/-1'],
+           converted_mana_cost(p)]
+    row += [p.has_ability(k) for k in KEYWORDS]
+    return row
+
+
+def _stack_row(obj):
+    characteristics = obj.characteristics
+    is_ability = characteristics is None or getattr(obj, 'source', None) is not None
+    targets = getattr(obj, 'targets_chosen', None)
+    row = [1, obj.controller.seat, is_ability]
+    if characteristics is None:
+        row += [0, 0, 0, 0]
+    else:
+        row += [obj.is_creature, obj.is_instant, obj.is_sorcery,
+                converted_mana_cost(obj)]
+    row.append(len(targets) if targets else 0)
+    return row
+
+
+class Featurizer():
+    def __init__(self, game):
+        self.game = game
+        n = game.num_players
+        self.game_features = np.zeros(len(GAME_FEATURES), dtype=np.float32)
+        self.players = np.zeros((n, len(PLAYER_FEATURES)), dtype=np.float32)
+        self.permanents = np.zeros((n, MAX_PERMANENTS, len(PERMANENT_FEATURES)),
+                                   dtype=np.float32)
+        self.stack = np.zeros((MAX_STACK, len(STACK_FEATURES)), dtype=np.float32)
+
+        self.dirty = {}  # id(permanent) -> permanent, to re-read
+        self._moved = set(range(n))  # seats whose battlefield gained/lost permanents
+        self._rows = [{} for _ in range(n)]  # id(permanent) -> row index
+        self._hands_moved = set(range(n))  # seats whose hand counts need a recount
+        self._stack_moved = True
+        self._revision = None
+        self._had_static_effects = False
+
+        game.featurizer = self
+        self.refresh()
+
+    # -----------------------------------------------------------
+    # what the game tells the featurizer
+    # -----------------------------------------------------------
+
+    def zone_changed(self, event_type, zone, obj):
+        """ obj entered/left zone (see Zone._emit) """
+        zone_type = zone.zone_type
+        if zone_type == 'BATTLEFIELD':
+            seat = zone.controller.seat
+            self._moved.add(seat)
+            if event_type is EventType.ZONE_ENTER:
+                self.dirty[id(obj)] = obj
+            else:
+                self.dirty.pop(id(obj), None)
+        elif zone_type == 'HAND':
+            seat = zone.controller.seat
+            if seat in self._hands_moved:
+                return
+            sign = 1 if event_type is EventType.ZONE_ENTER else -1
+            self.players[seat, _HAND_COUNTS] += sign * _hand_row(obj)
+        elif zone_type == 'STACK':
+            self._stack_moved = True
+
+    # -----------------------------------------------------------
+    # bringing the arrays up to date
+    # -----------------------------------------------------------
+
+    def refresh(self):
+        g = self.game
+        for p in g.players_list:
+            seat = p.seat
+            if min(len(p.battlefield), MAX_PERMANENTS) != len(self._rows[seat]):  # (e.g. Zone.clear)
+                self._moved.add(seat)
+            if seat in self._moved:
+                self._reorder(p)
+            if seat in self._hands_moved or self.players[seat, _P['hand']] != len(p.hand):
+                self._recount_hand(p)
+
+        static_effects = bool(g.continuous.effects)
+        if g.board_revision != self._revision and (static_effects or self._had_static_effects):
+            for p in g.players_list:
+                for q in p.battlefield[:MAX_PERMANENTS]:
+                    self.dirty[id(q)] = q
+        self._had_static_effects = static_effects
+        self._revision = g.board_revision
+
+        if self.dirty:
+            self._reread()
+
+        players = self.players
+        for p in g.players_list:
+            row = players[p.seat]
+            row[0] = p.life
+            pool = p.mana.pool
+            for i, m in enumerate(_MANA_TYPES):
+                row[1 + i] = pool[m]
+            row[_P['library']] = len(p.library)
+            row[_P['graveyard']] = len(p.graveyard)
+            row[_P['exile']] = len(p.exile)
+            row[_P['lands_played']] = p.landPlayed
+
+        if self._stack_moved:
+            self.stack[:] = 0
+            for i, obj in enumerate(g.stack[:MAX_STACK]):
+                self.stack[i] = _stack_row(obj)
+            self._stack_moved = False
+
+        step = g.step
+        self.game_features[0] = g.turn_num
+        self.game_features[1] = step.value if step is not None else -1
+        self.game_features[3] = len(g.stack)
+
+    def _reorder(self, player):
+        """ player's permanents were added or removed: move the rows to
+        battlefield order """
+        seat = player.seat
+        old_rows = self._rows[seat]
+        old = self.permanents[seat].copy()
+        rows = {}
+        block = self.permanents[seat]
+        block[:] = 0
+        for i, p in enumerate(player.battlefield[:MAX_PERMANENTS]):
+            key = id(p)
+            rows[key] = i
+            j = old_rows.get(key)
+            if j is None:
+                self.dirty[key] = p
+            else:
+                block[i] = old[j]
+        self._rows[seat] = rows
+        self._moved.discard(seat)
+
+    def _recount_hand(self, player):
+        counts = self.players[player.seat, _HAND_COUNTS]
+        counts[:] = 0
+        for card in player.hand:
+            counts += _hand_row(card)
+        self._hands_moved.discard(player.seat)
+
+    def _reread(self):
+        for key, p in self.dirty.items():
+            seat = p.controller.seat
+            i = self._rows[seat].get(key)
+            if i is not None:
+                self.permanents[seat, i] = _permanent_row(p)
+        self.dirty = {}
+
+    # -----------------------------------------------------------
+    # reading
+    # -----------------------------------------------------------
+
+    def vector(self, seat):
+        """ every feature from seat's side: seat's rows come first, then
+        the next seats in order; the stack's 'mine' column is seat's """
+        self.refresh()
+        n = len(self.players)
+        order = [(seat + k) % n for k in range(n)]
+        current = self.game.current_player
+        self.game_features[2] = current is not None and current.seat == seat
+        stack = self.stack.copy()
+        stack[:, _MINE] = (stack[:, _MINE] == seat) & (stack[:, 0] > 0)
+        return np.concatenate([self.game_features, self.players[order].ravel(),
+                               self.permanents[order].ravel(), stack.ravel()])
@@ -3,8 +3,13 @@ import os
 import traceback
 import time
 import pdb
+import math
+import random
+import heapq
+import itertools
 
 from copy import deepcopy
+from collections import deque, defaultdict
 
 from MTG import player
 from MTG import zone
@@ -12,6 +17,12 @@ from MTG import cards
 from MTG import gamesteps
 from MTG import combat
 from MTG import triggers
+from MTG import query
+from MTG import continuous
+from MTG import targeting
+from MTG import zobrist
+from MTG.eventlog import EventType
+from MTG.instrumentation import STATS
 from MTG.exceptions import *
 
 from agents.randoms import RandomAgent
@@ -24,20 +35,53 @@ class Game(object):
     """
 
     # Give each player their deck.
-    def __init__(self, decks, test=False):
+    def __init__(self, decks, test=False, seed=None):
+        # every random choice the engine makes goes through self.rng, so a game
+        # is determined by its seed + self.decisions (see MTG/replay.py)
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.decisions = []  # (turn, seat, kind, answer, mana changes)
+        # skip priority windows in which every player is an agent that could
+        # only pass (see can_skip_priority)
+        self.auto_pass = True
         self.stack = zone.Stack()
         self.stack.game = self
         self.passed_priority = 0
         self.step = None
-        self.pending_turns = []
-        self.pending_steps = []
+        self.pending_turns = deque()  # players whose turns come next, in order
+        self.pending_steps = deque()  # rest of the current turn; add to it for extra steps
         self.test = test
         self.turn_num = 0
+        self.game_id = 0
+        self.event_log = None  # eventlog.EventLog; set by whoever runs the game
+        # bumped by anything an effect's toggle/expiration condition could
+        # depend on (zone moves, tapping, counters, damage, effects, steps);
+        # permanents only re-check their conditions when it has changed
+        self.board_revision = 0
+        self.effect_timers = []  # heap of (expiration, seq, permanent, name, effect)
+        self._effect_seq = itertools.count()
+        self.effects_by_source = defaultdict(list)  # id(source) -> [(permanent, name, effect)]
+        self.continuous = continuous.ContinuousEffects(self)  # static effects
+        self.targeting = targeting.Targeting(self)  # legal target sets
+        self.block_matrix = combat.BlockMatrix(self)  # who can block whom
+        self.featurizer = None  # featurizer.Featurizer, if one is attached
+        self.zobrist = zobrist.StateHasher(self)  # see state_hash
+        self.decks = [list(deck) for deck in decks]  # the cards it started with (see fork)
         self.num_players = len(decks)
-        self.players_list = [player.Player(decks[i], 'player' + str(i), game=self)
+        self.players_list = [player.Player(decks[i], 'player' + str(i), game=self, seat=i)
                              for i in range(self.num_players)]
         # self.players = cycle(self.players_list)
 
+        phase_handlers = {
+            gamesteps.Phase.BEGINNING: self.handle_beginning_phase,
+            gamesteps.Phase.PRECOMBAT_MAIN: self.handle_main_phase,
+            gamesteps.Phase.COMBAT: self.handle_combat_phase,
+            gamesteps.Phase.POSTCOMBAT_MAIN: self.handle_main_phase,
+            gamesteps.Phase.ENDING: self.handle_end_phase
+        }
+        self.step_handlers = {step: phase_handlers[phase]
+                              for step, phase in gamesteps.STEP_TO_PHASE.items()}
+
         # self.previous_state = GAME_PREVIOUS_STATE
 
     @property
@@ -50,6 +94,11 @@ class Game(object):
     def eot_time(self):
         return self.turn_num * 100 + gamesteps.Step.CLEANUP._value_
 
+    @property
+    def state_hash(self):
+        """ a 64-bit hash of the game state, updated incrementally (MTG.zobrist) """
+        return self.zobrist.refresh()
+
     @property
     def APNAP(self):
         i = self.players_list.index(self.current_player)
@@ -67,18 +116,30 @@ class Game(object):
     def apply_to_players(self, func):
         return [func(p) for p in self.players_list]
 
-    def add_static_effect(self, name, value, source, toggle_func):
-        for p in self.players_list:
-            p.add_static_effect(name, value, source, toggle_func)
+    def add_static_effect(self, name, value, source, toggle_func, exempt_source=False):
+        """ a static effect on every permanent; see Player.add_static_effect """
+        self.continuous.add(source, name, value, toggle_func, 'game', exempt_source)
 
     def trigger(self, condition, source=None, amount=1):
         for p in self.players_list:
             p.trigger(condition, source, amount)
 
 
+    def emit(self, event_type, player=None, amount=0, name='', target='',
+             from_zone=None, to_zone=None):
+        """ record a game event in the event log (no-op if there is none) """
+        if self.event_log is not None:
+            self.event_log.write(self, event_type, player, amount, name, target,
+                                 from_zone, to_zone)
+
+    def record_decision(self, player, kind, answer, mana=()):
+        """ remember an answer given by a player (kind: 'action' or 'choice') """
+        self.decisions.append((self.turn_num, player.seat, kind, answer, mana))
+
     def apply_stack_item(self, stack_item):
         """ resolving a spell/effect from stack, removing it from the stack """
         print(stack_item)
+        self.emit(EventType.RESOLVE, stack_item.controller, name=stack_item.name)
         stack_item.apply()
         self.stack.remove(stack_item)
 
@@ -95,18 +156,56 @@ class Game(object):
         if isinstance(_zone, str):
             _zone = zone.str_to_zone_type(_zone)
 
+        # every player's zone gets apply_func, so this must not short-circuit;
+        # to only ask whether something matches, use query().any()
         did_something = any([plyr.apply_to_zone(apply_func, _zone, condition)
                              for plyr in self.players_list])
 
         return did_something
 
+    def query(self):
+        """ a lazy query over the game's zones; see MTG.query """
+        return query.Query(self)
+
 
     def apply_to_battlefield(self, apply_func, condition=lambda p: True):
         return self.apply_to_zone(apply_func, zone.ZoneType.BATTLEFIELD, condition)
 
 
-    # TODO
+    def schedule_effect(self, permanent, name, eff):
+        """ register eff (on permanent.effects[name]) to expire by time and/or with its source """
+        if eff.expiration != math.inf and isinstance(eff.expiration, (int, float)):
+            heapq.heappush(self.effect_timers,
+                           (eff.expiration, next(self._effect_seq), permanent, name, eff))
+        if eff.source_bound:
+            self.effects_by_source[id(eff.source)].append((permanent, name, eff))
+
+    def expire_effects(self):
+        """ end the effects whose time has come; True if any did """
+        timers = self.effect_timers
+        if not timers:
+            return False
+        time = self.timestamp
+        did_something = False
+        while timers and timers[0][0] < time:
+            _, _, permanent, name, eff = heapq.heappop(timers)
+            if permanent.remove_effect(name, eff):
+                print("{} has expired (time)".format(eff))
+                did_something = True
+        return did_something
+
+    def end_effects_from(self, source):
+        """ source left its zone: end the effects that last as long as it stays """
+        for permanent, name, eff in self.effects_by_source.pop(id(source), ()):
+            if permanent.remove_effect(name, eff):
+                print("{} has expired (source left)".format(eff))
+        self.continuous.remove_source(source)
+
     def apply_state_based_actions(self):
+        STATS.call('sba', self.step, self._apply_state_based_actions)
+
+    # TODO
+    def _apply_state_based_actions(self):
         # iterate through cards that could possibly cause a state-based action
         _any_action = False
         def any_action():
@@ -117,6 +216,9 @@ class Game(object):
             lambda p: any_action() if p.zone.remove(p) else None,
             lambda p: p.is_token and not p.zone.is_battlefield)
 
+        if self.expire_effects():
+            any_action()
+
         self.apply_to_battlefield(
             lambda p: any_action() if p.check_effect_expiration() else None)
 
@@ -144,11 +246,19 @@ class Game(object):
 
         if _any_action:
             print("Applying state based actions")
-            self.apply_state_based_actions()
+            self._apply_state_based_actions()
 
 
 
+    def can_skip_priority(self):
+        """ True if asking for actions now can only end in everyone passing """
+        return self.auto_pass and all(p.agent is not None and not p.can_act()
+                                      for p in self.players_list)
+
     def handle_priority(self, step, priority=None):
+        STATS.call('priority', step, self._handle_priority, step, priority)
+
+    def _handle_priority(self, step, priority=None):
         # priority tracks the index of the player that currently have priority
         if priority is None:
             priority = self.players_list.index(self.current_player)
@@ -188,13 +298,23 @@ class Game(object):
                             triggers.append(trig)
 
                     triggers = [t.put_on_stack() for t in triggers]
-                    self.stack.elements.extend([t for t in triggers if t is not None])
+                    self.stack.add([t for t in triggers if t is not None])
                     p.pending_triggers = []
                     self.passed_priority = 0
 
             if self.stack:
                 print("\nstack: ", self.stack[::-1])
 
+            if self.can_skip_priority():
+                STATS.count('auto_pass', step)
+                if not self.stack:
+                    break
+                # everyone would pass in turn: resolve the top of the stack
+                self.apply_stack_item(self.stack[-1])
+                self.passed_priority = 0
+                priority = self.players_list.index(self.current_player)
+                continue
+
             # check if player auto pass priority
             if self.players_list[priority].passPriorityUntil not in [None, step]:
                 _play = None
@@ -227,6 +347,26 @@ class Game(object):
                 else:
                     self.stack.add(_play)  # add to stack
 
+    def skip_step(self, step):
+        """ steps that don't happen this turn
+
+        - no declare blockers / combat damage steps without attackers (rule 508.8)
+        - no first strike damage step unless an attacking or blocking
+          creature has first strike or double strike (rule 510.4)
+        """
+        if step not in gamesteps.STEPS_NEEDING_ATTACKERS:
+            return False
+
+        combatants = [p for _player in self.players_list for p in _player.battlefield
+                      if p.status.is_attacking or p.status.is_blocking]
+        if not any(p.status.is_attacking for p in combatants):
+            return True
+
+        if step is gamesteps.Step.FIRST_STRIKE_COMBAT_DAMAGE:
+            return not any(p.has_ability("First Strike") or p.has_ability("Double Strike")
+                           for p in combatants)
+        return False
+
     def handle_beginning_phase(self, step):
         if step is gamesteps.Step.UNTAP:
             self.apply_to_battlefield(lambda p: p.untap(),
@@ -358,19 +498,15 @@ class Game(object):
                     if defender == self.current_player:  # only current player's opponents need to block
                         continue
 
-                    currently_attacking = []  # get all attacking creatures
-                    self.apply_to_battlefield(
-                        lambda p: currently_attacking.append(p),
-                        lambda p: p.status.is_attacking == defender)
+                    # all attacking creatures, and who could block them
+                    matrix = self.block_matrix.of(defender)
+                    currently_attacking = list(matrix.attackers)
 
                     if currently_attacking:
                         print("Creatures attacking {}: {}\n\n".format(
                             defender, currently_attacking))
 
-                        can_block = []
-                        self.apply_to_battlefield(
-                            lambda p: can_block.append(p),
-                            lambda p: p.controller == defender and p.can_block())
+                        can_block = list(matrix.blockers)
 
                         if can_block:
                             print("Potential blockers: {}\n".format(can_block))
@@ -489,36 +625,28 @@ class Game(object):
 
 
     def handle_turn(self):
-        self.pending_steps = []
-        for phase in gamesteps.Phase:
-            self.pending_steps.extend(phase.steps)
+        return STATS.call('turn', None, self._handle_turn)
+
+    def _handle_turn(self):
+        self.emit(EventType.TURN_START, self.current_player, amount=self.turn_num)
+        self.pending_steps = deque(gamesteps.TURN_STRUCTURE)
 
         while self.pending_steps:
-            self.step = self.pending_steps.pop(0)
+            step = self.pending_steps.popleft()
+            if self.skip_step(step):
+                STATS.count('skip_step', step)
+                continue
+            self.step = step
+            self.board_revision += 1
             print(self.step)
-            {
-                gamesteps.Step.UNTAP: self.handle_beginning_phase,
-                gamesteps.Step.UPKEEP: self.handle_beginning_phase,
-                gamesteps.Step.DRAW: self.handle_beginning_phase,
-                gamesteps.Step.PRECOMBAT_MAIN: self.handle_main_phase,
-                gamesteps.Step.BEGINNING_OF_COMBAT: self.handle_combat_phase,
-                gamesteps.Step.DECLARE_ATTACKERS: self.handle_combat_phase,
-                gamesteps.Step.DECLARE_BLOCKERS: self.handle_combat_phase,
-                gamesteps.Step.FIRST_STRIKE_COMBAT_DAMAGE: self.handle_combat_phase,
-                gamesteps.Step.COMBAT_DAMAGE: self.handle_combat_phase,
-                gamesteps.Step.END_OF_COMBAT: self.handle_combat_phase,
-                gamesteps.Step.POSTCOMBAT_MAIN: self.handle_main_phase,
-                gamesteps.Step.END: self.handle_end_phase,
-                gamesteps.Step.CLEANUP: self.handle_end_phase
-            }[self.step](self.step)
+            STATS.call('step', step, self.step_handlers[step], step)
             for _player in self.players_list:
                 _player.mana.clear()
 
         for _player in self.players_list:
             _player.end_turn()
         self.pending_turns.append(self.current_player)
-        self.current_player = self.pending_turns.pop(
-            0)  # cycles to next player's turn
+        self.current_player = self.pending_turns.popleft()  # cycles to next player's turn
         self.turn_num += 1
         return True
 
@@ -546,12 +674,18 @@ class Game(object):
     # TODO
     def setup_game(self):
         print("setting up game...")
+        if self.event_log is not None:
+            for _player in self.players_list:
+                self.emit(EventType.GAME_START, _player, amount=_player.life)
+                for card in _player.library:
+                    self.emit(EventType.ZONE_ENTER, _player, name=card.name,
+                              to_zone=zone.ZoneType.LIBRARY)
         for _player in self.players_list:
             _player.draw(7)
         # everyone gets a turn queued up, in order
         self.pending_turns.extend(self.players_list)
         self.first_player_does_not_draw = True
-        self.current_player = self.pending_turns.pop(0)
+        self.current_player = self.pending_turns.popleft()
 
     def run_game(self):
         self.setup_game()
@@ -560,8 +694,26 @@ class Game(object):
             try:
                 self.handle_turn()
             except GameOverException:
+                winner = self.players_list[0] if self.num_players == 1 else None
+                self.emit(EventType.GAME_END, winner)
                 break
 
+    def fork(self, deadline=None):
+        """ a GameStepper over a copy of this game, re-run from its seed and
+        decisions; asked from inside an agent, the copy's first request is the
+        decision this game is waiting on (see MTG.replay.fork) """
+        from MTG import replay  # replay imports game
+        return replay.fork(self, deadline)
+
+    def lose_by_decking(self):
+        """ run_game raised EmptyLibraryException: the current player tried to
+        draw from an empty library and loses """
+        decking_player = self.current_player
+        print(f"{decking_player.name} tried to draw from an empty library – loses by decking.")
+        decking_player.lose()
+        decking_player.opponent.won = True
+        self.emit(EventType.GAME_END, decking_player.opponent)
+
 
 
 def start_game():
@@ -58,6 +58,7 @@ class GameObject():
     target_criterias = None  # if targets, this is a list of boolean functions
     target_prompts = None  # list of strings
     targets_chosen = None
+    target_revision = None  # game.board_revision when targets_chosen were picked
 
     def __init__(self, characteristics=None,
                  controller=None, owner=None, zone=None, 
@@ -176,8 +177,14 @@ class GameObject():
     def toughness(self):
         return self.characteristics.toughness if self.is_creature else None
 
+    def get_effect(self, name):
+        if name in self.effects:
+            return [eff for eff in self.effects[name] if eff.is_active]
+        else:
+            return []
+
     def has_ability(self, ability):
-        for effect in self.effects['gainAbility']:
+        for effect in self.get_effect('gainAbility'):
             if ability in effect.value:
                 return True
 
@@ -216,10 +223,7 @@ class GameObject():
     ### Targeting ###
 
     def targets(self):
-        targets_chosen = utils.choose_targets(self)
-        if isinstance(targets_chosen, list):
-            self.targets_chosen = targets_chosen
-        return targets_chosen
+        return self.choose_targets()
 
 
     ''' Returns a list of booleans, signifying each target's legality '''
@@ -228,7 +232,8 @@ class GameObject():
             not isinstance(self.target_criterias, list)):
             return []
 
-        return [c(self, t) for c, t in 
+        is_legal = self.game.targeting.is_legal
+        return [is_legal(self, c, t) for c, t in
                 zip(self.target_criterias, self.targets_chosen)]
 
     def has_valid_target(self):
@@ -237,19 +242,9 @@ class GameObject():
 
         # for each target criteria, check if at least one TARGETABLE OBJECT
         # somewhere satisfies this criteria (i.e. is targetable)
+        targeting = self.game.targeting
         for crit in self.target_criterias:
-            has_valid_target = False
-            for _zone in ['battlefield', 'stack',
-                          'graveyard', 'exile']:
-                has_valid_target = self.game.apply_to_zone(lambda _: True, _zone, lambda card: crit(self, card))
-                if has_valid_target:
-                    break
-
-            # see if it can target players
-            if not has_valid_target:
-                has_valid_target = self.game.apply_to_players(lambda p: crit(self, p))
-
-            if not has_valid_target:
+            if not targeting.has_legal_target(self, crit):
                 print(f"{self}: No valid targets.")
                 return False
 
@@ -260,6 +255,7 @@ class GameObject():
         targets_chosen = utils.choose_targets(self)
         if isinstance(targets_chosen, list):
             self.targets_chosen = targets_chosen
+            self.target_revision = self.game.board_revision
 
         return targets_chosen
 
@@ -9,20 +9,7 @@ class Phase(Enum):
 
     @property
     def steps(self):
-        return {
-            Phase.BEGINNING: (Step.UNTAP, Step.UPKEEP, Step.DRAW),
-            Phase.PRECOMBAT_MAIN: (Step.PRECOMBAT_MAIN,),
-            Phase.COMBAT: (
-                Step.BEGINNING_OF_COMBAT,
-                Step.DECLARE_ATTACKERS,
-                Step.DECLARE_BLOCKERS,
-                Step.FIRST_STRIKE_COMBAT_DAMAGE,
-                Step.COMBAT_DAMAGE,
-                Step.END_OF_COMBAT
-            ),
-            Phase.POSTCOMBAT_MAIN: (Step.POSTCOMBAT_MAIN,),
-            Phase.ENDING: (Step.END, Step.CLEANUP)
-        }[self]
+        return PHASE_STEPS[self]
 
 
 class Step(Enum):
@@ -42,18 +29,31 @@ class Step(Enum):
 
     @property
     def phase(self):
-        return {
-            Step.UNTAP: Phase.BEGINNING,
-            Step.UPKEEP: Phase.BEGINNING,
-            Step.DRAW: Phase.BEGINNING,
-            Step.PRECOMBAT_MAIN: Phase.PRECOMBAT_MAIN,
-            Step.BEGINNING_OF_COMBAT: Phase.COMBAT,
-            Step.DECLARE_ATTACKERS: Phase.COMBAT,
-            Step.DECLARE_BLOCKERS: Phase.COMBAT,
-            Step.FIRST_STRIKE_COMBAT_DAMAGE: Phase.COMBAT,
-            Step.COMBAT_DAMAGE: Phase.COMBAT,
-            Step.END_OF_COMBAT: Phase.COMBAT,
-            Step.POSTCOMBAT_MAIN: Phase.POSTCOMBAT_MAIN,
-            Step.END: Phase.ENDING,
-            Step.CLEANUP: Phase.ENDING
-        }[self]
\ No newline at end of file
+        return STEP_TO_PHASE[self]
+
+
+# the turn structure, computed once (rule 500.1)
+PHASE_STEPS = {
+    Phase.BEGINNING: (Step.UNTAP, Step.UPKEEP, Step.DRAW),
+    Phase.PRECOMBAT_MAIN: (Step.PRECOMBAT_MAIN,),
+    Phase.COMBAT: (
+        Step.BEGINNING_OF_COMBAT,
+        Step.DECLARE_ATTACKERS,
+        Step.DECLARE_BLOCKERS,
+        Step.FIRST_STRIKE_COMBAT_DAMAGE,
+        Step.COMBAT_DAMAGE,
+        Step.END_OF_COMBAT
+    ),
+    Phase.POSTCOMBAT_MAIN: (Step.POSTCOMBAT_MAIN,),
+    Phase.ENDING: (Step.END, Step.CLEANUP)
+}
+
+STEP_TO_PHASE = {step: phase for phase, steps in PHASE_STEPS.items() for step in steps}
+
+# every step of a normal turn, in order
+TURN_STRUCTURE = tuple(step for phase in Phase for step in PHASE_STEPS[phase])
+
+# skipped if no creature is attacking (rule 508.8)
+STEPS_NEEDING_ATTACKERS = frozenset((Step.DECLARE_BLOCKERS,
+                                     Step.FIRST_STRIKE_COMBAT_DAMAGE,
+                                     Step.COMBAT_DAMAGE))
@@ -0,0 +1,86 @@
+"""Runtime-switchable counters and timers for the engine's hot paths.
+
+    from MTG.instrumentation import STATS
+
+    STATS.enable()
+    ...                                  # run a batch of games
+    STATS.export('debug/x_instrumentation.json', games=100)
+    print(STATS.report())
+
+Every entry is keyed by (kind, label). kind is what ran: 'turn', 'step',
+'priority', 'sba', 'select_action', 'select_choice', 'zone_enter' or
+'zone_leave'. label is the step it ran in, or the zone for zone moves.
+Timings use perf_counter_ns and are inclusive: a 'step' contains its
+'priority' windows, and those contain the agents' decisions. Zone moves are
+only counted, because they are cheaper than reading the clock.
+
+While disabled, each hook costs one attribute check.
+"""
+import json
+from time import perf_counter_ns
+from collections import defaultdict
+
+
+def _label(label):
+    if label is None:
+        return '-'
+    return getattr(label, 'name', label)
+
+
+class Instrumentation():
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counts = defaultdict(int)
+        self.total_ns = defaultdict(int)
+
+    def add(self, kind, label, ns):
+        self.counts[(kind, label)] += 1
+        self.total_ns[(kind, label)] += ns
+
+    def count(self, kind, label):
+        if self.enabled:
+            self.counts[(kind, label)] += 1
+
+    def call(self, kind, label, func, *args):
+        """ func(*args), timed under (kind, label) if enabled """
+        if not self.enabled:
+            return func(*args)
+        start = perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            self.add(kind, label, perf_counter_ns() - start)
+
+    def as_dict(self):
+        """ {kind: {label: {'count': n, 'total_ns': t, 'mean_ns': t / n}}} """
+        out = defaultdict(dict)
+        for (kind, label), n in self.counts.items():
+            t = self.total_ns.get((kind, label), 0)
+            out[kind][_label(label)] = {'count': n, 'total_ns': t,
+                                        'mean_ns': t / n if n else 0}
+        return dict(out)
+
+    def export(self, path, **meta):
+        """ write the current counters (plus any metadata, e.g. games=100) as JSON """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'stats': self.as_dict()}, f, indent=2, sort_keys=True)
+
+    def report(self):
+        lines = ['%-14s %-26s %10s %12s %12s' % ('kind', 'label', 'count', 'total ms', 'mean us')]
+        for kind, labels in sorted(self.as_dict().items()):
+            for label, s in sorted(labels.items(), key=lambda kv: -kv[1]['total_ns']):
+                lines.append('%-14s %-26s %10d %12.1f %12.1f' % (
+                    kind, label, s['count'], s['total_ns'] / 1e6, s['mean_ns'] / 1e3))
+        return '\n'.join(lines)
+
+
+STATS = Instrumentation()
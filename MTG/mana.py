@@ -82,6 +82,19 @@ class ManaPool():
                 return False
         return True
 
+    def snapshot(self):
+        return dict(self.pool)
+
+    def changes_since(self, snapshot):
+        """ list of (Mana value, delta) for every mana type whose amount changed """
+        return [(m.value, self.pool.get(m, 0) - snapshot.get(m, 0))
+                for m in Mana
+                if self.pool.get(m, 0) != snapshot.get(m, 0)]
+
+    def apply_changes(self, changes):
+        for value, delta in changes:
+            self.pool[Mana(value)] += delta
+
 
     def determine_costs(self, manacost):
         """ Converts string mana costs to mana dict, resolving hybrid / additional costs"""
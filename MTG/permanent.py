@@ -13,6 +13,7 @@ from MTG import cardtype
 from MTG import triggers
 from MTG import play
 from MTG import abilities
+from MTG.eventlog import EventType
 
 
 
@@ -120,11 +121,18 @@ from MTG import abilities
 
 
 class Status():
+    permanent = None  # the permanent whose status this is (see Permanent._changed)
+
     def __init__(self):
         self.reset()
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if self.permanent is not None and name != 'permanent':
+            self.permanent._changed()
+
     def __repr__(self):
-        return str(self.__dict__)
+        return str({k: v for k, v in self.__dict__.items() if k != 'permanent'})
 
 
     def __str__(self):
@@ -161,21 +169,30 @@ class Status():
 
 
 
+def _always(eff):
+    return True
+
+
 class Effect():
     """ name: name of effct (dict key to self.effects)
 
     expiration: either a float representing timestamp (usually eot),
                 or a function (lambda eff: ...) that when evaluated to True signals expiration
 
+    source_bound: lasts as long as the source stays where it is (static effects)
+
     toggle_func is the function that, while inactive, if evaluated to True toggles on the effct
         while active, the toggle function is negated; thus, it is passed into Effect(...)
         as a boolean dictionary (toggle_funcs)
     """
     def __init__(self, value, timestamp, apply_target=None, source=None, expiration=math.inf, is_active=True,
-                 toggle_func=lambda eff: False):
+                 toggle_func=lambda eff: False, source_bound=False):
         self.value = value
         self.source = source
         self.expiration = expiration
+        self.source_bound = source_bound
+        # False if the effect can never toggle or expire on a condition
+        self.watched = callable(expiration) or not (is_active and toggle_func is _always)
         self.is_active = is_active
         self.toggle_funcs = {False: toggle_func,
                              True: lambda eff: not toggle_func(eff)}
@@ -199,10 +216,12 @@ class Permanent(gameobject.GameObject):
         # including (..., EXPIRATION_TIME, TIMESTAMP)
         self.effects = defaultdict(lambda: SortedListWithKey(
                                            [], lambda x : x.timestamp))
-
-        for name, value, source, toggle_func in self.controller.static_effects:
-            # apply existing static effects
-            self.add_effect(name, value, source=source, is_active=False, toggle_func=toggle_func)
+        # effects whose toggle/expiration condition is re-checked, and the
+        # board revision they were last checked at
+        self._watched_effects = []
+        self._effects_revision = None
+        self._effect_cache = {}  # name -> get_effect(name), at _effect_cache_revision
+        self._effect_cache_revision = None
 
         if status is None:
             if original_card and original_card.status:
@@ -211,6 +230,7 @@ class Permanent(gameobject.GameObject):
                 self.status = Status()
         else:
             self.status = status
+        self.status.permanent = self
 
         if original_card:
             self.attributes = original_card.attributes
@@ -227,7 +247,7 @@ class Permanent(gameobject.GameObject):
 
             for apply_to, name, value, toggle_func in original_card.static_effects:
                 if apply_to == 'self':
-                    self.add_effect(name, value, source=self, is_active=False, toggle_func=toggle_func)
+                    self.game.continuous.add(self, name, value, toggle_func, 'self')
                 elif apply_to == 'controller':
                     self.controller.add_static_effect(name, value, source=self, toggle_func=toggle_func)
                 elif apply_to == 'game':
@@ -288,44 +308,95 @@ class Permanent(gameobject.GameObject):
     #     self.modifier.reset()
 
     def add_effect(self, name, value, source=None, expiration=math.inf,
-                   is_active=True, toggle_func=lambda eff: True):
-        if expiration == math.inf and source:
-            # static effect; auto expries if source expires
-            t = source.timestamp
-            expiration = lambda eff: eff.source.timestamp != t
-
-        eff = Effect(value, self.controller.game.timestamp, self, source,
-                     expiration, is_active, toggle_func)
+                   is_active=True, toggle_func=_always):
+        game = self.controller.game
+        # static effect; auto expires when the source leaves (Game.end_effects_from)
+        source_bound = expiration == math.inf and source is not None
+
+        eff = Effect(value, game.timestamp, self, source,
+                     expiration, is_active, toggle_func, source_bound)
         self.effects[name].add(eff)
+        game.schedule_effect(self, name, eff)
+        if eff.watched:
+            self._watched_effects.append((name, eff))
+        game.board_revision += 1
+        self._changed()
         self.check_effect_expiration()
 
+    def remove_effect(self, name, eff):
+        """ False if eff was already gone """
+        category = self.effects.get(name)
+        if not category or eff not in category:
+            return False
+        category.remove(eff)
+        self.controller.game.board_revision += 1
+        self._changed()
+        return True
+
+    def _changed(self):
+        """ this permanent's status, effects or counters changed: the game's
+        featurizer (if any) and state hash re-read it """
+        game = self.controller.game
+        if game.featurizer is not None:
+            game.featurizer.dirty[id(self)] = self
+        if game.zobrist.built:
+            game.zobrist.dirty[id(self)] = self
+
     def get_effect(self, name):
-        if name in self.effects:
-            return [eff for eff in self.effects[name] if eff.is_active]
-        else:
-            return []
+        """ active effects called name, by timestamp: this permanent's own
+        (e.g. until end of turn) and the static effects that apply to it
+
+        Cached until the board revision changes (which any change to an
+        effect causes).
+        """
+        game = self.controller.game
+        if self._effect_cache_revision != game.board_revision:
+            self._effect_cache = {}
+            self._effect_cache_revision = game.board_revision
+        found = self._effect_cache.get(name)
+        if found is not None:
+            return found
+
+        found = super(Permanent, self).get_effect(name)
+        static = game.continuous.applying_to(self).get(name)
+        if static:
+            found = sorted(found + static, key=lambda eff: eff.timestamp) if found else static
+        self._effect_cache[name] = found
+        return found
 
     def check_effect_expiration(self):
-        did_something = False
-        time = self.controller.game.timestamp
-        for category in self.effects.values():
-            for eff in category[:]:
-                if eff.toggle_funcs[eff.is_active](eff):
-                    eff.is_active = not eff.is_active
-                    print("{} active/nonactive toggled".format(eff))
-
-                if isinstance(eff.expiration, (int, float)):
-                    if eff.expiration < time:
-                        category.remove(eff)
-                        print("{} has expired (time)".format(eff))
-                        did_something = True
-
-                elif callable(eff.expiration):
-                    if eff.expiration(eff):
-                        category.remove(eff)
-                        print("{} has expired (condition)".format(eff))
-                        did_something = True
+        """ toggle effects / end those with an expiration condition
+
+        Only the effects that have a condition are looked at, and only if the
+        board has changed since the last check. Effects that expire at a time
+        or with their source are ended by the game (see Game.expire_effects).
+        """
+        game = self.controller.game
+        if self._effects_revision == game.board_revision:
+            return False
+        self._effects_revision = game.board_revision
 
+        did_something = False
+        watched = []
+        for name, eff in self._watched_effects:
+            if eff not in self.effects[name]:  # ended by the game
+                continue
+
+            if eff.toggle_funcs[eff.is_active](eff):
+                eff.is_active = not eff.is_active
+                game.board_revision += 1
+                self._changed()
+                print("{} active/nonactive toggled".format(eff))
+
+            if callable(eff.expiration) and eff.expiration(eff):
+                self.remove_effect(name, eff)
+                print("{} has expired (condition)".format(eff))
+                did_something = True
+                continue
+
+            watched.append((name, eff))
+
+        self._watched_effects = watched
         return did_something
 
 
@@ -334,6 +405,7 @@ class Permanent(gameobject.GameObject):
     def tap(self):
         if not self.status.tapped:
             self.status.tapped = True
+            self.game.board_revision += 1
             self.trigger("onTap")
             return True
         return False
@@ -341,6 +413,7 @@ class Permanent(gameobject.GameObject):
     def untap(self):
         if (self.status.tapped) and not self.status.not_untap:
             self.status.tapped = False
+            self.game.board_revision += 1
             self.trigger("onUntap")
             return True
 
@@ -370,6 +443,8 @@ class Permanent(gameobject.GameObject):
 
     def add_counter(self, counter="+1/+1", num=1):
         self.status.counters[counter] += num
+        self.game.board_revision += 1
+        self._changed()
 
     def num_counters(self, counter):
         return self.status.counters[counter]
@@ -383,7 +458,7 @@ class Permanent(gameobject.GameObject):
         for effect in self.get_effect('setPT'):
             if effect.value[0] != '*':  # keep it as is
                 power = effect.value[0]
-            if effect[1] != '*':
+            if effect.value[1] != '*':
                 toughness = effect.value[1]
 
         # layer 7c
@@ -437,6 +512,7 @@ class Permanent(gameobject.GameObject):
         return self.is_creature and not self.status.tapped
 
     def attacks(self, player):
+        self.game.emit(EventType.ATTACK, self.controller, name=self.name, target=player.name)
         self.trigger("onAttack", player)
         self.status.is_attacking = player
         if not self.has_ability("Vigilance"):
@@ -444,9 +520,11 @@ class Permanent(gameobject.GameObject):
 
     def blocks(self, creature):
         if self.can_block(creature):
+            self.game.emit(EventType.BLOCK, self.controller, name=self.name, target=creature.name)
             self.trigger("onBlock", creature)
 
             self.status.is_blocking.append(creature)
+            self._changed()
             if type(creature.status.is_attacking) == type(self.controller):
                 creature.status.is_attacking = []
 
@@ -474,7 +552,9 @@ class Permanent(gameobject.GameObject):
             self.trigger('onTakeCombatDamage', source, dmg)
 
         self.status.damage_taken += dmg
+        self.game.board_revision += 1
         print("{} takes {} damage from {}\n".format(self, dmg, source))
+        self.game.emit(EventType.DAMAGE, self.controller, dmg, str(source), self.name)
         if source and source.has_ability("Deathtouch"):
             self.destroy()
         # pdb.set_trace()
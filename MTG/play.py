@@ -44,9 +44,11 @@ class Play(gameobject.GameObject):
         if not targets_chosen and card:
             self.targets_chosen = card.targets_chosen
             self.target_criterias = card.target_criterias
+            self.target_revision = card.target_revision
         elif not targets_chosen and source:
             self.targets_chosen = source.targets_chosen
             self.target_criterias = source.target_criterias
+            self.target_revision = source.target_revision
 
         if self.targets_chosen:
             self.target_timestamps = [t.timestamp for t in self.targets_chosen]
@@ -78,8 +80,8 @@ class Play(gameobject.GameObject):
         # check target validity by affirming that at least one timestamp is the same
         # AND targets are still valid (e.g. still a creature)
         # TODO: shroud/hexproof/protection
-        elif self.targets_chosen and not any([c(self, t) and t.timestamp == time for c, t, time in zip(self.target_criterias,
-                                           self.targets_chosen, self.target_timestamps)]):
+        elif (self.targets_chosen and len(self.game.targeting.invalidated(self))
+                                      == len(self.targets_chosen)):
             print("All targets invalid. %r fizzles." % self)
             fizzles = True
 
@@ -1,7 +1,6 @@
 import pdb
 import traceback
 import random
-from copy import deepcopy
 from collections import defaultdict
 
 from MTG import mana
@@ -11,6 +10,8 @@ from MTG import gamesteps
 from MTG import cards
 from MTG import triggers
 from MTG import token
+from MTG.eventlog import EventType
+from MTG.instrumentation import STATS
 from MTG.exceptions import *
 
 
@@ -22,8 +23,9 @@ class Player():
     is_spell = False
 
     def __init__(self, deck, name='player',
-                 startingLife=20, maxHandSize=7, game=None, agent=None):
+                 startingLife=20, maxHandSize=7, game=None, agent=None, seat=0):
         self.name = name
+        self.seat = seat  # index in game.players_list at the start of the game
         self.game = game
         self.agent = agent  # placeholder / hook for AI agents
 
@@ -57,8 +59,6 @@ class Player():
         self.turn_events = defaultdict(lambda: None)
         self.last_turn_events = defaultdict(lambda: None)
 
-        self.static_effects = []
-
         # tracks which permanents cares about each player-init triggers
         # trigger_listeners[condition] = list of (permanent, tstamp), where permanent cares about condition
         #       and tstamp is stored to check permanent expiration
@@ -73,7 +73,8 @@ class Player():
         return self.name
 
     def __eq__(x, y):
-        return isinstance(y, x.__class__) and x.__repr__() == y.__repr__()
+        # same as comparing reprs, which only show the name
+        return x is y or (isinstance(y, x.__class__) and x.name == y.name)
 
     def __hash__(self):
         return hash(self.__repr__())
@@ -88,11 +89,12 @@ class Player():
 
     @property
     def creatures(self):
-        return self.battlefield.filter(filter_func=lambda p: p.is_creature)
+        """ creatures on this player's battlefield, in battlefield order """
+        return self.game.query().of(self).battlefield().creatures().all()
 
     @property
     def lands(self):
-        return self.battlefield.filter(filter_func=lambda p: p.is_land)
+        return self.game.query().of(self).battlefield().lands().all()
 
     @property
     def stack(self):
@@ -127,7 +129,12 @@ class Player():
                         self.game.step))
             else:
                 # Agent returns a command string like "", "p 0", "a 1_0", etc.
-                answer = self.agent.select_action(self, self.game)
+                # (research agents also add mana to the pool here; record that too)
+                pool = self.mana.snapshot()
+                answer = STATS.call('select_action', self.game.step,
+                                    self.agent.select_action, self, self.game)
+                self.game.record_decision(self, 'action', answer,
+                                          self.mana.changes_since(pool))
 
             if self.game.test:
                 print("\t" + self.name + ", " +
@@ -251,6 +258,8 @@ class Player():
                             _creature.tap()
 
                         print("{} playing {} targeting {}\n".format(self, card, card.targets_chosen))
+                        if not card.is_land:
+                            self.game.emit(EventType.CAST, self, name=card.name)
                         _play = play.Play(card.play_func,
                                           card=card)
                         # special actions
@@ -291,11 +300,11 @@ class Player():
 
                     # if card._activated_abilities_costs_validation[nums[1]](card):
                     # TODO: target validation
-                    PLAYER_PREVIOUS_STATE = deepcopy(self)
                     # if card._activated_abilities_costs[nums[1]](card):
                     if card.activated_abilities[nums[1]].can_activate():
                         # TODO: make each ability have its own description/name for printing
                         _play = card.activate_ability(nums[1])
+                        self.game.emit(EventType.ACTIVATE, self, amount=nums[1], name=card.name)
                     else:
                         raise ResetGameException
 
@@ -316,7 +325,6 @@ class Player():
 
             except ResetGameException:
                 print("Illegial action. Resetting...")
-                self = PLAYER_PREVIOUS_STATE
 
             except:
                 traceback.print_exc()
@@ -327,6 +335,39 @@ class Player():
 
     # separate func for unit testing
 # separate func for unit testing
+    def at_sorcery_speed(self):
+        return (self.is_active and not self.game.stack
+                and self.game.step.phase in (gamesteps.Phase.PRECOMBAT_MAIN,
+                                             gamesteps.Phase.POSTCOMBAT_MAIN))
+
+    def can_play(self, card, sorcery_speed=None):
+        """ whether the timing rules let this player play card from hand now
+        (mana isn't checked; see can_act) """
+        if sorcery_speed is None:
+            sorcery_speed = self.at_sorcery_speed()
+        if card.is_land:
+            return sorcery_speed and self.landPlayed < self.landPerTurn
+        return sorcery_speed or card.is_instant or card.has_ability('Flash')
+
+    def can_act(self):
+        """ False if passing is the only thing this player could do with priority now
+
+        Mana is not checked (research agents put mana into their pool as they
+        act), and mana abilities don't count: on their own they can't change
+        the game.
+        """
+        sorcery_speed = self.at_sorcery_speed()
+        for card in self.hand:
+            if self.can_play(card, sorcery_speed):
+                return True
+
+        for permanent in self.battlefield:
+            for ability in permanent.activated_abilities:
+                if not ability.is_mana_ability and ability.could_activate():
+                    return True
+
+        return False
+
     def make_choice(self, prompt_string):
         """
         Generic prompt for user input.
@@ -334,13 +375,18 @@ class Player():
         If this player has an agent, delegate the decision to the agent
         instead of reading from stdin.
         """
+        pool = self.mana.snapshot()
         if self.agent is None:
             # Human player
             ans = input(prompt_string)
         else:
             # AI player: agent returns a string answer, e.g. "0" or "".
             # We pass prompt_string in case the agent wants to inspect it.
-            ans = self.agent.select_choice(self, self.game, prompt_string)
+            ans = STATS.call('select_choice', self.game.step if self.game else None,
+                             self.agent.select_choice, self, self.game, prompt_string)
+
+        if self.game:
+            self.game.record_decision(self, 'choice', ans, self.mana.changes_since(pool))
 
         if ans == 'debug':  # TODO: only enable during dev
             pdb.set_trace()
@@ -389,22 +435,18 @@ class Player():
     def add_static_effect(self, name, value, source, toggle_func, exempt_source=False):
         """ toggle_func: condition func on which permanents the static effect affects -- lambda eff: True
 
-        e.g. lambda eff: eff.source.is_creature applies to all creatures
+        e.g. lambda eff: eff.apply_target.is_creature applies to all creatures
 
         exempt_source: True if the effect only applies to 'other permanents'
-        """
-        self.static_effects.append((name, value, source, toggle_func))
-        for p in self.battlefield:
-            p.add_effect(name, value, source=source, is_active=False, toggle_func=toggle_func)
 
-        if not exempt_source:  # when this func is called during permanent.__init__(),
-                               # the card isn't on the battlefield yet.
-            source.add_effect(name, value, source=source, is_active=False, toggle_func=toggle_func)
+        The effect applies to the permanents controlled by source's controller
+        (see MTG.continuous).
+        """
+        self.game.continuous.add(source, name, value, toggle_func, 'controller', exempt_source)
 
     def remove_static_effect(self, source):
         """ remove all effects from a certain source """
-        self.static_effects = [eff for eff in self.static_effects if eff[2] != source]
-        # each permanent should auto-remove since source's timestamp has changed
+        self.game.continuous.remove_source(source)
 
     def trigger(self, condition, source=None, amount=1):
         """Pass player-init triggers to relevant permanents
@@ -451,6 +493,7 @@ class Player():
             try:
                 card = self.library.pop()
                 self.hand.add(card)
+                self.game.emit(EventType.DRAW, self, name=card.name)
             except IndexError:
                 raise EmptyLibraryException()
 
@@ -532,7 +575,7 @@ class Player():
 
         elif rand or self.autoDiscard:
             print("randomly discarding %i...\n" % num)
-            cards_to_discard = random.sample(self.hand.elements, num)
+            cards_to_discard = self.game.rng.sample(self.hand.elements, num)
 
         else:
             # prompt player pick which cards
@@ -663,6 +706,8 @@ class Player():
         # trigger
         print("{} takes {} damage from {}\n".format(self, dmg, source))
         self.life -= dmg
+        self.game.emit(EventType.DAMAGE, self, dmg, str(source), self.name)
+        self.game.emit(EventType.LIFE_CHANGE, self, -dmg)
 
     def gain_life(self, amount):
         self.trigger(triggers.triggerConditions.onControllerLifeGain, amount=amount)
@@ -674,6 +719,7 @@ class Player():
             self.turn_events['life gain'] = amount
         print("%r: gaining %i life\n" % (self, amount))
         self.life += amount
+        self.game.emit(EventType.LIFE_CHANGE, self, amount)
 
     def lose_life(self, amount):
         self.trigger('onLifeLoss', amount=amount)
@@ -685,6 +731,7 @@ class Player():
             self.turn_events['life loss'] = amount
 
         self.life -= amount
+        self.game.emit(EventType.LIFE_CHANGE, self, -amount)
 
     def set_life_total(self, value):
         if self.life < value:
@@ -0,0 +1,168 @@
+"""Lazy, chainable queries over the game's zones.
+
+    game.query().battlefield().creatures().controlled_by(p).untapped().all()
+    game.query().of(p).hand().named('Plains').first()
+    game.query().public().players().where(lambda o: crit(source, o)).any()
+
+Every call returns a new Query, so a partial query can be kept and reused.
+Nothing is scanned until a terminal method runs: all(), first(), any() and
+count(), or iteration. first() and any() stop at the first match, and
+count() never builds a collection.
+
+Results are ordered: zones in the order they were selected, each player's
+zone in seat order, and within a zone the zone's own order (the one the
+"b 2" / "oh 0" commands index). The stack is shared and only visited once.
+If no zone is selected, the public zones (battlefield, stack, graveyard and
+exile) are searched.
+
+named() looks cards up in the zones' name index instead of scanning them.
+A library is searched in entry order, so a query never observes (or pays
+for) a pending shuffle.
+"""
+from operator import attrgetter
+
+from MTG.zone import ZoneType, str_to_zone_type
+
+
+PUBLIC_ZONES = (ZoneType.BATTLEFIELD, ZoneType.STACK, ZoneType.GRAVEYARD, ZoneType.EXILE)
+
+_is_creature = attrgetter('is_creature')
+_is_land = attrgetter('is_land')
+
+
+def _is_tapped(obj):
+    return obj.status.tapped
+
+
+def _is_untapped(obj):
+    return not obj.status.tapped
+
+
+class Query():
+    def __init__(self, game):
+        self.game = game
+        self.zone_types = ()
+        self.players_only = None  # restrict to these players' zones
+        self.include_players = False
+        self.predicates = ()
+        self.name = None
+
+    def _with(self, **changes):
+        q = Query.__new__(Query)
+        q.__dict__ = dict(self.__dict__, **changes)
+        return q
+
+    # -----------------------------------------------------------
+    # where to look
+    # -----------------------------------------------------------
+
+    def zone(self, *zone_types):
+        zone_types = tuple(str_to_zone_type(z) if isinstance(z, str) else z
+                           for z in zone_types)
+        return self._with(zone_types=self.zone_types + zone_types)
+
+    def battlefield(self):
+        return self.zone(ZoneType.BATTLEFIELD)
+
+    def stack(self):
+        return self.zone(ZoneType.STACK)
+
+    def graveyard(self):
+        return self.zone(ZoneType.GRAVEYARD)
+
+    def exile(self):
+        return self.zone(ZoneType.EXILE)
+
+    def hand(self):
+        return self.zone(ZoneType.HAND)
+
+    def library(self):
+        return self.zone(ZoneType.LIBRARY)
+
+    def public(self):
+        return self.zone(*PUBLIC_ZONES)
+
+    def players(self):
+        """ also yield the players themselves (after the zones' objects) """
+        return self._with(include_players=True)
+
+    def of(self, *players):
+        """ only these players' zones (and, with players(), only these players) """
+        return self._with(players_only=players)
+
+    # -----------------------------------------------------------
+    # what to keep
+    # -----------------------------------------------------------
+
+    def where(self, func):
+        return self._with(predicates=self.predicates + (func,))
+
+    def creatures(self):
+        return self.where(_is_creature)
+
+    def lands(self):
+        return self.where(_is_land)
+
+    def tapped(self):
+        return self.where(_is_tapped)
+
+    def untapped(self):
+        return self.where(_is_untapped)
+
+    def controlled_by(self, player):
+        return self.where(lambda obj: obj.controller is player)
+
+    def named(self, name):
+        return self._with(name=name)
+
+    # -----------------------------------------------------------
+    # results
+    # -----------------------------------------------------------
+
+    def _zones(self):
+        players = self.players_only or self.game.players_list
+        for zone_type in self.zone_types or PUBLIC_ZONES:
+            if zone_type is ZoneType.STACK:
+                yield self.game.stack
+            else:
+                for player in players:
+                    yield player.get_zone(zone_type)
+
+    def _candidates(self):
+        name = self.name
+        for z in self._zones():
+            if name is not None:
+                yield from z.cards_named(name)
+            else:
+                yield from z.contents()
+
+        if self.include_players:
+            for player in self.players_only or self.game.players_list:
+                if name is None or player.name == name:
+                    yield player
+
+    def __iter__(self):
+        predicates = self.predicates
+        for obj in self._candidates():
+            for pred in predicates:
+                if not pred(obj):
+                    break
+            else:
+                yield obj
+
+    def all(self):
+        return list(self)
+
+    def first(self, default=None):
+        return next(iter(self), default)
+
+    def any(self):
+        for _ in self:
+            return True
+        return False
+
+    def count(self):
+        n = 0
+        for _ in self:
+            n += 1
+        return n
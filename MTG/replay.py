@@ -0,0 +1,201 @@
+"""Deterministic replay of a game from its seed and decision log.
+
+Every Game draws its randomness from game.rng (seeded by game.seed) and
+appends each answer returned by Player.get_action / Player.make_choice to
+game.decisions, together with any mana the agent put into the pool while
+deciding. Those two things are enough to re-run the game exactly:
+
+    rec = replay.record_of(g, deck_names)      # after the game
+    replay.write_record(f, rec)                # one JSON line per game
+
+    rec = replay.read_record(path, game_id)
+    g = replay.replay_game(rec, decks, from_turn=12, to_turn=13)
+
+replay_game feeds the recorded answers back through ReplayAgent (no agent
+code runs), keeps stdout quiet until `from_turn` and stops after `to_turn`,
+returning the Game for inspection.
+
+fork(g) (or g.fork()) does the same to a game in progress, from its own
+decks, seed and decisions, and hands the copy to a GameStepper: the copy
+runs up to the decision g is waiting on and asks the caller from there on.
+A search agent can try an answer in a fork without touching g:
+
+    stepper = g.fork()
+    request = stepper.start()                  # the same decision, in the copy
+    request = stepper.send(answer)
+    ...
+    stepper.close()
+"""
+import sys
+import json
+import time
+import contextlib
+from collections import deque, namedtuple
+
+from MTG import game
+from MTG.stepper import GameStepper
+from MTG.exceptions import *
+
+
+Decision = namedtuple('Decision', ['turn', 'seat', 'kind', 'answer', 'mana'])
+
+GameRecord = namedtuple('GameRecord', ['game_id', 'seed', 'decks', 'decisions'])
+
+
+def record_of(g, deck_names):
+    return GameRecord(g.game_id, g.seed, list(deck_names),
+                      [Decision(*d) for d in g.decisions])
+
+
+def write_record(f, record):
+    f.write(json.dumps({'game_id': record.game_id,
+                        'seed': record.seed,
+                        'decks': record.decks,
+                        'decisions': [[d.turn, d.seat, d.kind, d.answer, d.mana]
+                                      for d in record.decisions]}))
+    f.write('\n')
+
+
+def read_records(f):
+    """Yield the GameRecords in a decision log (a path or an open text file)."""
+    if isinstance(f, str):
+        with open(f, 'r', encoding='utf-8') as opened:
+            yield from read_records(opened)
+        return
+
+    for line in f:
+        if not line.strip():
+            continue
+        d = json.loads(line)
+        yield GameRecord(d['game_id'], d['seed'], d['decks'],
+                         [Decision(turn, seat, kind, answer, [tuple(m) for m in mana])
+                          for turn, seat, kind, answer, mana in d['decisions']])
+
+
+def read_record(path, game_id):
+    for record in read_records(path):
+        if record.game_id == game_id:
+            return record
+    raise KeyError('game %r not found in %s' % (game_id, path))
+
+
+class ReplayAgent():
+    """Answers from a recorded decision queue (shared by all players of a game).
+
+    Once the queue is empty the decision goes to `agent` if one is given
+    (e.g. to let a different policy take over from a recorded position);
+    otherwise the replay has run past the end of the log, which is an error.
+    A recorded decision asked for after `deadline` (a time.perf_counter()
+    value) raises GameAbortedException instead.
+    """
+
+    def __init__(self, decisions, agent=None, deadline=None):
+        self.decisions = decisions
+        self.agent = agent
+        self.deadline = deadline
+
+    def _next(self, player, game):
+        if not self.decisions:
+            return None
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise GameAbortedException('replay ran past its deadline')
+        d = self.decisions.popleft()
+        if d.seat != player.seat or d.turn != game.turn_num:
+            raise ReplayDivergedException(
+                'expected a decision by seat %r on turn %r, got seat %r on turn %r'
+                % (d.seat, d.turn, player.seat, game.turn_num))
+        player.mana.apply_changes(d.mana)
+        return d
+
+    def select_action(self, player, game):
+        d = self._next(player, game)
+        if d is not None:
+            return d.answer
+        if self.agent is None:
+            raise ReplayDivergedException('decision log exhausted')
+        return self.agent.select_action(player, game)
+
+    def select_choice(self, player, game, prompt_string):
+        d = self._next(player, game)
+        if d is not None:
+            return d.answer
+        if self.agent is None:
+            raise ReplayDivergedException('decision log exhausted')
+        return self.agent.select_choice(player, game, prompt_string)
+
+
+class _QuietUntilTurn():
+    """stdout stand-in that drops output until the game reaches `turn`"""
+
+    def __init__(self, g, turn, out):
+        self.game = g
+        self.turn = turn
+        self.out = out
+
+    def write(self, s):
+        if self.game.turn_num >= self.turn:
+            return self.out.write(s)
+        return len(s)
+
+    def flush(self):
+        self.out.flush()
+
+
+def replay_game(record, decks, from_turn=0, to_turn=None, test=True, agents=None):
+    """Re-run a recorded game.
+
+    decks: the same card lists the game was played with (fresh copies)
+    from_turn: narration is suppressed before this turn (fast-forward)
+    to_turn: stop once this turn is over; None plays to the end
+    agents: optional per-seat agents that take over when the log runs out
+
+    Returns the Game in the state it was left in.
+    """
+    g = game.Game(decks, test=test, seed=record.seed)
+    g.game_id = record.game_id
+    queue = deque(record.decisions)
+    for p in g.players_list:
+        p.agent = ReplayAgent(queue, agents[p.seat] if agents else None)
+
+    with contextlib.redirect_stdout(_QuietUntilTurn(g, from_turn, sys.stdout)):
+        g.setup_game()
+        try:
+            while g.num_players > 1 and (to_turn is None or g.turn_num <= to_turn):
+                g.handle_turn()
+        except (GameOverException, EmptyLibraryException):
+            pass
+    return g
+
+
+def fork(g, deadline=None):
+    """A GameStepper over a copy of g, re-run from g's decks, seed and decisions.
+
+    Every decision g has recorded is answered from the log; the copy's first
+    request is the next one, so when fork is called by one of g's agents
+    while it decides, that is the decision being made. Raises
+    ReplayDivergedException (from the stepper) if the copy doesn't follow
+    the log, and GameAbortedException if it is still re-running at deadline
+    (a time.perf_counter() value).
+    """
+    decks = [[card.fresh_copy() for card in deck] for deck in g.decks]
+    copy = game.Game(decks, test=g.test, seed=g.seed)
+    copy.game_id = g.game_id
+    copy.auto_pass = g.auto_pass
+    settings = {p.seat: p for p in g.players_list}
+    for p in copy.players_list:
+        original = settings.get(p.seat)
+        if original is not None:
+            p.autoPayMana = original.autoPayMana
+            p.autoOrderTriggers = original.autoOrderTriggers
+            p.autoDiscard = original.autoDiscard
+    queue = deque(Decision(*d) for d in g.decisions)
+
+    def play(stepper):
+        for p in copy.players_list:
+            p.agent = ReplayAgent(queue, stepper.agent(), deadline)
+        try:
+            copy.run_game()
+        except EmptyLibraryException:
+            copy.lose_by_decking()
+        return copy
+    return GameStepper(play)
@@ -0,0 +1,401 @@
+"""Host many games in one process; players connect over local TCP.
+
+    python -m MTG.server --port 4000
+
+Each hosted game runs on a GameStepper (MTG.stepper), so a game that is
+waiting for a player costs a parked thread and the game's objects, and
+nothing else: thousands of human-paced games can wait side by side. The
+event loop never runs engine code itself; a game is advanced in a worker
+thread (asyncio.to_thread) from one decision to the next, with its
+in-process agents answering along the way.
+
+The protocol is one JSON object per line in each direction. Requests may
+carry an "id", which the reply repeats.
+
+    {"op": "create", "decks": ["mono_red_aggro", "mono_green_midrange"],
+     "agents": [null, "heuristic15"], "seed": 1}
+        -> {"ok": true, "game": 3}     null seats are for remote players
+                                       (at least one; nobody could play or
+                                       watch a game without them)
+    {"op": "join", "game": 3, "seat": 0}
+        -> {"ok": true}                the game starts once every remote seat is taken
+    {"op": "answer", "game": 3, "answer": "p 0"}
+    {"op": "state", "game": 3}
+        -> {"ok": true, "state": {...}}   see describe()
+    {"op": "leave", "game": 3}
+
+and, pushed to whoever holds the seat:
+
+    {"event": "decision", "game": 3, "seat": 0, "kind": "action", "prompt": null}
+    {"event": "over", "game": 3, "winner": 1, "reason": "finished"}
+
+Errors are {"ok": false, "error": "..."}. Decks are the research decks
+(research_decks.DECK_BUILDERS) and agents are named in AGENTS.
+
+Limits: max_games per server; max_decisions per game (a game that
+reaches it is ended, which also bounds the memory its decision log and
+objects can grow to); a game nobody has answered for idle_timeout seconds
+is closed.
+
+The engine narrates to stdout. main() discards that; a program hosting a
+GameServer itself should do the same (see contextlib.redirect_stdout).
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+import itertools
+
+from MTG import game
+from MTG import cards
+from MTG.stepper import GameStepper, answer_with
+from MTG.exceptions import *
+from agents.randoms import RandomAgent
+from agents.heuristics import HeuristicAgent, HeuristicAgent15, HeuristicAgent20
+from research_decks import DECK_BUILDERS
+
+
+AGENTS = {
+    'random': RandomAgent,
+    'heuristic': HeuristicAgent,
+    'heuristic15': HeuristicAgent15,
+    'heuristic20': HeuristicAgent20,
+}
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def describe(g, player=None):
+    """ what player (None: a spectator) can see of g, as plain JSON-able values """
+    def permanents(p):
+        return [{'name': q.name, 'tapped': q.status.tapped,
+                 'power': q.power, 'toughness': q.toughness}
+                for q in p.battlefield]
+
+    return {'turn': g.turn_num,
+            'step': g.step.name if g.step is not None else None,
+            'active': g.current_player.seat if g.current_player is not None else None,
+            'players': [{'seat': p.seat, 'life': p.life, 'hand': len(p.hand),
+                         'library': len(p.library), 'graveyard': len(p.graveyard),
+                         'battlefield': permanents(p)}
+                        for p in g.players_list],
+            'hand': [card.name for card in player.hand] if player is not None else [],
+            'stack': [obj.name for obj in g.stack]}
+
+
+def _reply_to(message, reply):
+    if 'id' in message:
+        reply['id'] = message['id']
+    return reply
+
+
+class HostedGame():
+    def __init__(self, game_id, g, agents, max_decisions):
+        self.id = game_id
+        self.game = g
+        self.players = list(g.players_list)
+        self.agents = agents  # per seat: an agent, or None for a remote player
+        self.max_decisions = max_decisions
+        self.seats = {}  # seat -> Connection
+        self.stepper = GameStepper.for_game(g)
+        self.request = None
+        self.started = False
+        self.over = False
+        self.reason = None
+        self.last_active = time.monotonic()
+        self.lock = asyncio.Lock()  # one advance at a time
+
+    @property
+    def remote_seats(self):
+        return [seat for seat, agent in enumerate(self.agents) if agent is None]
+
+    @property
+    def winner(self):
+        standing = [p.seat for p in self.players if not p.lost]
+        return standing[0] if self.over and len(standing) == 1 else -1
+
+    def _advance(self, answer):
+        """ (in a worker thread) answer the pending decision, or start the
+        game; then let in-process agents answer until a remote player has
+        to decide or the game is over """
+        if self.started:
+            request = self.stepper.send(answer)
+        else:
+            self.started = True
+            request = self.stepper.start()
+        while request is not None:
+            if len(self.game.decisions) >= self.max_decisions:
+                self.stepper.close()
+                return None, 'decision limit'
+            agent = self.agents[request.player.seat]
+            if agent is None:
+                return request, None
+            request = self.stepper.send(answer_with(agent, request))
+        return None, 'finished'
+
+    async def advance(self, answer=None):
+        async with self.lock:
+            self.last_active = time.monotonic()
+            try:
+                self.request, reason = await asyncio.to_thread(self._advance, answer)
+            except GameAbortedException:
+                self.request, reason = None, 'aborted'
+            except Exception as e:  # the engine failed; the game can't go on
+                self.request, reason = None, 'error: %r' % e
+            if self.request is None:
+                self.over = True
+                self.reason = reason
+            await self.notify()
+
+    async def notify(self):
+        if self.over:
+            message = {'event': 'over', 'game': self.id, 'winner': self.winner,
+                       'reason': self.reason}
+            for connection in set(self.seats.values()):
+                await connection.send(message)
+            return
+
+        request = self.request
+        connection = self.seats.get(request.player.seat)
+        if connection is not None:
+            await connection.send({'event': 'decision', 'game': self.id,
+                                   'seat': request.player.seat, 'kind': request.kind,
+                                   'prompt': request.prompt})
+
+    def close(self, reason):
+        if not self.over:
+            self.over = True
+            self.reason = reason
+            self.stepper.close()
+
+
+class Connection():
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.games = {}  # game id -> seat
+
+    async def send(self, message):
+        if self.writer.is_closing():
+            return
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        with contextlib.suppress(ConnectionError):
+            await self.writer.drain()
+
+
+class GameServer():
+    def __init__(self, max_games=10000, max_decisions=20000, idle_timeout=3600):
+        self.max_games = max_games
+        self.max_decisions = max_decisions
+        self.idle_timeout = idle_timeout
+        self.games = {}  # id -> HostedGame
+        self._ids = itertools.count(1)
+        self._server = None
+        self._reaper = None
+        self._connections = {}  # Connection -> the task serving it
+
+    # -----------------------------------------------------------
+    # hosting games
+    # -----------------------------------------------------------
+
+    def create_game(self, decks, agents, seed=None):
+        """ host a new game; decks are DECK_BUILDERS names, agents are
+        AGENTS names, agent objects, or None for remote players (at least
+        one: the game starts once every remote seat is joined) """
+        if len(self.games) >= self.max_games:
+            raise ProtocolError('too many games')
+        if len(decks) != len(agents):
+            raise ProtocolError('one deck and one agent per seat')
+        if all(a is not None for a in agents):
+            raise ProtocolError('no seat for a remote player (agent null)')
+        try:
+            built = [DECK_BUILDERS[name]()[1] for name in decks]
+        except KeyError as e:
+            raise ProtocolError('unknown deck %s' % e)
+        agents = [self._agent(a) for a in agents]
+
+        g = game.Game(built, seed=seed)
+        hosted = HostedGame(next(self._ids), g, agents, self.max_decisions)
+        g.game_id = hosted.id
+        self.games[hosted.id] = hosted
+        return hosted
+
+    @staticmethod
+    def _agent(agent):
+        if agent is None or not isinstance(agent, str):
+            return agent
+        if agent not in AGENTS:
+            raise ProtocolError('unknown agent %s' % agent)
+        return AGENTS[agent]()
+
+    async def end_game(self, hosted, reason):
+        """ stop hosting hosted; its players are told why """
+        self.games.pop(hosted.id, None)
+        async with hosted.lock:
+            if not hosted.over:
+                await asyncio.to_thread(hosted.close, reason)
+                await hosted.notify()
+        for connection in set(hosted.seats.values()):
+            connection.games.pop(hosted.id, None)
+
+    async def start_game(self, hosted):
+        """ start hosted if nobody else has to join """
+        if not hosted.started and all(s in hosted.seats for s in hosted.remote_seats):
+            await hosted.advance()
+            if hosted.over:
+                await self.end_game(hosted, hosted.reason)
+
+    async def reap(self):
+        """ close the games nobody has answered for idle_timeout seconds """
+        now = time.monotonic()
+        for hosted in list(self.games.values()):
+            if now - hosted.last_active > self.idle_timeout and not hosted.lock.locked():
+                await self.end_game(hosted, 'idle')
+
+    async def _reap_forever(self):
+        while True:
+            await asyncio.sleep(min(60, self.idle_timeout))
+            await self.reap()
+
+    # -----------------------------------------------------------
+    # the network side
+    # -----------------------------------------------------------
+
+    async def start(self, host='127.0.0.1', port=0):
+        """ listen on host:port (port 0: any free port; see self.port) """
+        self._server = await asyncio.start_server(self._serve, host, port)
+        self._reaper = asyncio.create_task(self._reap_forever())
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for connection in self._connections:
+            connection.writer.close()
+        await asyncio.gather(*self._connections.values(), return_exceptions=True)
+        for hosted in list(self.games.values()):
+            await self.end_game(hosted, 'server closed')
+
+    async def _serve(self, reader, writer):
+        connection = Connection(reader, writer)
+        self._connections[connection] = asyncio.current_task()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = {}
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ProtocolError('expected a JSON object')
+                    reply = await self._handle(connection, message)
+                except (ProtocolError, ValueError, KeyError, TypeError) as e:
+                    reply = {'ok': False, 'error': str(e)}
+                if reply is not None:
+                    await connection.send(_reply_to(message, reply))
+        except ConnectionError:
+            pass
+        finally:
+            # a seat can be taken again; the game waits (until idle_timeout)
+            for game_id, seat in connection.games.items():
+                hosted = self.games.get(game_id)
+                if hosted is not None and hosted.seats.get(seat) is connection:
+                    del hosted.seats[seat]
+            del self._connections[connection]
+            writer.close()
+
+    def _game(self, message):
+        hosted = self.games.get(message['game'])
+        if hosted is None:
+            raise ProtocolError('no game %r' % message['game'])
+        return hosted
+
+    async def _handle(self, connection, message):
+        op = message['op']
+        if op == 'create':
+            hosted = self.create_game(message['decks'], message['agents'],
+                                      message.get('seed'))
+            return {'ok': True, 'game': hosted.id}
+        if op not in ('join', 'answer', 'state', 'leave'):
+            raise ProtocolError('unknown op %r' % op)
+
+        hosted = self._game(message)
+        if op == 'join':
+            seat = message['seat']
+            if seat not in hosted.remote_seats:
+                raise ProtocolError('seat %r is not for a remote player' % seat)
+            if seat in hosted.seats:
+                raise ProtocolError('seat %r is taken' % seat)
+            hosted.seats[seat] = connection
+            connection.games[hosted.id] = seat
+            await connection.send(_reply_to(message, {'ok': True}))
+            if hosted.started:
+                if hosted.request is not None and hosted.request.player.seat == seat:
+                    await hosted.notify()  # (re)joined while it was this seat's turn to decide
+            else:
+                await self.start_game(hosted)
+            return None
+
+        if op == 'answer':
+            seat = connection.games.get(hosted.id)
+            request = hosted.request
+            if request is None or hosted.lock.locked() or request.player.seat != seat:
+                raise ProtocolError('not your decision')
+            answer = message['answer']
+            if not isinstance(answer, str):
+                raise ProtocolError('answer must be a string')
+            await hosted.advance(answer)
+            if hosted.over:
+                await self.end_game(hosted, hosted.reason)
+            return None
+
+        if op == 'state':
+            if hosted.lock.locked():  # the game is running in a worker thread
+                raise ProtocolError('game is busy')
+            seat = connection.games.get(hosted.id)
+            player = hosted.players[seat] if seat is not None else None
+            return {'ok': True, 'state': describe(hosted.game, player)}
+
+        # 'leave'
+        seat = connection.games.pop(hosted.id, None)
+        if hosted.seats.get(seat) is connection:
+            del hosted.seats[seat]
+        await self.end_game(hosted, 'left')
+        return {'ok': True}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Host games over local TCP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4000)
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--idle-timeout', type=float, default=3600)
+    args = parser.parse_args(argv)
+
+    cards.setup_cards()
+    server = GameServer(max_games=args.max_games, idle_timeout=args.idle_timeout)
+
+    async def serve():
+        await server.start(args.host, args.port)
+        print('serving on %s:%d' % (args.host, server.port), file=sys.stderr)
+        await asyncio.Event().wait()
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""Drive games from the outside: the game asks, the caller answers.
+
+Normally a Game calls its players' agents (agent.select_action /
+agent.select_choice) and waits for them. A GameStepper turns that around.
+The game runs until it needs a decision, and then the stepper hands the
+caller a DecisionRequest and waits for the answer:
+
+    stepper = GameStepper.for_game(g)           # g's players now ask the stepper
+    request = stepper.start()                    # runs until the first decision
+    while request is not None:
+        answer = decide(request)                 # e.g. a model, or answer_with(agent, request)
+        request = stepper.send(answer)           # None once the game is over
+    stepper.result                               # g
+
+or, the same as a generator:
+
+    gen = stepper.decisions()
+    request = next(gen)
+    request = gen.send(answer)
+
+A Scheduler steps many games at once. It collects every game's pending
+request and answers them with one policy call, e.g. a batched model:
+
+    scheduler = Scheduler(policy)                # policy([request, ...]) -> [answer, ...]
+    for g in games:
+        scheduler.add(GameStepper.for_game(g))
+    results = scheduler.run()
+
+Decisions are asked for from deep inside the engine (while casting, while
+choosing targets, in combat), so each game keeps its own call stack on a
+thread. The threads are only a place to keep that stack: exactly one of them
+(or the caller) runs at any time, handing control back and forth, so games
+are as deterministic as when they run on their own. The exception is the
+global `random`, which interleaved games' agents share.
+
+An answer is recorded in game.decisions like any other (see MTG.replay).
+"""
+import queue
+import threading
+from collections import namedtuple
+
+from MTG.exceptions import *
+
+
+# kind: 'action' (the player has priority; see Player.get_action) or
+#       'choice' (see Player.make_choice); prompt is None for actions
+DecisionRequest = namedtuple('DecisionRequest', 'game player kind prompt')
+
+_ABORT = object()
+
+
+def answer_with(agent, request):
+    """ what an ordinary agent (select_action / select_choice) answers to request """
+    if request.kind == 'action':
+        return agent.select_action(request.player, request.game)
+    return agent.select_choice(request.player, request.game, request.prompt)
+
+
+class RequestAgent():
+    """The agent of a player whose decisions are made outside the game."""
+
+    def __init__(self, stepper):
+        self.stepper = stepper
+
+    def select_action(self, player, game):
+        return self.stepper._ask(DecisionRequest(game, player, 'action', None))
+
+    def select_choice(self, player, game, prompt_string):
+        return self.stepper._ask(DecisionRequest(game, player, 'choice', prompt_string))
+
+
+class GameStepper():
+    """Runs play(stepper) one decision at a time (see the module docstring).
+
+    play sets up and plays a game whose agents are stepper.agent(), and
+    returns whatever the caller wants back (stepper.result).
+    """
+
+    def __init__(self, play):
+        self.play = play
+        self.request = None  # the decision the game is waiting for
+        self.result = None
+        self.done = False
+        self._to_game = queue.SimpleQueue()
+        self._to_caller = queue.SimpleQueue()
+        self._thread = None
+
+    @classmethod
+    def for_game(cls, g):
+        """ step g.run_game(); every player's decisions go to the stepper,
+        and the result is g """
+        def play(stepper):
+            for p in g.players_list:
+                p.agent = stepper.agent()
+            try:
+                g.run_game()
+            except EmptyLibraryException:
+                g.lose_by_decking()
+            return g
+        return cls(play)
+
+    def agent(self):
+        return RequestAgent(self)
+
+    # -----------------------------------------------------------
+    # the caller's side
+    # -----------------------------------------------------------
+
+    def start(self):
+        """ run the game until its first decision; that DecisionRequest, or
+        None if the game ended without asking anything """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self._wait()
+
+    def send(self, answer):
+        """ answer the pending request; the next one, or None once the game is over """
+        if self.request is None:
+            raise ValueError('no decision is pending')
+        self.request = None
+        self._to_game.put(answer)
+        return self._wait()
+
+    def decisions(self):
+        """ the same as start() and send(), as a generator """
+        request = self.start()
+        while request is not None:
+            request = self.send((yield request))
+
+    def close(self):
+        """ abandon the game: every decision it asks for from now on raises
+        GameAbortedException in the game's thread """
+        while self.request is not None:
+            self.request = None
+            self._to_game.put(_ABORT)
+            try:
+                self._wait()
+            except GameAbortedException:
+                pass
+        self.done = True
+
+    def _wait(self):
+        kind, value = self._to_caller.get()
+        if kind == 'request':
+            self.request = value
+            return value
+
+        self.done = True
+        self._thread.join()
+        if kind == 'error':
+            raise value
+        self.result = value
+        return None
+
+    # -----------------------------------------------------------
+    # the game's side
+    # -----------------------------------------------------------
+
+    def _run(self):
+        try:
+            result = self.play(self)
+        except BaseException as e:
+            self._to_caller.put(('error', e))
+        else:
+            self._to_caller.put(('result', result))
+
+    def _ask(self, request):
+        self._to_caller.put(('request', request))
+        answer = self._to_game.get()
+        if answer is _ABORT:
+            raise GameAbortedException()
+        return answer
+
+
+class Scheduler():
+    """Steps many games, answering all their pending decisions in one batch.
+
+    policy([DecisionRequest, ...]) returns the answers in the same order.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.steppers = []
+
+    def add(self, stepper):
+        self.steppers.append(stepper)
+        return stepper
+
+    def run(self, max_batches=None):
+        """ play every game to the end (or for max_batches policy calls; the
+        unfinished games are then closed); returns their results in the order
+        they were added (None for an unfinished game) """
+        pending = []
+        for stepper in self.steppers:
+            if stepper.start() is not None:
+                pending.append(stepper)
+
+        batches = 0
+        while pending and (max_batches is None or batches < max_batches):
+            answers = self.policy([s.request for s in pending])
+            batches += 1
+            pending = [s for s, answer in zip(pending, answers)
+                       if s.send(answer) is not None]
+
+        for stepper in pending:
+            stepper.close()
+        return [s.result for s in self.steppers]
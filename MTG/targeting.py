@@ -0,0 +1,101 @@
+"""Legal targets, worked out once per board revision.
+
+    legal = game.targeting.legal_targets(source, criterion)   # {id(obj): obj}
+    game.targeting.is_legal(source, criterion, obj)
+    game.targeting.invalidated(play)                          # [target index, ...]
+
+A target criterion is a function criterion(source, obj) (see
+utils.parse_targets). Its legal targets are the objects in the public zones,
+and the players, that it accepts. Criteria parsed from card text also say
+where their targets can be (utils.targets_in), e.g. 'creature' only looks at
+the battlefield and 'opponent' only at the players.
+
+legal_targets() is cached per (source, criterion) until game.board_revision
+changes, so an agent listing the targets of each of its options doesn't
+rescan the board for every one. has_legal_target() and is_legal() use that
+cache if it is there; otherwise the former stops at the first legal target
+and the latter only checks the one object.
+
+Targets are chosen at some board revision (source.target_revision, which a
+Play copies). On resolution, invalidated() skips the check entirely if the
+board hasn't changed since, and otherwise checks each target on its own.
+"""
+from MTG.zone import ZoneType, str_to_zone_type
+from MTG.query import PUBLIC_ZONES
+
+
+class Targeting():
+    def __init__(self, game):
+        self.game = game
+        self._cache = {}  # (id(source), criterion) -> (source, {id(obj): obj})
+        self._cache_revision = None
+        self._where = {}  # criterion -> (zone types, players?)
+        self.choosing = None  # (source, criterion) while a player picks a target
+
+    def _where_targets_are(self, criterion):
+        where = self._where.get(criterion)
+        if where is None:
+            zones = getattr(criterion, 'zones', PUBLIC_ZONES)
+            where = (tuple(str_to_zone_type(z) if isinstance(z, str) else z for z in zones),
+                     getattr(criterion, 'players', True))
+            self._where[criterion] = where
+        return where
+
+    def _cached(self, source, criterion):
+        if self._cache_revision != self.game.board_revision:
+            self._cache.clear()
+            self._cache_revision = self.game.board_revision
+            return None
+        found = self._cache.get((id(source), criterion))
+        if found is not None and found[0] is source:
+            return found[1]
+        return None
+
+    def _candidates(self, criterion):
+        zones, players = self._where_targets_are(criterion)
+        if zones:
+            candidates = self.game.query().zone(*zones)
+            return candidates.players() if players else candidates
+        return self.game.players_list if players else ()
+
+    def legal_targets(self, source, criterion):
+        """ {id(obj): obj} for every object criterion lets source target, in
+        zone order (players last) """
+        legal = self._cached(source, criterion)
+        if legal is None:
+            legal = {id(obj): obj for obj in self._candidates(criterion)
+                     if criterion(source, obj)}
+            self._cache[(id(source), criterion)] = (source, legal)
+        return legal
+
+    def has_legal_target(self, source, criterion):
+        legal = self._cached(source, criterion)
+        if legal is not None:
+            return bool(legal)
+        # stops at the first one, so don't cache
+        return any(criterion(source, obj) for obj in self._candidates(criterion))
+
+    def is_legal(self, source, criterion, obj):
+        legal = self._cached(source, criterion)
+        if legal is not None:
+            return legal.get(id(obj)) is obj
+
+        zones, players = self._where_targets_are(criterion)
+        if obj.is_player:
+            can_be_targeted = players
+        else:
+            zone = obj.zone
+            can_be_targeted = (zone is not None and ZoneType[zone.zone_type] in zones
+                               and obj in zone)
+        return bool(can_be_targeted and criterion(source, obj))
+
+    def invalidated(self, play):
+        """ indices of play's targets that are no longer legal: gone (a new
+        object, see rule 400.7) or no longer matching their criterion """
+        if play.target_revision == self.game.board_revision:
+            return []
+        return [i for i, (criterion, target, timestamp)
+                in enumerate(zip(play.target_criterias, play.targets_chosen,
+                                 play.target_timestamps))
+                if target.timestamp != timestamp
+                or not self.is_legal(play, criterion, target)]
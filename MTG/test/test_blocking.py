@@ -0,0 +1,112 @@
+import io
+import random
+import unittest
+import contextlib
+
+import mock
+import numpy as np
+
+from MTG import game
+from MTG import cards
+from MTG import vecgame
+from MTG import gamesteps
+from MTG.exceptions import *
+from agents import blocking
+from agents.combat_eval import Combatants, FIRST_STRIKE
+from agents.heuristics import HeuristicAgent15, HeuristicAgent20
+
+
+def creatures(*stats):
+    return Combatants([s[0] for s in stats], [s[1] for s in stats],
+                      [s[2] if len(s) > 2 else 0 for s in stats])
+
+
+class TestBlockSolver(unittest.TestCase):
+    def setUp(self):
+        self.solver = blocking.BlockSolver(time_budget=1)
+
+    def test_double_block(self):
+        # neither 2/2 kills the 3/3 alone; together they trade one for it
+        block_of, _ = self.solver.solve(creatures((3, 3)), creatures((2, 2), (2, 2)),
+                                        np.ones((1, 2)), life=20)
+        self.assertEqual(block_of.tolist(), [0, 0])
+
+    def test_no_bad_blocks(self):
+        block_of, _ = self.solver.solve(creatures((4, 4)), creatures((1, 1)),
+                                        np.ones((1, 1)), life=20)
+        self.assertEqual(block_of.tolist(), [-1])
+
+    def test_chump_block_against_lethal(self):
+        block_of, score = self.solver.solve(creatures((4, 4), (1, 1)), creatures((1, 1)),
+                                            np.ones((2, 1)), life=4)
+        self.assertEqual(block_of.tolist(), [0])
+        self.assertGreater(score, blocking.LOSS / 2)
+
+    def test_only_legal_blocks(self):
+        # blocking the first striker only loses the 2/2; eating the 1/1 is
+        # the block to make, if the 2/2 may block it
+        attackers = creatures((3, 1, FIRST_STRIKE), (1, 1))
+        block_of, _ = self.solver.solve(attackers, creatures((2, 2)),
+                                        [[True], [False]], life=20)
+        self.assertEqual(block_of.tolist(), [-1])
+
+        block_of, _ = self.solver.solve(attackers, creatures((2, 2)),
+                                        [[True], [True]], life=20)
+        self.assertEqual(block_of.tolist(), [1])
+
+    def test_anytime(self):
+        # no time for the exhaustive search: the best found so far is returned
+        solver = blocking.BlockSolver(time_budget=0)
+        block_of, _ = solver.solve(creatures((3, 3)), creatures((2, 2), (2, 2)),
+                                   np.ones((1, 2)), life=20)
+        self.assertEqual(block_of.tolist(), [-1, -1])
+
+
+class TestBlockPlanner(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.game = game.Game(decks, test=True)
+        self.game.setup_game()
+        self.game.step = gamesteps.Step.PRECOMBAT_MAIN
+
+    def test_one_solve_answers_every_prompt(self):
+        attacker, defender = self.game.players_list
+        for name in ('Sungrace Pegasus', 'Centaur Courser'):
+            attacker.battlefield.add(name)
+        for name in ('Runeclaw Bear', 'Runeclaw Bear', 'Netcaster Spider'):
+            defender.battlefield.add(name)
+        for creature in attacker.battlefield:
+            creature.status.is_attacking = defender
+
+        attackers = self.game.block_matrix.of(defender).attackers
+        self.assertEqual([c.name for c in attackers], ['Sungrace Pegasus', 'Centaur Courser'])
+
+        planner = blocking.BlockPlanner(blocking.BlockSolver(time_budget=1))
+        solve = planner.solver.solve
+        with mock.patch.object(planner.solver, 'solve', side_effect=solve) as solver:
+            answers = [planner.answer(defender, self.game) for _ in attackers]
+            self.assertEqual(solver.call_count, 1)
+        # the spider eats the pegasus, the bears double block the courser
+        self.assertEqual(answers, ['2', '0 1'])
+
+
+class TestHeuristicAgent20(unittest.TestCase):
+    def test_plays_a_game(self):
+        cards.setup_cards()
+        random.seed(5)
+        g = vecgame.default_game(5)
+        players = list(g.players_list)
+        players[0].agent = HeuristicAgent20()
+        players[1].agent = HeuristicAgent15()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                g.run_game()
+            except EmptyLibraryException:
+                g.lose_by_decking()
+        self.assertTrue(any(p.lost for p in players))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from MTG import game
+from MTG import cards
+from MTG import combat
+from MTG import gamesteps
+
+
+class TestBlockMatrix(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.game = game.Game(decks, test=True)
+        self.game.setup_game()
+        self.game.step = gamesteps.Step.PRECOMBAT_MAIN
+        self.attacker, self.defender = self.game.players_list
+
+    def attack(self, *names):
+        for name in names:
+            self.attacker.battlefield.add(name)
+            self.attacker.battlefield[-1].status.is_attacking = self.defender
+
+    def block_with(self, *names):
+        for name in names:
+            self.defender.battlefield.add(name)
+
+    def assert_same_as_permanents(self, matrix):
+        self.assertEqual(matrix.rows, [[b.can_block(a) for b in matrix.blockers]
+                                       for a in matrix.attackers])
+
+    def test_evasion(self):
+        self.attack('Sungrace Pegasus', 'Accursed Spirit', 'Stormtide Leviathan', 'Runeclaw Bear')
+        self.block_with('Runeclaw Bear', 'Netcaster Spider', 'Accursed Spirit')
+        matrix = self.game.block_matrix.of(self.defender)
+        self.assertEqual([a.name for a in matrix.attackers],
+                         ['Sungrace Pegasus', 'Accursed Spirit', 'Stormtide Leviathan',
+                          'Runeclaw Bear'])
+        self.assertEqual(matrix.rows, [[False, True, False],   # flying
+                                       [False, False, True],   # intimidate (black)
+                                       [True, True, True],     # islandwalk, no Island
+                                       [True, True, True]])
+        self.assert_same_as_permanents(matrix)
+
+        self.block_with('Island')
+        matrix = self.game.block_matrix.of(self.defender)
+        self.assertEqual(matrix.rows[2], [False, False, False])
+        self.assert_same_as_permanents(matrix)
+
+    def test_abilities_change_mid_combat(self):
+        self.attack('Runeclaw Bear')
+        self.block_with('Runeclaw Bear', 'Netcaster Spider')
+        matrix = self.game.block_matrix.of(self.defender)
+        self.assertEqual(matrix.rows, [[True, True]])
+
+        bear = self.attacker.battlefield[0]
+        bear.add_effect('gainAbility', 'Flying', expiration=self.game.eot_time)
+        self.assertEqual(self.game.block_matrix.of(self.defender).rows, [[False, True]])
+        self.assertFalse(matrix.can_block(self.defender.battlefield[0], bear))
+
+    def test_check_valid_block(self):
+        self.attack('Sungrace Pegasus', 'Runeclaw Bear')
+        self.block_with('Runeclaw Bear')
+        pegasus, bear = self.attacker.battlefield
+        blocker = self.defender.battlefield[0]
+
+        blocker.status.is_blocking.append(bear)
+        self.assertTrue(combat.check_valid_block(self.attacker, self.defender))
+        blocker.status.is_blocking.append(pegasus)  # one creature, two attackers
+        self.assertFalse(combat.check_valid_block(self.attacker, self.defender))
+        blocker.status.is_blocking.remove(bear)     # can't block a flyer
+        self.assertFalse(combat.check_valid_block(self.attacker, self.defender))
+
+
+if __name__ == '__main__':
+    unittest.main()
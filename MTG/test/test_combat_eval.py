@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+
+from MTG import game
+from MTG import cards
+from MTG import gamesteps
+from agents import combat_eval
+from agents.combat_eval import (Combatants, resolve, block_assignments, attack_subsets,
+                                FIRST_STRIKE, DOUBLE_STRIKE, DEATHTOUCH, TRAMPLE, LIFELINK)
+
+
+def one(power, toughness, keywords=0, damage=0):
+    return Combatants([power], [toughness], [keywords], [damage])
+
+
+NOBODY = Combatants([], [], [])
+
+
+class TestResolve(unittest.TestCase):
+    def test_every_block(self):
+        blocks = block_assignments(1, 2)
+        self.assertEqual(blocks.tolist(), [[-1, -1], [-1, 0], [0, -1], [0, 0]])
+
+        result = resolve(one(3, 3), Combatants([2, 2], [2, 2], [0, 0]), blocks)
+        self.assertEqual(result.player_damage.tolist(), [3, 0, 0, 0])
+        self.assertEqual(result.attacker_dies[:, 0].tolist(), [False, False, False, True])
+        # double block: lethal damage to the first blocker, the rest to the second
+        self.assertEqual(result.blocker_damage[3].tolist(), [2, 1])
+        self.assertEqual(result.blocker_dies[3].tolist(), [True, False])
+        self.assertEqual(result.defender_life.tolist(), [-3, 0, 0, 0])
+
+    def test_first_strike(self):
+        result = resolve(one(3, 1, FIRST_STRIKE), one(2, 2), [[0]])
+        self.assertEqual((result.attacker_dies[0, 0], result.blocker_dies[0, 0]), (False, True))
+
+        # a first strike blocker kills the attacker before it deals damage
+        result = resolve(one(3, 1), one(1, 2, FIRST_STRIKE), [[0]])
+        self.assertEqual((result.attacker_dies[0, 0], result.blocker_dies[0, 0]), (True, False))
+
+    def test_double_strike(self):
+        result = resolve(one(2, 2, DOUBLE_STRIKE), one(3, 3), [[0]])
+        self.assertEqual(result.blocker_damage[0, 0], 4)
+        self.assertTrue(result.attacker_dies[0, 0] and result.blocker_dies[0, 0])
+
+        result = resolve(one(2, 2, DOUBLE_STRIKE | LIFELINK), NOBODY, np.zeros((1, 0)))
+        self.assertEqual((result.player_damage[0], result.attacker_life[0]), (4, 4))
+
+    def test_deathtouch_trample_lifelink(self):
+        result = resolve(one(4, 4, DEATHTOUCH | TRAMPLE | LIFELINK), one(3, 3), [[0]])
+        self.assertEqual(result.blocker_damage[0, 0], 1)  # 1 is lethal
+        self.assertTrue(result.blocker_dies[0, 0])
+        self.assertEqual(result.player_damage[0], 3)
+        self.assertEqual(result.attacker_life[0], 4)
+
+        result = resolve(one(1, 1), one(1, 5, DEATHTOUCH | LIFELINK, damage=4), [[0]])
+        self.assertTrue(result.attacker_dies[0, 0] and result.blocker_dies[0, 0])
+        self.assertEqual(result.defender_life[0], 1)
+
+    def test_blocked_attacker_without_blockers(self):
+        # the blocker dies to first strike damage: in the regular step the
+        # attacker is still blocked, and deals no damage unless it tramples
+        result = resolve(one(3, 3, DOUBLE_STRIKE), one(1, 1), [[0]])
+        self.assertEqual(result.player_damage[0], 0)
+        self.assertEqual(result.blocker_damage[0, 0], 3)
+        result = resolve(one(3, 3, DOUBLE_STRIKE | TRAMPLE | LIFELINK), one(1, 1), [[0]])
+        self.assertEqual(result.player_damage[0], 2 + 3)
+        self.assertEqual(result.attacker_life[0], 6)
+
+    def test_attack_subsets(self):
+        attackers = Combatants([1, 2], [1, 2], [0, 0])
+        result = resolve(attackers, NOBODY, np.zeros((1, 0)), attack_subsets(2))
+        self.assertEqual(result.player_damage.tolist(), [0, 2, 1, 3])
+
+        # a blocker assigned to a creature that isn't attacking doesn't block
+        result = resolve(attackers, one(5, 5), [[1]], attack_subsets(2))
+        self.assertEqual(result.player_damage.tolist(), [0, 0, 1, 1])
+        self.assertEqual(result.blocker_damage[:, 0].tolist(), [0, 2, 0, 2])
+
+
+class TestCombatants(unittest.TestCase):
+    def test_from_permanents(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        g = game.Game(decks, test=True)
+        g.setup_game()
+        g.step = gamesteps.Step.PRECOMBAT_MAIN
+        battlefield = g.players_list[0].battlefield
+        battlefield.add('Sungrace Pegasus')
+        battlefield.add('Soulmender')
+        battlefield[0].take_damage(battlefield[1], 1)
+
+        c = combat_eval.combatants(battlefield)
+        self.assertEqual(c.power.tolist(), [1, 1])
+        self.assertEqual(c.toughness.tolist(), [2, 1])
+        self.assertEqual(c.keywords.tolist(), [LIFELINK, 0])
+        self.assertEqual(c.damage.tolist(), [1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
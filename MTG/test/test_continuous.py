@@ -0,0 +1,75 @@
+import unittest
+
+from MTG import game
+from MTG import cards
+from MTG import gamesteps
+
+
+class TestContinuousEffects(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, test=True)
+        self.GAME.setup_game()
+        self.GAME.step = gamesteps.Step.PRECOMBAT_MAIN
+        self.p0, self.p1 = self.GAME.players_list
+        self.p0.battlefield.add('Soulmender')
+        self.p1.battlefield.add('Soulmender')
+        self.mine = self.p0.battlefield[-1]
+        self.theirs = self.p1.battlefield[-1]
+
+    def test_lord_applies_without_copies(self):
+        self.p0.battlefield.add('Paragon of New Dawns')
+        paragon = self.p0.battlefield[-1]
+        self.assertEqual(self.mine.power, 2)
+        self.assertEqual(paragon.power, 2)  # "other white creatures"
+        self.assertEqual(self.theirs.power, 1)
+        self.assertEqual(len(self.GAME.continuous.effects), 1)
+
+        # a creature that enters later is covered by the same effect
+        self.p0.battlefield.add('Soulmender')
+        self.assertEqual(self.p0.battlefield[-1].power, 2)
+        self.assertEqual(len(self.GAME.continuous.effects), 1)
+        self.assertEqual(self.mine.effects['modifyPT'], [])
+
+    def test_ends_when_source_leaves(self):
+        self.p0.battlefield.add('Paragon of New Dawns')
+        paragon = self.p0.battlefield[-1]
+        paragon.change_zone(self.p0.graveyard)
+        self.assertEqual(self.mine.power, 1)
+        self.assertEqual(self.GAME.continuous.effects, [])
+        self.assertNotIn(id(paragon), self.GAME.continuous.sources)
+
+    def test_game_scope_and_exempt_source(self):
+        self.GAME.add_static_effect('modifyPT', (1, 0), self.mine,
+                                    lambda eff: eff.apply_target.is_creature,
+                                    exempt_source=True)
+        self.assertEqual(self.theirs.power, 2)
+        self.assertEqual(self.mine.power, 1)
+
+    def test_toggle_rechecked_when_board_changes(self):
+        calls = []
+
+        def untapped_only(eff):
+            calls.append(eff.apply_target)
+            return not eff.apply_target.status.tapped
+
+        self.p0.add_static_effect('gainAbility', 'Flying', self.mine, untapped_only)
+        self.assertTrue(self.mine.has_ability('Flying'))
+        self.assertFalse(self.theirs.has_ability('Flying'))
+        self.assertTrue(self.mine.has_ability('Flying'))
+        self.assertEqual(calls, [self.mine])  # cached
+
+        self.mine.tap()
+        self.assertFalse(self.mine.has_ability('Flying'))
+        self.assertEqual(calls, [self.mine, self.mine])
+
+    def test_has_ability_ignores_inactive_effects(self):
+        self.mine.add_effect('gainAbility', 'Flying', is_active=False,
+                             toggle_func=lambda eff: False)
+        self.assertFalse(self.mine.has_ability('Flying'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import io
+import random
+import shutil
+import tempfile
+import unittest
+import contextlib
+
+import numpy as np
+
+from MTG import cards
+from MTG import dataset
+from MTG import vecgame
+from MTG.exceptions import *
+from agents.randoms import RandomAgent
+from agents.heuristics import HeuristicAgent15
+
+
+def rows_of(n, start=0):
+    rows = {name: np.zeros((n,) + shape, dtype=dtype)
+            for name, dtype, shape in dataset.COLUMNS}
+    rows['action'][:] = np.arange(start, start + n)
+    rows['obs'][:, 0] = np.arange(start, start + n)
+    return rows
+
+
+class SoulmenderAgent(HeuristicAgent15):
+    """ puts a Soulmender onto the battlefield, and taps it whenever it can """
+
+    def __init__(self):
+        super().__init__()
+        self.soulmender = None
+        self.activations = 0
+        self.taps = 0  # activations that went through
+        self.activating = False
+
+    def select_action(self, player, game):
+        if self.activating:
+            self.activating = False
+            if not self.soulmender.status.tapped:
+                return super().select_action(player, game)  # don't retry forever
+            self.taps += 1
+        if self.soulmender is None:
+            player.battlefield.add('Soulmender')
+            self.soulmender = player.battlefield.get_card_by_name('Soulmender')
+            self.soulmender.status.summoning_sick = False
+        elif (self.soulmender.zone is player.battlefield
+                and self.soulmender.activated_abilities[0].could_activate()):
+            self.activations += 1
+            self.activating = True
+            return 'a %d' % player.battlefield.elements.index(self.soulmender)
+        return super().select_action(player, game)
+
+
+class TestShardWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fixed_size_shards(self):
+        with dataset.ShardWriter(self.directory, prefix='w0', shard_size=4) as writer:
+            writer.add(rows_of(3))
+            writer.add(rows_of(7, start=3))
+        self.assertEqual((writer.num_rows, writer.num_shards), (10, 3))
+
+        shards = dataset.load_shards(self.directory)
+        self.assertEqual([len(s['action']) for s in shards], [4, 4, 2])
+        self.assertIsInstance(shards[0]['obs'], np.memmap)
+        np.testing.assert_array_equal(np.concatenate([s['action'] for s in shards]),
+                                      np.arange(10))
+        np.testing.assert_array_equal(shards[2]['obs'][:, 0], [8, 9])
+
+    def test_prefixes(self):
+        for prefix in ('w0', 'w1'):
+            with dataset.ShardWriter(self.directory, prefix=prefix) as writer:
+                writer.add(rows_of(2))
+        self.assertEqual(len(dataset.load_shards(self.directory)), 2)
+        self.assertEqual(len(dataset.load_shards(self.directory, prefix='w1')), 1)
+
+
+class TestGameRecorder(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records_every_decision(self):
+        random.seed(3)
+        g = vecgame.default_game(3)
+        players = list(g.players_list)
+        with dataset.ShardWriter(self.directory) as writer, \
+                contextlib.redirect_stdout(io.StringIO()):
+            recorder = dataset.GameRecorder(writer, game_id=7)
+            players[0].agent = recorder.wrap(HeuristicAgent15())
+            players[1].agent = recorder.wrap(RandomAgent())
+            try:
+                g.run_game()
+            except EmptyLibraryException:
+                g.lose_by_decking()
+            winner = 0 if players[1].lost else 1
+            recorder.finish(winner)
+
+        rows = dataset.load_shards(self.directory)[0]
+        self.assertEqual(len(rows['action']), len(g.decisions))
+        np.testing.assert_array_equal(rows['seat'], [d[1] for d in g.decisions])
+        np.testing.assert_array_equal(rows['outcome'], np.where(rows['seat'] == winner, 1, -1))
+        self.assertTrue((rows['game'] == 7).all())
+        self.assertEqual(rows['obs'].shape[1], vecgame.N_FEATURES)
+
+        # the action given is one of the well-formed ones, when it has an index
+        given = rows['action'] >= 0
+        self.assertGreater(given.mean(), 0.5)
+        self.assertTrue(rows['mask'][given, rows['action'][given]].all())
+
+    def test_records_activations(self):
+        random.seed(3)
+        g = vecgame.default_game(3)
+        players = list(g.players_list)
+        agent = SoulmenderAgent()
+        with dataset.ShardWriter(self.directory) as writer, \
+                contextlib.redirect_stdout(io.StringIO()):
+            recorder = dataset.GameRecorder(writer)
+            players[0].agent = recorder.wrap(agent)
+            players[1].agent = recorder.wrap(RandomAgent())
+            try:
+                g.run_game()
+            except EmptyLibraryException:
+                g.lose_by_decking()
+            recorder.finish(-1)
+
+        self.assertGreater(agent.activations, 0)
+        self.assertEqual(agent.taps, agent.activations)
+        activated = sum(1 for d in g.decisions if d[1] == 0 and d[3].startswith('a '))
+        self.assertEqual(activated, agent.activations)
+
+        rows = dataset.load_shards(self.directory)[0]
+        actions = rows['action'][rows['seat'] == 0]
+        self.assertEqual(((actions > vecgame.MAX_HAND)
+                          & (actions <= vecgame.MAX_HAND + vecgame.MAX_PERMANENTS)).sum(),
+                         agent.activations)
+
+    def test_action_index(self):
+        allowed = [''] + [None] * (vecgame.N_ACTIONS - 1)
+        allowed[1:3] = ['0', '1']
+        allowed[1 + vecgame.MAX_PERMANENTS] = '0 1'  # attack with all of them
+        self.assertEqual(vecgame.action_index(allowed, '1  ', 'attack'), 2)
+        self.assertEqual(vecgame.action_index(allowed, '1 0 5', 'attack'),
+                         1 + vecgame.MAX_PERMANENTS)
+        self.assertEqual(vecgame.action_index(allowed, 'p 3', 'action'), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
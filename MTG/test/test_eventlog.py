@@ -0,0 +1,101 @@
+import os
+import mock
+import tempfile
+import unittest
+
+from MTG import game
+from MTG import cards
+from MTG import zone
+from MTG import eventlog
+from MTG.eventlog import EventType
+
+
+class TestEventLog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cards.setup_cards()
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.bin')
+        os.close(fd)
+        os.remove(self.path)
+
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, test=True)
+        self.GAME.game_id = 7
+        self.GAME.event_log = eventlog.EventLog(self.path)
+        self.GAME.setup_game()
+        self.player = self.GAME.players_list[0]
+        self.player.autoPayMana = True
+
+    def tearDown(self):
+        self.GAME.event_log.close()
+        os.remove(self.path)
+
+    def events(self):
+        self.GAME.event_log.flush()
+        return list(eventlog.read_events(self.path, game_id=7))
+
+    def test_encode_decode_roundtrip(self):
+        rec = eventlog.encode(3, 12, 4, EventType.DAMAGE, 1, -1, -1, 5,
+                              'Lightning Bolt', 'Devouring Deep')
+        ev = eventlog.decode(rec[2:])
+        self.assertEqual(ev, eventlog.Event(3, 12, 4, EventType.DAMAGE, 1, -1, -1, 5,
+                                            'Lightning Bolt', 'Devouring Deep'))
+
+    def test_cast_and_replay(self):
+        with mock.patch('builtins.input', side_effect=[
+                '__self.add_card_to_hand("Devouring Deep")',
+                '', '', '', '',
+                '__self.mana.add(mana.Mana.BLUE, 3)',
+                '__self.lose_life(3)',
+                'p Devouring Deep',
+                's draw',
+                's draw',
+                '']):
+            self.assertTrue(self.GAME.handle_turn())
+
+        events = self.events()
+        types = [ev.type for ev in events]
+        self.assertEqual(types.count(EventType.GAME_START), 2)
+        self.assertIn(EventType.TURN_START, types)
+        self.assertTrue(any(ev.type is EventType.CAST and ev.name == 'Devouring Deep'
+                            for ev in events))
+        self.assertTrue(any(ev.type is EventType.RESOLVE and ev.name == 'Devouring Deep'
+                            for ev in events))
+
+        state = eventlog.replay(self.path, 7)
+        self.assertEqual(state[0].life, self.player.life)
+        self.assertEqual(state[0].life, 17)
+        self.assertEqual(state[0].zone_sizes[zone.ZoneType.LIBRARY.value],
+                         len(self.player.library))
+        self.assertEqual(state[0].zone_sizes[zone.ZoneType.HAND.value],
+                         len(self.player.hand))
+        self.assertEqual(state[0].battlefield['Devouring Deep'], 1)
+
+    def test_activate(self):
+        with mock.patch('builtins.input', side_effect=[
+                '__self.battlefield.add("Soulmender")',
+                '__self.battlefield[0].status.summoning_sick = False',
+                'a 0',
+                '', '',
+                's upkeep', 's upkeep']):
+            self.assertTrue(self.GAME.handle_turn())
+
+        self.assertTrue(self.player.battlefield[0].status.tapped)
+        self.assertEqual(self.player.life, 21)
+        events = self.events()
+        self.assertTrue(any(ev.type is EventType.ACTIVATE and ev.name == 'Soulmender'
+                            for ev in events))
+        self.assertEqual(eventlog.replay(self.path, 7)[0].life, 21)
+
+    def test_truncated_tail(self):
+        complete = self.events()
+        with open(self.path, 'ab') as f:  # half-written record at the end
+            f.write(eventlog.encode(7, 1, 0, EventType.DRAW)[:-3])
+        self.assertEqual(list(eventlog.read_events(self.path)), complete)
+
+
+if __name__ == '__main__':
+    unittest.main()
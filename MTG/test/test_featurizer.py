@@ -0,0 +1,128 @@
+import io
+import random
+import unittest
+import contextlib
+
+import numpy as np
+
+from MTG import game
+from MTG import cards
+from MTG import gamesteps
+from MTG import featurizer
+from MTG.featurizer import Featurizer, PERMANENT_FEATURES, PLAYER_FEATURES
+from MTG.stepper import GameStepper, answer_with
+from agents.randoms import RandomAgent
+
+
+P = {name: i for i, name in enumerate(PLAYER_FEATURES)}
+F = {name: i for i, name in enumerate(PERMANENT_FEATURES)}
+
+
+def rebuilt(g, seat):
+    """ g's vector from a new featurizer, built from scratch """
+    attached = g.featurizer
+    vector = Featurizer(g).vector(seat)
+    g.featurizer = attached
+    return vector
+
+
+class TestFeaturizer(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, test=True)
+        self.GAME.setup_game()
+        self.GAME.step = gamesteps.Step.PRECOMBAT_MAIN
+        self.p0, self.p1 = self.GAME.players_list
+        self.f = Featurizer(self.GAME)
+
+    def test_rows_follow_the_battlefield(self):
+        self.p0.battlefield.add('Soulmender')
+        self.p0.battlefield.add('Plains')
+        self.p0.battlefield.add('Soulmender')
+        self.f.refresh()
+        rows = self.f.permanents[0]
+        self.assertEqual(list(rows[:4, F['present']]), [1, 1, 1, 0])
+        self.assertEqual(list(rows[:3, F['creature']]), [1, 0, 1])
+        self.assertEqual(list(rows[:3, F['power']]), [1, 0, 1])
+        self.assertFalse(self.f.permanents[1].any())
+
+        self.p0.battlefield[0].change_zone(self.p0.graveyard)
+        self.f.refresh()
+        self.assertEqual(list(rows[:3, F['present']]), [1, 1, 0])
+        self.assertEqual(list(rows[:2, F['land']]), [1, 0])
+        self.assertEqual(self.f.players[0, P['graveyard']], 1)
+
+    def test_status_changes(self):
+        self.p0.battlefield.add('Soulmender')
+        creature = self.p0.battlefield[-1]
+        self.f.refresh()
+        self.assertEqual(self.f.permanents[0, 0, F['summoning_sick']], 1)
+
+        creature.tap()
+        creature.status.summoning_sick = False
+        creature.status.is_attacking = self.p1
+        self.f.refresh()
+        row = self.f.permanents[0, 0]
+        self.assertEqual((row[F['tapped']], row[F['attacking']], row[F['summoning_sick']]),
+                         (1, 1, 0))
+
+        creature.add_counter('+1/+1', 2)
+        self.f.refresh()
+        self.assertEqual(row[F['power']], 3)
+        self.assertEqual(row[F['counters']], 2)
+
+    def test_static_effects(self):
+        self.p0.battlefield.add('Soulmender')
+        self.f.refresh()
+        self.p0.battlefield.add('Paragon of New Dawns')
+        self.f.refresh()
+        self.assertEqual(self.f.permanents[0, 0, F['power']], 2)
+
+        self.p0.battlefield[-1].change_zone(self.p0.graveyard)
+        self.f.refresh()
+        self.assertEqual(self.f.permanents[0, 0, F['power']], 1)
+
+    def test_hand(self):
+        self.p0.hand.clear()
+        for name in ('Plains', 'Soulmender', 'Soulmender'):
+            self.p0.hand.add(name)
+        self.f.refresh()
+        row = self.f.players[0]
+        self.assertEqual((row[P['hand']], row[P['hand_lands']], row[P['hand_creatures']]),
+                         (3, 1, 2))
+
+        self.p0.hand[0].change_zone(self.p0.battlefield)
+        self.f.refresh()
+        self.assertEqual((row[P['hand']], row[P['hand_lands']]), (2, 0))
+
+    def test_vector(self):
+        self.p0.battlefield.add('Soulmender')
+        self.p1.life = 7
+        mine, theirs = self.f.vector(0), self.f.vector(1)
+        self.assertEqual(len(mine), featurizer.vector_size(2))
+        life = len(featurizer.GAME_FEATURES)
+        self.assertEqual((mine[life], theirs[life]), (20, 7))
+        np.testing.assert_array_equal(mine, rebuilt(self.GAME, 0))
+
+    def test_same_as_rebuilt_during_games(self):
+        out = io.StringIO()
+        for seed in range(3):
+            random.seed(seed)
+            decks = [cards.read_deck('data/decks/deck1.txt'),
+                     cards.read_deck('data/decks/deck1.txt')]
+            g = game.Game(decks, seed=seed)
+            f = Featurizer(g)
+            agents = [RandomAgent(), RandomAgent()]
+            stepper = GameStepper.for_game(g)
+            with contextlib.redirect_stdout(out):
+                request = stepper.start()
+                while request is not None:
+                    seat = request.player.seat
+                    np.testing.assert_array_equal(f.vector(seat), rebuilt(g, seat))
+                    request = stepper.send(answer_with(agents[seat], request))
+
+
+if __name__ == '__main__':
+    unittest.main()
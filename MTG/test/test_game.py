@@ -6,6 +6,7 @@ import time
 from MTG import game
 from MTG import cards
 from MTG import permanent
+from MTG import gamesteps
 from MTG.exceptions import *
 
 # test cases will fail if this is run
@@ -650,6 +651,122 @@ class TestGame(TestGameBase):
             self.assertTrue(all(self.player.tmp), msg=self.player.tmp)
 
 
+class TestTurnStructure(TestGameBase):
+    def test_skip_combat_steps_without_attackers(self):
+        for step in gamesteps.TURN_STRUCTURE:
+            self.assertEqual(self.GAME.skip_step(step),
+                             step in gamesteps.STEPS_NEEDING_ATTACKERS)
+
+    def test_skip_first_strike_step(self):
+        self.GAME.step = gamesteps.Step.DECLARE_ATTACKERS
+        self.player.battlefield.add("Soulmender")
+        attacker = self.player.battlefield[-1]
+        attacker.status.is_attacking = self.opponent
+        self.assertFalse(self.GAME.skip_step(gamesteps.Step.DECLARE_BLOCKERS))
+        self.assertTrue(self.GAME.skip_step(gamesteps.Step.FIRST_STRIKE_COMBAT_DAMAGE))
+        self.assertFalse(self.GAME.skip_step(gamesteps.Step.COMBAT_DAMAGE))
+
+        attacker.add_effect('gainAbility', 'First Strike', expiration=self.GAME.eot_time)
+        self.assertFalse(self.GAME.skip_step(gamesteps.Step.FIRST_STRIKE_COMBAT_DAMAGE))
+
+    def test_extra_step(self):
+        """ steps appended to pending_steps during a turn still happen """
+        with mock.patch('builtins.input', side_effect=[
+                '', '', '', '',
+                '__self.game.pending_steps.appendleft(gamesteps.Step.UPKEEP)',
+                '', '',  # main phase; the extra upkeep is next
+                '__self.tmp = self.game.step is gamesteps.Step.UPKEEP',
+                's draw', 's draw', '']):
+            self.assertTrue(self.GAME.handle_turn())
+        self.assertTrue(self.player.tmp)
+
+
+class TestEffectExpiration(TestGameBase):
+    def setUp(self):
+        super().setUp()
+        self.GAME.step = gamesteps.Step.PRECOMBAT_MAIN
+        self.player.battlefield.add("Soulmender")
+        self.creature = self.player.battlefield[-1]
+
+    def test_until_end_of_turn(self):
+        self.creature.add_effect('modifyPT', (2, 2), expiration=self.GAME.eot_time)
+        self.assertEqual(len(self.GAME.effect_timers), 1)
+        self.assertFalse(self.GAME.expire_effects())
+        self.assertEqual(self.creature.power, 3)
+
+        self.GAME.step = gamesteps.Step.CLEANUP
+        self.assertTrue(self.GAME.expire_effects())
+        self.assertEqual(self.creature.power, 1)
+        self.assertEqual(self.GAME.effect_timers, [])
+
+    def test_ends_when_source_leaves(self):
+        self.player.battlefield.add("Paragon of New Dawns")
+        paragon = self.player.battlefield[-1]
+        self.assertEqual(self.creature.power, 2)
+        paragon.change_zone(self.player.hand)  # bounced, not just died
+        self.assertEqual(self.creature.power, 1)
+        self.assertNotIn(id(paragon), self.GAME.effects_by_source)
+
+    def test_conditions_checked_when_board_changes(self):
+        calls = []
+
+        def toggle(eff):
+            calls.append(eff)
+            return False
+
+        self.creature.add_effect('modifyPT', (1, 1), is_active=False, toggle_func=toggle)
+        self.assertEqual(len(calls), 1)
+        self.creature.check_effect_expiration()
+        self.GAME.apply_state_based_actions()
+        self.assertEqual(len(calls), 1)  # nothing changed since
+
+        self.creature.tap()
+        self.creature.check_effect_expiration()
+        self.assertEqual(len(calls), 2)
+
+
+class PassingAgent():
+    def __init__(self):
+        self.steps = []
+
+    def select_action(self, player, game):
+        self.steps.append(game.step)
+        return ''
+
+    def select_choice(self, player, game, prompt_string):
+        return ''
+
+
+class TestAutoPass(TestGameBase):
+    def setUp(self):
+        super().setUp()
+        self.player.agent = PassingAgent()
+        self.opponent.agent = PassingAgent()
+
+    def test_skip_windows_without_actions(self):
+        """ nothing in hand and no abilities: nobody gets asked """
+        self.assertTrue(self.GAME.handle_turn())
+        self.assertEqual(self.player.agent.steps, [])
+        self.assertEqual(self.opponent.agent.steps, [])
+
+    def test_instant_keeps_windows_open(self):
+        self.opponent.add_card_to_hand("Lightning Bolt")
+        self.assertTrue(self.GAME.handle_turn())
+        self.assertIn(gamesteps.Step.UPKEEP, self.opponent.agent.steps)
+        self.assertIn(gamesteps.Step.END, self.opponent.agent.steps)
+
+    def test_land_only_at_sorcery_speed(self):
+        self.player.add_card_to_hand("Plains")
+        self.assertTrue(self.GAME.handle_turn())
+        self.assertEqual(set(self.player.agent.steps),
+                         {gamesteps.Step.PRECOMBAT_MAIN, gamesteps.Step.POSTCOMBAT_MAIN})
+
+    def test_auto_pass_off(self):
+        self.GAME.auto_pass = False
+        self.assertTrue(self.GAME.handle_turn())
+        self.assertIn(gamesteps.Step.UPKEEP, self.player.agent.steps)
+
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,63 @@
+import os
+import mock
+import tempfile
+import unittest
+import json
+
+from MTG import game
+from MTG import cards
+from MTG import gamesteps
+from MTG.instrumentation import STATS
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, test=True)
+        self.GAME.setup_game()
+        STATS.reset()
+
+    def tearDown(self):
+        STATS.disable()
+        STATS.reset()
+
+    def test_disabled_by_default(self):
+        with mock.patch('builtins.input', return_value=''):
+            self.GAME.handle_turn()
+        self.assertFalse(STATS.counts)
+
+    def test_counts_per_step(self):
+        STATS.enable()
+        player = self.GAME.current_player
+        player.hand.add(player.library.pop())
+        with mock.patch('builtins.input', return_value=''):
+            self.assertTrue(self.GAME.handle_turn())
+
+        self.assertEqual(STATS.counts[('turn', None)], 1)
+        for step in gamesteps.Step:
+            if step in gamesteps.STEPS_NEEDING_ATTACKERS:  # nobody attacked
+                self.assertEqual(STATS.counts[('skip_step', step)], 1)
+            else:
+                self.assertEqual(STATS.counts[('step', step)], 1)
+        self.assertEqual(STATS.counts[('priority', gamesteps.Step.UPKEEP)], 1)
+        self.assertGreater(STATS.counts[('sba', gamesteps.Step.UPKEEP)], 0)
+        self.assertEqual(STATS.counts[('zone_leave', 'LIBRARY')], 1)
+        self.assertEqual(STATS.counts[('zone_enter', 'HAND')], 1)
+        self.assertGreater(STATS.total_ns[('turn', None)],
+                           STATS.total_ns[('step', gamesteps.Step.UPKEEP)])
+
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            STATS.export(path, games=1)
+            with open(path) as f:
+                exported = json.load(f)
+        finally:
+            os.remove(path)
+        self.assertEqual(exported['meta'], {'games': 1})
+        self.assertEqual(exported['stats']['step']['UPKEEP']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from MTG import game
+from MTG import cards
+from MTG import gamesteps
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, test=True)
+        self.GAME.setup_game()
+        self.GAME.step = gamesteps.Step.PRECOMBAT_MAIN
+        self.p0, self.p1 = self.GAME.players_list
+        for name in ['Plains', 'Soulmender', 'Plains', "Ajani's Pridemate"]:
+            self.p0.battlefield.add(name)
+        self.p1.battlefield.add('Sungrace Pegasus')
+        self.p1.graveyard.add('Soulmender')
+
+    def test_ordered_and_chained(self):
+        q = self.GAME.query().battlefield()
+        self.assertEqual([c.name for c in q.creatures().all()],
+                         ['Soulmender', "Ajani's Pridemate", 'Sungrace Pegasus'])
+        mine = q.creatures().controlled_by(self.p0)
+        self.assertEqual(mine.all(), list(self.p0.creatures))
+        self.assertEqual(mine.count(), 2)
+        self.assertEqual(q.of(self.p0).lands().count(), 2)
+
+        self.p0.battlefield[1].tap()
+        self.assertEqual(mine.untapped().first().name, "Ajani's Pridemate")
+        self.assertEqual(mine.tapped().all(), [self.p0.battlefield[1]])
+        self.assertEqual(q.count(), 5)  # earlier links are unchanged
+
+    def test_default_zones_and_players(self):
+        names = [c.name for c in self.GAME.query().creatures().all()]
+        self.assertEqual(names, ['Soulmender', "Ajani's Pridemate",
+                                 'Sungrace Pegasus', 'Soulmender'])
+        self.assertEqual(self.GAME.query().players().where(lambda o: o.is_player).all(),
+                         self.GAME.players_list)
+        self.assertEqual(self.GAME.query().of(self.p1).players()
+                         .where(lambda o: o.is_player).all(), [self.p1])
+
+    def test_named(self):
+        self.assertEqual(self.GAME.query().named('Soulmender').count(), 2)
+        self.assertIs(self.GAME.query().graveyard().named('Soulmender').first(),
+                      self.p1.graveyard[0])
+        self.assertIsNone(self.GAME.query().named('Shock').first())
+        self.assertGreater(self.GAME.query().of(self.p0).library().count(), 0)
+
+    def test_short_circuit(self):
+        seen = []
+
+        def creature(obj):
+            seen.append(obj)
+            return obj.is_creature
+
+        self.assertTrue(self.GAME.query().battlefield().where(creature).any())
+        self.assertEqual(len(seen), 2)  # Plains, Soulmender
+
+
+if __name__ == '__main__':
+    unittest.main()
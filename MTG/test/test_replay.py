@@ -0,0 +1,175 @@
+import io
+import time
+import unittest
+import contextlib
+
+from MTG import game
+from MTG import cards
+from MTG import replay
+from MTG.exceptions import *
+from MTG.stepper import answer_with
+from agents.randoms import RandomAgent
+from agents.heuristics import HeuristicAgent15
+
+
+def decks():
+    return [cards.read_deck('data/decks/deck1.txt'),
+            cards.read_deck('data/decks/deck1.txt')]
+
+
+class TestReplay(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.GAME = game.Game(decks(), seed=1234)
+        cls.GAME.game_id = 3
+        for p in cls.GAME.players_list:
+            p.agent = RandomAgent()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                cls.GAME.run_game()
+            except EmptyLibraryException:
+                pass
+
+        f = io.StringIO()
+        replay.write_record(f, replay.record_of(cls.GAME, ['deck1', 'deck1']))
+        f.seek(0)
+        cls.record = next(replay.read_records(f))
+
+    def test_same_seed_same_library(self):
+        a = game.Game(decks(), seed=99)
+        b = game.Game(decks(), seed=99)
+        self.assertEqual([c.name for c in a.players_list[0].library],
+                         [c.name for c in b.players_list[0].library])
+
+    def test_replay_reproduces_game(self):
+        self.assertEqual(self.record.seed, 1234)
+        self.assertTrue(self.record.decisions)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            g = replay.replay_game(self.record, decks(), test=False)
+
+        self.assertEqual(g.turn_num, self.GAME.turn_num)
+        self.assertEqual(g.decisions, self.GAME.decisions)
+        self.assertEqual([(p.seat, p.life, len(p.library)) for p in g.players_list],
+                         [(p.seat, p.life, len(p.library)) for p in self.GAME.players_list])
+
+    def test_fast_forward(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            g = replay.replay_game(self.record, decks(), from_turn=2, to_turn=2)
+
+        self.assertEqual(g.turn_num, 3)
+        self.assertNotIn('setting up game', out.getvalue())
+        self.assertIn('Step.UNTAP', out.getvalue())
+
+    def test_diverged_replay(self):
+        """ running out of recorded decisions must not fall back to stdin """
+        record = self.record._replace(decisions=self.record.decisions[:3])
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(ReplayDivergedException):
+                replay.replay_game(record, decks())
+
+    def test_fork_deadline(self):
+        # a fork still re-running the log at its deadline is aborted
+        stepper = self.GAME.fork(deadline=time.perf_counter())
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(GameAbortedException):
+                stepper.start()
+        stepper.close()
+
+
+class ForkingAgent():
+    """ forks the game at every decision and checks the copy asks the same """
+    def __init__(self, test):
+        self.agent = RandomAgent()
+        self.test = test
+        self.forks = 0
+
+    def check(self, player, game, kind):
+        with contextlib.redirect_stdout(io.StringIO()):
+            stepper = game.fork()
+            try:
+                request = stepper.start()
+                self.test.assertEqual((request.player.seat, request.kind),
+                                      (player.seat, kind))
+                self.test.assertEqual(request.game.state_hash, game.state_hash)
+                self.test.assertIsNot(request.game, game)
+                # the copy plays on without touching the game
+                request = stepper.send(answer_with(self.agent, request))
+            finally:
+                stepper.close()
+        self.forks += 1
+
+    def select_action(self, player, game):
+        if game.turn_num < 4:
+            self.check(player, game, 'action')
+        return self.agent.select_action(player, game)
+
+    def select_choice(self, player, game, prompt_string):
+        if game.turn_num < 4:
+            self.check(player, game, 'choice')
+        return self.agent.select_choice(player, game, prompt_string)
+
+
+class ActivatingForkAgent():
+    """ once it has a Soulmender it can activate, activates it in a fork """
+    def __init__(self, test):
+        self.agent = HeuristicAgent15()
+        self.test = test
+        self.checked = False
+
+    def select_action(self, player, game):
+        index = next((i for i, p in enumerate(player.battlefield)
+                      if p.name == 'Soulmender' and p.activated_abilities[0].could_activate()),
+                     None)
+        if index is not None and not self.checked:
+            with contextlib.redirect_stdout(io.StringIO()):
+                stepper = game.fork()
+                try:
+                    request = stepper.start()
+                    copy = request.player.battlefield[index]
+                    self.test.assertEqual(copy.name, 'Soulmender')
+                    stepper.send('a %d' % index)
+                    self.test.assertTrue(copy.status.tapped)
+                    self.test.assertFalse(player.battlefield[index].status.tapped)
+                finally:
+                    stepper.close()
+            self.checked = True
+        return self.agent.select_action(player, game)
+
+    def select_choice(self, player, game, prompt_string):
+        return self.agent.select_choice(player, game, prompt_string)
+
+
+class TestFork(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cards.setup_cards()
+
+    def test_fork_reaches_the_same_decision(self):
+        g = game.Game(decks(), seed=7)
+        agents = [ForkingAgent(self), RandomAgent()]
+        for p, agent in zip(g.players_list, agents):
+            p.agent = agent
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                g.run_game()
+            except EmptyLibraryException:
+                pass
+        self.assertGreater(agents[0].forks, 5)
+
+    def test_fork_plays_activations(self):
+        g = game.Game(decks(), seed=7)
+        agents = [ActivatingForkAgent(self), HeuristicAgent15()]
+        for p, agent in zip(g.players_list, agents):
+            p.agent = agent
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                g.run_game()
+            except EmptyLibraryException:
+                pass
+        self.assertTrue(agents[0].checked)
+
+
+if __name__ == '__main__':
+    unittest.main()
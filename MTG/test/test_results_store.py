@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from data_science.results_store import ResultsStore
+
+
+HEADER = "game_id,agent0,agent1,deck0_name,deck1_name,winner\r\n"
+
+
+def row(game_id, winner, agent0='A', agent1='B'):
+    return f"{game_id},{agent0},{agent1},green,red,{winner}\r\n"
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'r1.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, text, mode='a'):
+        with open(self.path, mode, newline='') as f:
+            f.write(text)
+
+    def test_repeated_ingest(self):
+        self.write(HEADER + row(0, 0) + row(1, 1) + "2,A,B,green,red,\r\n", 'w')
+        store = ResultsStore(self.dir)
+        self.assertEqual(len(store.ingest(verbose=False)), 2)
+        self.assertEqual(store.rows_ingested, {'r1.csv': 3})
+        self.assertEqual(store.pending_files(), [])
+
+        self.assertIsNone(store.ingest(verbose=False))
+        self.assertIsNone(ResultsStore(self.dir).ingest(verbose=False))
+        self.assertEqual((store.agent_games['A'], store.agent_wins['A']), (2, 1))
+
+    def test_appended_rows(self):
+        self.write(HEADER + row(0, 0), 'w')
+        store = ResultsStore(self.dir)
+        store.ingest(verbose=False)
+
+        # a row still being written is left for the next call
+        self.write(row(1, 1) + "2,A,B,gr")
+        self.assertEqual(store.pending_files(), [('r1.csv', 1)])
+        self.assertEqual(len(store.ingest(verbose=False)), 1)
+        self.write("een,red,0\r\n")
+        new_rows = store.ingest(verbose=False)
+        self.assertEqual(new_rows['game_id'].tolist(), [2])
+        self.assertEqual(store.rows_ingested, {'r1.csv': 3})
+
+        store = ResultsStore(self.dir)  # state survives a restart
+        self.assertEqual((store.agent_games['A'], store.agent_wins['A']), (3, 2))
+
+    def test_rewritten_file(self):
+        self.write(HEADER + row(0, 0) + row(1, 1) + row(2, 1), 'w')
+        store = ResultsStore(self.dir)
+        store.ingest(verbose=False)
+
+        # shorter than before: read again from the start
+        self.write(HEADER + row(5, 0), 'w')
+        self.assertEqual(store.pending_files(), [('r1.csv', 0)])
+        self.assertEqual(store.ingest(verbose=False)['game_id'].tolist(), [5])
+        self.assertEqual(store.rows_ingested, {'r1.csv': 1})
+
+    def test_bootstrap_from_merged(self):
+        self.write(HEADER + row(0, 0) + row(1, 1), 'w')
+        ResultsStore(self.dir).ingest(verbose=False)
+        os.remove(os.path.join(self.dir, '.results_store.json'))  # merged.csv only
+
+        store = ResultsStore(self.dir)
+        self.assertEqual(store.rows_ingested, {'r1.csv': 2})
+        self.assertEqual(store.sizes_ingested, {'r1.csv': os.path.getsize(self.path)})
+        self.assertEqual(store.pending_files(), [])
+
+        self.write(row(2, 0))
+        self.assertEqual(store.pending_files(), [('r1.csv', 2)])
+        self.assertEqual(store.ingest(verbose=False)['game_id'].tolist(), [2])
+        self.assertEqual((store.agent_games['A'], store.agent_wins['A']), (3, 2))
+
+    def test_malformed_rows(self):
+        self.write(HEADER + row(0, 0) + "1,A,B,green,red,0,extra,fields\r\n"
+                   + "2,A\r\n" + row(3, 1), 'w')
+        store = ResultsStore(self.dir)
+        new_rows = store.ingest(verbose=False)
+        self.assertEqual(new_rows['game_id'].tolist(), [0, 3])
+        self.assertEqual(store.rows_ingested, {'r1.csv': 4})
+        self.assertEqual(store.agent_games['B'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import io
+import random
+import unittest
+import contextlib
+
+from MTG import cards
+from MTG import vecgame
+from MTG.exceptions import *
+from agents import search
+from agents.heuristics import HeuristicAgent15
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_forgets_least_recently_used(self):
+        table = search.TranspositionTable(size=2)
+        table.put('a', 1)
+        table.put('b', 2)
+        self.assertEqual(table.get('a'), 1)  # 'b' is now the oldest
+        table.put('c', 3)
+        self.assertEqual(len(table), 2)
+        self.assertIsNone(table.get('b'))
+        self.assertEqual((table.get('a'), table.get('c')), (1, 3))
+        self.assertEqual((table.hits, table.misses), (3, 1))
+
+
+class TestLatencyPercentiles(unittest.TestCase):
+    def test_percentiles(self):
+        latencies = [i / 100 for i in range(101)]
+        p = search.latency_percentiles(latencies)
+        self.assertEqual(sorted(p), ['p50', 'p95', 'p99'])
+        self.assertAlmostEqual(p['p50'], 0.5)
+        self.assertAlmostEqual(p['p99'], 0.99)
+        self.assertEqual(search.latency_percentiles([]), {})
+
+
+class TestSearchAgent(unittest.TestCase):
+    def test_plays_a_game_within_budget(self):
+        cards.setup_cards()
+        random.seed(3)
+        g = vecgame.default_game(3)
+        players = list(g.players_list)
+        agent = search.SearchAgent(time_budget=0.05, depth=6)
+        players[0].agent = agent
+        players[1].agent = HeuristicAgent15()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                g.run_game()
+            except EmptyLibraryException:
+                g.lose_by_decking()
+
+        self.assertTrue(any(p.lost for p in players))
+        self.assertGreater(agent.searches, 0)
+        self.assertGreater(len(agent.table), 0)
+        self.assertEqual(len(agent.latencies),
+                         sum(1 for d in g.decisions if d[1] == 0))
+        # the budget is hard, give or take the engine step running at the end
+        self.assertLess(max(agent.latencies), 0.05 + 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import io
+import json
+import asyncio
+import unittest
+import contextlib
+
+from MTG import cards
+from MTG import server
+
+
+DECKS = ['mono_red_aggro', 'mono_green_midrange']
+
+
+class Client():
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port):
+        return cls(*await asyncio.open_connection('127.0.0.1', port))
+
+    async def send(self, **message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def recv(self):
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 30))
+
+    async def call(self, **message):
+        await self.send(**message)
+        return await self.recv()
+
+    def close(self):
+        self.writer.close()
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cards.setup_cards()
+
+    async def asyncSetUp(self):
+        self.out = contextlib.redirect_stdout(io.StringIO())
+        self.out.__enter__()
+        self.server = server.GameServer(max_games=3)
+        await self.server.start()
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            client.close()
+        await self.server.close()
+        self.out.__exit__(None, None, None)
+
+    async def client(self):
+        client = await Client.connect(self.server.port)
+        self.clients.append(client)
+        return client
+
+    async def test_play_against_an_agent(self):
+        c = await self.client()
+        reply = await c.call(op='create', decks=DECKS, agents=[None, 'random'], seed=1, id=7)
+        self.assertEqual((reply['ok'], reply['id']), (True, 7))
+        game_id = reply['game']
+
+        self.assertTrue((await c.call(op='join', game=game_id, seat=0))['ok'])
+        message = await c.recv()
+        for _ in range(2000):
+            if message.get('event') != 'decision':
+                break
+            self.assertEqual(message['seat'], 0)
+            message = await c.call(op='answer', game=game_id, answer='')
+        self.assertEqual(message['event'], 'over')
+        self.assertEqual(message['reason'], 'finished')
+        self.assertNotIn(game_id, self.server.games)
+
+    async def test_two_remote_players(self):
+        c0, c1 = await self.client(), await self.client()
+        game_id = (await c0.call(op='create', decks=DECKS, agents=[None, None], seed=2))['game']
+        self.assertTrue((await c0.call(op='join', game=game_id, seat=0))['ok'])
+        self.assertFalse(self.server.games[game_id].started)  # waits for seat 1
+
+        self.assertTrue((await c1.call(op='join', game=game_id, seat=1))['ok'])
+        message = await c0.recv()
+        self.assertEqual((message['event'], message['seat']), ('decision', 0))
+
+        reply = await c1.call(op='answer', game=game_id, answer='')
+        self.assertEqual(reply, {'ok': False, 'error': 'not your decision'})
+        state = (await c1.call(op='state', game=game_id))['state']
+        self.assertEqual([p['life'] for p in state['players']], [20, 20])
+        self.assertEqual(len(state['hand']), 7)
+
+        self.assertTrue((await c0.call(op='leave', game=game_id))['ok'])
+        message = await c1.recv()
+        self.assertEqual((message['event'], message['reason']), ('over', 'left'))
+        self.assertEqual(self.server.games, {})
+
+    async def test_errors(self):
+        c = await self.client()
+        self.assertIn('unknown op', (await c.call(op='dance', game=1))['error'])
+        self.assertIn('unknown deck', (await c.call(op='create', decks=['x', 'y'],
+                                                    agents=[None, None]))['error'])
+        # nobody could ever join (and so start) a game without remote seats
+        self.assertIn('no seat for a remote player',
+                      (await c.call(op='create', decks=DECKS,
+                                    agents=['random', 'heuristic15']))['error'])
+        self.assertEqual(self.server.games, {})
+        self.assertFalse((await c.call(op='join', game=99, seat=0))['ok'])
+        self.assertFalse((await c.call(op='oops'))['ok'])
+        c.writer.write(b'not json\n')
+        self.assertFalse((await c.recv())['ok'])
+
+        for _ in range(3):
+            self.assertTrue((await c.call(op='create', decks=DECKS, agents=[None, None]))['ok'])
+        self.assertEqual((await c.call(op='create', decks=DECKS, agents=[None, None]))['error'],
+                         'too many games')
+
+    async def test_idle_games_are_closed(self):
+        c = await self.client()
+        game_id = (await c.call(op='create', decks=DECKS, agents=[None, 'random']))['game']
+        await c.call(op='join', game=game_id, seat=0)
+        await c.recv()  # the first decision
+
+        self.server.idle_timeout = 0
+        await self.server.reap()
+        message = await c.recv()
+        self.assertEqual((message['event'], message['reason']), ('over', 'idle'))
+        self.assertEqual(self.server.games, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import io
+import random
+import unittest
+import contextlib
+
+from MTG import game
+from MTG import cards
+from MTG import stepper
+from MTG import gamesteps
+from MTG.exceptions import *
+from agents.randoms import RandomAgent
+
+
+def new_game(seed):
+    decks = [cards.read_deck('data/decks/deck1.txt'),
+             cards.read_deck('data/decks/deck1.txt')]
+    return game.Game(decks, seed=seed)
+
+
+class TestGameStepper(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cards.setup_cards()
+
+    def setUp(self):
+        self.out = contextlib.redirect_stdout(io.StringIO())
+        self.out.__enter__()
+
+    def tearDown(self):
+        self.out.__exit__(None, None, None)
+
+    def test_same_game_as_running_directly(self):
+        random.seed(7)
+        direct = new_game(42)
+        for p in direct.players_list:
+            p.agent = RandomAgent()
+        try:
+            direct.run_game()
+        except EmptyLibraryException:
+            pass
+
+        random.seed(7)
+        g = new_game(42)
+        agents = [RandomAgent(), RandomAgent()]
+        s = stepper.GameStepper.for_game(g)
+        gen = s.decisions()
+        request = next(gen, None)
+        kinds = set()
+        while request is not None:
+            self.assertIs(request.game, g)
+            kinds.add(request.kind)
+            request = next_request(gen, stepper.answer_with(agents[request.player.seat], request))
+
+        self.assertTrue(s.done)
+        self.assertIs(s.result, g)
+        self.assertEqual(kinds, {'action', 'choice'})
+        self.assertEqual(g.decisions, direct.decisions)
+        self.assertEqual([p.life for p in g.players_list],
+                         [p.life for p in direct.players_list])
+
+    def test_activate_ability(self):
+        g = new_game(42)
+        s = stepper.GameStepper.for_game(g)
+        gen = s.decisions()
+        request = next(gen)
+        while not (request.kind == 'action' and request.player.seat == 0
+                   and g.step is gamesteps.Step.PRECOMBAT_MAIN):
+            request = next_request(gen, '')
+
+        player = request.player
+        player.battlefield.add('Soulmender')
+        soulmender = player.battlefield.get_card_by_name('Soulmender')
+        soulmender.status.summoning_sick = False
+        request = next_request(gen, 'a %d' % player.battlefield.elements.index(soulmender))
+        self.assertTrue(soulmender.status.tapped)
+
+        while player.life == 20:
+            request = next_request(gen, '')
+        self.assertEqual(player.life, 21)
+        s.close()
+
+    def test_close(self):
+        s = stepper.GameStepper.for_game(new_game(1))
+        self.assertEqual(s.start().kind, 'action')
+        s.close()
+        self.assertTrue(s.done)
+        self.assertFalse(s._thread.is_alive())
+        with self.assertRaises(ValueError):
+            s.send('')
+
+    def test_errors_reach_the_caller(self):
+        def play(s):
+            s.agent().select_action(None, None)
+            raise KeyError('boom')
+
+        s = stepper.GameStepper(play)
+        s.start()
+        with self.assertRaises(KeyError):
+            s.send('')
+
+    def test_scheduler_batches(self):
+        batches = []
+
+        def policy(requests):
+            batches.append(len(requests))
+            return [''] * len(requests)
+
+        scheduler = stepper.Scheduler(policy)
+        games = [new_game(seed) for seed in range(3)]
+        for g in games:
+            scheduler.add(stepper.GameStepper.for_game(g))
+
+        self.assertEqual(scheduler.run(max_batches=4), [None] * 3)
+        self.assertEqual(batches, [3] * 4)
+        self.assertTrue(all(s.done for s in scheduler.steppers))
+        self.assertEqual([len(g.decisions) for g in games], [4] * 3)
+
+
+def next_request(gen, answer):
+    try:
+        return gen.send(answer)
+    except StopIteration:
+        return None
+
+
+if __name__ == '__main__':
+    unittest.main()
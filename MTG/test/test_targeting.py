@@ -0,0 +1,78 @@
+import unittest
+import mock
+
+from MTG import game
+from MTG import play
+from MTG import cards
+from MTG import utils
+from MTG import gamesteps
+
+
+class TestTargeting(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, test=True)
+        self.GAME.setup_game()
+        self.GAME.step = gamesteps.Step.PRECOMBAT_MAIN
+        self.p0, self.p1 = self.GAME.players_list
+        self.targeting = self.GAME.targeting
+        for name in ['Plains', 'Soulmender']:
+            self.p0.battlefield.add(name)
+        self.p1.battlefield.add('Sungrace Pegasus')
+        self.p1.graveyard.add('Soulmender')
+        self.p0.add_card_to_hand('Lightning Bolt')
+        self.bolt = self.p0.hand[-1]
+        self.creature, self.opponent_creature, self.player = utils.parse_targets(
+            ['creature', 'opponent creature', 'opponent'])
+
+    def test_legal_targets(self):
+        legal = self.targeting.legal_targets(self.bolt, self.creature)
+        self.assertEqual([c.name for c in legal.values()], ['Soulmender', 'Sungrace Pegasus'])
+        self.assertEqual(list(self.targeting.legal_targets(self.bolt, self.opponent_creature).values()),
+                         [self.p1.battlefield[0]])
+        self.assertEqual(list(self.targeting.legal_targets(self.bolt, self.player).values()),
+                         [self.p1])
+
+        # the graveyard's creature card and the players aren't creatures on the battlefield
+        self.assertFalse(self.targeting.is_legal(self.bolt, self.creature, self.p1.graveyard[0]))
+        self.assertFalse(self.targeting.is_legal(self.bolt, self.creature, self.p1))
+
+    def test_cached_until_board_changes(self):
+        legal = self.targeting.legal_targets(self.bolt, self.creature)
+        self.assertIs(self.targeting.legal_targets(self.bolt, self.creature), legal)
+
+        self.p1.battlefield[0].dies()
+        legal = self.targeting.legal_targets(self.bolt, self.creature)
+        self.assertEqual([c.name for c in legal.values()], ['Soulmender'])
+
+    def test_is_legal_without_cache(self):
+        creature = self.p0.battlefield[1]
+        self.assertTrue(self.targeting.is_legal(self.bolt, self.creature, creature))
+        self.assertFalse(self.targeting.is_legal(self.bolt, self.creature, self.p0.battlefield[0]))
+        self.assertTrue(self.targeting.is_legal(self.bolt, self.player, self.p1))
+        self.assertFalse(self.targeting.is_legal(self.bolt, self.player, self.p0))
+
+    def test_choose_targets(self):
+        with mock.patch.object(self.p0, 'make_choice', side_effect=['b 0', 'ob 0']):
+            self.assertEqual(self.bolt.choose_targets(), [self.p1.battlefield[0]])
+        self.assertEqual(self.bolt.target_revision, self.GAME.board_revision)
+
+    def test_invalidated(self):
+        target = self.p1.battlefield[0]
+        self.bolt.targets_chosen = [target]
+        self.bolt.target_revision = self.GAME.board_revision
+        spell = play.Play(lambda: None, card=self.bolt)
+        self.assertEqual(spell.target_revision, self.GAME.board_revision)
+        self.assertEqual(self.targeting.invalidated(spell), [])
+
+        self.p0.battlefield[0].tap()  # something else changed
+        self.assertEqual(self.targeting.invalidated(spell), [])
+
+        target.dies()
+        self.assertEqual(self.targeting.invalidated(spell), [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
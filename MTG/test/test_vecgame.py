@@ -0,0 +1,118 @@
+import unittest
+
+import numpy as np
+
+from MTG import cards
+from MTG import vecgame
+
+
+def random_legal(masks, rng):
+    return [int(rng.choice(np.flatnonzero(m))) for m in masks]
+
+
+class TestVecGame(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cards.setup_cards()
+
+    def setUp(self):
+        self.env = vecgame.VecGame(3, seed=10)
+
+    def tearDown(self):
+        self.env.close()
+
+    def test_reset(self):
+        obs, masks = self.env.reset()
+        self.assertEqual(obs.shape, (3, vecgame.N_FEATURES))
+        self.assertEqual(masks.shape, (3, vecgame.N_ACTIONS))
+        self.assertTrue(masks[:, 0].all())  # passing is always allowed
+        self.assertEqual([g.seed for g in self.env.games], [10, 11, 12])
+
+    def test_masked_action(self):
+        _, masks = self.env.reset()
+        action = int(np.flatnonzero(~masks[0])[0])
+        with self.assertRaises(ValueError):
+            self.env.step([action, 0, 0])
+
+    def test_auto_reset(self):
+        rng = np.random.default_rng(0)
+        obs, masks = self.env.reset()
+        for _ in range(3000):
+            obs, masks, rewards, dones, infos = self.env.step(random_legal(masks, rng))
+            if dones.any():
+                break
+        i = int(np.flatnonzero(dones)[0])
+        self.assertIn(infos[i]['winner'], (0, 1))
+        self.assertEqual(abs(rewards[i]), 1)
+        # a new game took its place, next in the row's own seeds
+        self.assertEqual(self.env.games[i].seed, 10 + i + 3)
+        self.assertEqual(len(self.env.games[i].decisions), 0)
+        self.assertFalse(rewards[~dones].any())
+
+    def test_activate(self):
+        obs, masks = self.env.reset()
+        player = self.env.games[0].players_list[0]
+        player.battlefield.add('Soulmender')
+        soulmender = player.battlefield.get_card_by_name('Soulmender')
+        soulmender.status.summoning_sick = False
+
+        first, last = 1 + vecgame.MAX_HAND, vecgame.MAX_HAND + vecgame.MAX_PERMANENTS
+        for _ in range(100):  # pass until it can be activated
+            if masks[0, first:last + 1].any():
+                break
+            obs, masks, *_ = self.env.step([0, 0, 0])
+        action = first + int(np.flatnonzero(masks[0, first:last + 1])[0])
+        self.assertEqual(self.env._answers[0][action],
+                         'a %d' % player.battlefield.elements.index(soulmender))
+        self.env.step([action, 0, 0])
+        self.assertTrue(soulmender.status.tapped)
+        self.assertEqual(self.env.games[0].decisions[-1][3][:2], 'a ')
+
+    def test_deterministic(self):
+        other = vecgame.VecGame(3, seed=10)
+        a, masks = self.env.reset()
+        b, _ = other.reset()
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            actions = random_legal(masks, rng)
+            a, masks, *_ = self.env.step(actions)
+            b, *_ = other.step(actions)
+        np.testing.assert_array_equal(a, b)
+        other.close()
+
+
+class TestSubprocVecGame(unittest.TestCase):
+    def check_same_games(self, num_games, num_workers, steps):
+        cards.setup_cards()
+        env = vecgame.VecGame(num_games, seed=5)
+        sub = vecgame.SubprocVecGame(num_games, num_workers=num_workers, seed=5)
+        try:
+            obs, masks = env.reset()
+            sub_obs, sub_masks = sub.reset()
+            rng = np.random.default_rng(2)
+            finished = 0
+            for _ in range(steps):
+                np.testing.assert_array_equal(obs, sub_obs)
+                np.testing.assert_array_equal(masks, sub_masks)
+                actions = random_legal(masks, rng)
+                obs, masks, rewards, dones, infos = env.step(actions)
+                sub_obs, sub_masks, sub_rewards, sub_dones, sub_infos = sub.step(actions)
+                np.testing.assert_array_equal(dones, sub_dones)
+                np.testing.assert_array_equal(rewards, sub_rewards)
+                self.assertEqual(infos, sub_infos)
+                finished += int(dones.sum())
+            return finished
+        finally:
+            env.close()
+            sub.close()
+
+    def test_same_games_as_in_process(self):
+        self.check_same_games(2, 2, 20)
+
+    def test_more_games_than_workers(self):
+        self.check_same_games(4, 2, 20)
+        # uneven split (3 + 2 rows), through auto-resets
+        self.assertGreater(self.check_same_games(5, 2, 200), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import unittest
+import contextlib
+
+import mock
+import numpy as np
+
+import research_main
+from data_science import win_rate_stats
+from agents.randoms import RandomAgent
+
+
+class TestIntervals(unittest.TestCase):
+    def test_wilson_known_values(self):
+        low, high = win_rate_stats.wilson_interval([5, 0, 10, 0], [10, 10, 10, 0])
+        np.testing.assert_allclose(low, [0.2366, 0.0, 0.7225, 0.0], atol=1e-4)
+        np.testing.assert_allclose(high, [0.7634, 0.2775, 1.0, 1.0], atol=1e-4)
+
+    def test_bayes(self):
+        # 0 games: the uniform prior; all wins: pushed up against 1
+        low, high = win_rate_stats.bayes_interval([0, 10, 0], [0, 10, 10])
+        np.testing.assert_allclose(low[0], 0.025, atol=0.01)
+        np.testing.assert_allclose(high[0], 0.975, atol=0.01)
+        self.assertGreater(low[1], 0.7)
+        self.assertLess(high[2], 0.3)
+        self.assertTrue(np.all(low < high))
+        # reproducible
+        again = win_rate_stats.bayes_interval([0, 10, 0], [0, 10, 10])
+        np.testing.assert_array_equal(low, again[0])
+
+    def test_interval_method(self):
+        np.testing.assert_array_equal(win_rate_stats.interval([3], [4]),
+                                      win_rate_stats.wilson_interval([3], [4]))
+        with self.assertRaises(ValueError):
+            win_rate_stats.interval([3], [4], method="nope")
+
+    def test_win_rate_table(self):
+        table = win_rate_stats.win_rate_table([5, 0], [10, 0], index=['a', 'b'])
+        self.assertEqual(table.loc['a', 'win_rate'], 0.5)
+        self.assertTrue(np.isnan(table.loc['b', 'win_rate']))
+        self.assertEqual((table.loc['b', 'ci_low'], table.loc['b', 'ci_high']), (0.0, 1.0))
+
+
+class TestStoppingRule(unittest.TestCase):
+    def test_is_decided(self):
+        decided = win_rate_stats.is_decided([5, 50, 500, 500], [10, 100, 1000, 1000],
+                                            max_half_width=0.05, min_games=20)
+        self.assertEqual(decided.tolist(), [False, False, True, True])
+        # enough games but too wide, or tight enough but too few games
+        self.assertFalse(win_rate_stats.is_decided([0], [10], max_half_width=0.2, min_games=20)[0])
+        self.assertTrue(win_rate_stats.is_decided([0], [10], max_half_width=0.2, min_games=10)[0])
+
+    def test_sequential_matchups_stop(self):
+        for method in ("wilson", "bayes"):
+            # agent0 wins every other game
+            results = ({"winner": i % 2} for i in range(10 ** 6))
+            with mock.patch.object(research_main, 'run_one_game',
+                                   side_effect=lambda **kwargs: next(results)), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                row = research_main.run_sequential_matchups(
+                    [(RandomAgent, RandomAgent)], max_half_width=0.2, min_games=10,
+                    batch_size=5, method=method)[0]
+
+            # it stops after the first batch whose interval is tight enough
+            games = row["games"]
+            self.assertEqual(row["wins_agent0"], (games + 1) // 2)
+            self.assertLessEqual((row["ci_high"] - row["ci_low"]) / 2, 0.2)
+            self.assertTrue(win_rate_stats.is_decided(
+                row["wins_agent0"], games, 0.2, 10, method))
+            self.assertFalse(win_rate_stats.is_decided(
+                (games - 5 + 1) // 2, games - 5, 0.2, 10, method))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import io
+import random
+import unittest
+import contextlib
+
+from MTG import game
+from MTG import cards
+from MTG import vecgame
+from MTG import zobrist
+from MTG import gamesteps
+from MTG.exceptions import *
+from agents.randoms import RandomAgent
+from agents.heuristics import HeuristicAgent15
+
+
+class CheckingAgent():
+    """ checks the incremental hash against a rebuilt one at every decision """
+    def __init__(self, agent, test):
+        self.agent = agent
+        self.test = test
+        self.checked = 0
+
+    def check(self, game):
+        self.test.assertEqual(game.state_hash, zobrist.StateHasher(game).rebuild())
+        self.checked += 1
+
+    def select_action(self, player, game):
+        self.check(game)
+        return self.agent.select_action(player, game)
+
+    def select_choice(self, player, game, prompt_string):
+        self.check(game)
+        return self.agent.select_choice(player, game, prompt_string)
+
+
+class TestStateHash(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        self.game = self.new_game()
+        self.player = self.game.players_list[0]
+
+    def new_game(self, seed=None):
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        g = game.Game(decks, test=True, seed=seed)
+        g.setup_game()
+        g.step = gamesteps.Step.PRECOMBAT_MAIN
+        return g
+
+    def test_changes_and_changes_back(self):
+        g, p = self.game, self.player
+        start = g.state_hash
+        p.battlefield.add('Runeclaw Bear')
+        bear = p.battlefield[-1]
+        on_battlefield = g.state_hash
+        self.assertNotEqual(on_battlefield, start)
+
+        bear.tap()
+        tapped = g.state_hash
+        self.assertNotEqual(tapped, on_battlefield)
+        bear.untap()
+        self.assertEqual(g.state_hash, on_battlefield)
+
+        bear.add_counter('+1/+1')
+        self.assertNotEqual(g.state_hash, on_battlefield)
+
+        p.life -= 3
+        self.assertNotEqual(g.state_hash, start)
+        p.life += 3
+        p.battlefield.remove(bear)
+        bear.status.counters.clear()
+        self.assertEqual(g.state_hash, start)
+        self.assertEqual(g.state_hash, zobrist.StateHasher(g).rebuild())
+
+    def test_copies_do_not_cancel(self):
+        g, p = self.game, self.player
+        start = g.state_hash
+        p.hand.add('Plains')
+        one = g.state_hash
+        p.hand.add('Plains')
+        two = g.state_hash
+        self.assertEqual(len({start, one, two}), 3)
+
+    def test_adding_again_changes_nothing(self):
+        g, p = self.game, self.player
+        card = p.hand.add('Plains')
+        p.battlefield.add('Soulmender')
+        soulmender = p.battlefield[-1]
+        soulmender.status.tapped = True
+        before = (g.state_hash, g.board_revision, len(p.hand), len(p.battlefield))
+        p.hand.add(card)
+        p.hand.add([card])
+        p.battlefield.add(soulmender)
+        self.assertEqual((g.state_hash, g.board_revision, len(p.hand), len(p.battlefield)),
+                         before)
+        self.assertTrue(soulmender.status.tapped)
+
+    def test_same_state_same_hash(self):
+        hashes = []
+        for _ in range(2):
+            random.seed(4)
+            g = vecgame.default_game(4)
+            g.setup_game()
+            hashes.append(g.state_hash)
+        self.assertEqual(hashes[0], hashes[1])
+        self.assertLess(hashes[0], 2 ** 64)
+
+    def test_stack_ability_same_hash(self):
+        # str() of an ability on the stack has its card's id() and timestamp
+        hashes = []
+        for g in (self.new_game(seed=8), self.new_game(seed=8)):
+            p = g.players_list[0]
+            p.battlefield.add('Tireless Missionaries')
+            missionaries = p.battlefield[-1]
+            for triggers in missionaries.trigger_listeners.values():
+                g.stack.add([t.put_on_stack() for t in triggers])
+            self.assertEqual(len(g.stack), 1)
+            hashes.append(g.state_hash)
+        self.assertEqual(hashes[0], hashes[1])
+
+
+class TestStateHashInGames(unittest.TestCase):
+    def test_incremental_matches_rebuilt(self):
+        cards.setup_cards()
+        for seed in range(3):
+            random.seed(seed)
+            g = vecgame.default_game(seed)
+            players = list(g.players_list)
+            players[0].agent = CheckingAgent(HeuristicAgent15(), self)
+            players[1].agent = CheckingAgent(RandomAgent(), self)
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    g.run_game()
+                except EmptyLibraryException:
+                    g.lose_by_decking()
+            self.assertGreater(players[0].agent.checked, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+from MTG import cards
+from MTG import game
+from MTG import zone
+
+
+class TestZone(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, seed=3)
+        self.player = self.GAME.players_list[0]
+        self.zone = zone.Graveyard(self.player)
+        self.zone.add(cards.read_deck('data/decks/deck1.txt'))
+
+    def test_remove_keeps_order(self):
+        order = list(self.zone)
+        for i in (5, 0, len(order) - 3):
+            card = order.pop(i)
+            self.assertIn(card, self.zone)
+            self.assertTrue(self.zone.remove(card))
+            self.assertNotIn(card, self.zone)
+            self.assertFalse(self.zone.remove(card))
+            self.assertEqual(list(self.zone), order)
+            self.assertIs(self.zone[-1], order[-1])
+        self.assertIs(self.zone.pop(), order.pop())
+        self.assertIs(self.zone.pop(0), order.pop(0))
+        self.assertEqual(list(self.zone), order)
+        self.assertEqual(len(self.zone), len(order))
+
+    def test_get_card_by_name(self):
+        card = self.zone[3]
+        self.assertEqual(self.zone.get_card_by_name(card.name).name, card.name)
+        for c in list(self.zone):
+            if c.name == card.name:
+                self.zone.remove(c)
+        self.assertIsNone(self.zone.get_card_by_name(card.name))
+        self.assertIsNone(self.zone.get_card_by_name('Not A Card'))
+
+    def test_clear(self):
+        card = self.zone[0]
+        self.zone.clear()
+        self.assertFalse(self.zone)
+        self.assertNotIn(card, self.zone)
+        self.assertIsNone(self.zone.get_card_by_name(card.name))
+
+
+class TestLibrary(unittest.TestCase):
+    def setUp(self):
+        cards.setup_cards()
+        decks = [cards.read_deck('data/decks/deck1.txt'),
+                 cards.read_deck('data/decks/deck1.txt')]
+        self.GAME = game.Game(decks, seed=3)
+        self.player = self.GAME.players_list[0]
+        self.library = zone.Library(self.player, cards.read_deck('data/decks/deck1.txt'))
+
+    def names(self):
+        return [c.name for c in self.library]
+
+    def test_shuffle_is_lazy(self):
+        order = self.names()
+        state = self.GAME.rng.getstate()
+        self.library.shuffle()
+        self.library.shuffle()
+        self.library.add('Plains')
+        self.assertEqual(self.GAME.rng.getstate(), state)  # nothing drawn yet
+        self.library[-1]
+        self.assertNotEqual(self.GAME.rng.getstate(), state)
+        self.assertEqual(len(self.library), len(order) + 1)
+
+    def test_top_bottom_and_middle(self):
+        top = self.library.add('Forest', from_top=0, shuffle=False)
+        bottom = self.library.add('Island', from_top=-1, shuffle=False)
+        second = self.library.add('Swamp', from_top=1, shuffle=False)
+        self.assertIs(self.library[-1], top)
+        self.assertIs(self.library[0], bottom)
+        self.assertIs(self.library[-2], second)
+        self.assertIs(self.library.pop(), top)
+        self.assertIs(self.library.pop(0), bottom)
+        self.assertIs(self.library.pop(), second)
+
+    def test_remove_and_filter_keep_order(self):
+        order = list(self.library)
+        state = self.GAME.rng.getstate()
+        creature = next(iter(self.library.filter(filter_func=lambda c: c.is_creature)))
+        self.assertIn(creature, self.library)
+        self.assertTrue(self.library.remove(creature))
+        self.assertNotIn(creature, self.library)
+        self.assertFalse(self.library.remove(creature))
+        order = [c for c in order if c is not creature]
+        self.assertEqual(list(self.library), order)
+        self.assertEqual(self.GAME.rng.getstate(), state)
+
+    def test_same_seed_same_order(self):
+        other = game.Game([cards.read_deck('data/decks/deck1.txt'),
+                           cards.read_deck('data/decks/deck1.txt')], seed=3)
+        library = zone.Library(other.players_list[0], cards.read_deck('data/decks/deck1.txt'))
+        self.library.shuffle()
+        library.shuffle()
+        self.assertEqual(self.names(), [c.name for c in library])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -58,6 +58,8 @@ def choose_targets(source):
     if not source.has_valid_target():
         return False
 
+    targeting = source.game.targeting
+    is_legal = targeting.is_legal
     targets_chosen = []
     for criteria, prompt in zip(source.target_criterias, source.target_prompts):
         
@@ -65,53 +67,74 @@ def choose_targets(source):
         # TODO: allow optional targeting;
         # TODO: if no valid target available, fizzles
         card = None
+        targeting.choosing = (source, criteria)  # for whoever is asked
         try:
             while not card:
                 answer = source.controller.make_choice(prompt)
+                # '' cancels; otherwise an agent that declines to pick a
+                # target gets asked forever
+                if not answer:
+                    return False
                 card = get_card_from_user_input(source.controller, answer)
                 if card is None: continue
-                if not criteria(source, card):
+                if not is_legal(source, criteria, card):
                     card = None
         except:
             traceback.print_exc()
             return False
+        finally:
+            targeting.choosing = None
 
         targets_chosen.append(card)
     return targets_chosen
 
+def targets_in(zones, players, criteria):
+    """ note where criteria's targets can be (zone names, and whether players
+    can be targeted), so MTG.targeting only searches there """
+    criteria.zones = zones
+    criteria.players = players
+    return criteria
+
 def parse_targets(criterias):
     for i, v in enumerate(criterias):
         if v == 'creature':
-            criterias[i] = lambda self, p: p.is_permanent and p.is_creature
+            criterias[i] = targets_in(('battlefield',), False,
+                lambda self, p: p.is_permanent and p.is_creature)
 
         if v == 'your creature':
-            criterias[i] = lambda self, p: p.is_permanent and p.is_creature and p.controller == self.controller
+            criterias[i] = targets_in(('battlefield',), False,
+                lambda self, p: p.is_permanent and p.is_creature and p.controller == self.controller)
 
         if v == 'other creature':
-            criterias[i] = lambda self, p: p.is_permanent and p.is_creature and p != self
+            criterias[i] = targets_in(('battlefield',), False,
+                lambda self, p: p.is_permanent and p.is_creature and p != self)
 
         if v == 'your other creature':
-            criterias[i] = lambda self, p: (p.is_permanent and p.is_creature
-                                            and p.controller == self.controller and p != self)
+            criterias[i] = targets_in(('battlefield',), False,
+                lambda self, p: (p.is_permanent and p.is_creature
+                                 and p.controller == self.controller and p != self))
 
         if v == 'opponent creature':
-            criterias[i] = lambda self, p: p.is_creature and p.controller != self.controller
+            criterias[i] = targets_in(('battlefield',), False,
+                lambda self, p: p.is_permanent and p.is_creature and p.controller != self.controller)
 
         if v == 'opponent':
-            criterias[i] = lambda self, p: p.is_player and p != self.controller
+            criterias[i] = targets_in((), True,
+                lambda self, p: p.is_player and p != self.controller)
 
         if v == 'player':
-            criterias[i] = lambda self, p: p.is_player
+            criterias[i] = targets_in((), True, lambda self, p: p.is_player)
 
         if v == 'creature or player':
-            criterias[i] = (lambda self, p: p.is_player
-                         or (p.is_creature and p.is_permanent))
+            criterias[i] = targets_in(('battlefield',), True,
+                lambda self, p: p.is_player or (p.is_creature and p.is_permanent))
 
         if v == 'spell':
-            criterias[i] = lambda self, s: s.is_spell
+            criterias[i] = targets_in(('stack',), False, lambda self, s: s.is_spell)
 
         if v == 'instant or sorcery spell':
-            criterias[i] = lambda self, s: s.is_spell and (s.is_instant or s.is_sorcery)
+            criterias[i] = targets_in(('stack',), False,
+                lambda self, s: s.is_spell and (s.is_instant or s.is_sorcery))
 
     return criterias
 
@@ -0,0 +1,359 @@
+"""Many games stepped in lockstep, for learning agents.
+
+    cards.setup_cards()
+    env = VecGame(64, seed=0)
+    obs, masks = env.reset()                     # (64, N_FEATURES), (64, N_ACTIONS)
+    while training:
+        actions = policy(obs, masks)             # one batched call for all 64 games
+        obs, masks, rewards, dones, infos = env.step(actions)
+
+Each game runs on a GameStepper (MTG.stepper) and is paused at its next
+decision. Every step answers all of them at once, so whatever the policy
+costs is paid once per batch rather than once per select_action call. A
+finished game is replaced by a new one straight away (auto-reset):
+dones[i] is True, rewards[i] is the outcome for the player who made the
+last decision (1 won, -1 lost, 0 otherwise), infos[i]['winner'] is the
+winning seat (or -1), and obs[i] is already the new game's first decision.
+
+SubprocVecGame has the same interface and splits the games across worker
+processes, each running a VecGame.
+
+Actions
+-------
+An action is an index into a fixed layout that depends on the kind of
+decision (request_kind); masks[i] marks the indices that are well-formed
+answers right now. The engine can still reject one (e.g. an ability whose
+cost can't be paid), and then it asks again.
+
+    'action'   0 pass, 1 + i play hand[i],
+               1 + MAX_HAND + i activate the first ability of battlefield[i]
+    'attack'   0 no attack, 1 + i attack with the i-th creature that can
+               attack, 1 + MAX_PERMANENTS attack with all of them
+    'block'    0 no block, 1 + i block with the i-th creature that can block
+    'target'   0 cancel, 1 yourself, 2 your opponent, 3 + i battlefield[i],
+               3 + MAX_PERMANENTS + i your opponent's battlefield[i],
+               3 + 2 * MAX_PERMANENTS + i the i-th object on the stack
+               (only legal targets are unmasked)
+    'discard'  0 let the game choose, 1 + i discard hand[i]
+    'other'    0 the default answer
+
+Only the timing rules are checked for 'play hand[i]', not mana. Like the
+research agents, the environment puts the mana for a spell into its
+controller's pool when the spell is played (free_mana=True). The mana is
+recorded with the decision (see MTG.replay).
+"""
+import io
+import os
+import contextlib
+import multiprocessing
+
+import numpy as np
+
+from MTG import game
+from MTG import cards
+from MTG.stepper import GameStepper
+from MTG.featurizer import Featurizer, MAX_PERMANENTS, MAX_STACK, vector_size
+from agents.helpers import approx_cmc, infer_mana_symbol
+from research_decks import DECK_BUILDERS
+
+
+MAX_HAND = 16
+N_ACTIONS = 3 + 2 * MAX_PERMANENTS + MAX_STACK
+
+REQUEST_KINDS = ('action', 'attack', 'block', 'target', 'discard', 'other')
+N_FEATURES = vector_size(2) + len(REQUEST_KINDS)
+
+_DECK_PAIRS = [(a, b) for a in sorted(DECK_BUILDERS) for b in sorted(DECK_BUILDERS)]
+
+
+def default_game(seed):
+    """ two research decks; the pairing (mirrors included) cycles with seed """
+    deck0, deck1 = _DECK_PAIRS[seed % len(_DECK_PAIRS)]
+    return game.Game([DECK_BUILDERS[deck0]()[1], DECK_BUILDERS[deck1]()[1]], seed=seed)
+
+
+def request_kind(request):
+    if request.kind == 'action':
+        return 'action'
+    text = request.prompt
+    if "you'd like to attack" in text:
+        return 'attack'
+    if "you'd like to block" in text:
+        return 'block'
+    if request.game.targeting.choosing is not None:
+        return 'target'
+    if 'like to discard' in text:
+        return 'discard'
+    return 'other'
+
+
+def _attackers(player):
+    return player.game.query().battlefield().controlled_by(player) \
+        .where(lambda p: p.can_attack()).all()
+
+
+def _blockers(player):
+    return player.game.block_matrix.of(player).blockers
+
+
+def answers(request, kind=None):
+    """ [answer string or None] * N_ACTIONS: what each action means for
+    request (None: not allowed) """
+    kind = kind or request_kind(request)
+    player = request.player
+    out = [None] * N_ACTIONS
+    out[0] = ''
+
+    if kind == 'action':
+        sorcery_speed = player.at_sorcery_speed()
+        for i, card in enumerate(player.hand[:MAX_HAND]):
+            if player.can_play(card, sorcery_speed):
+                out[1 + i] = 'p %d' % i
+        for i, permanent in enumerate(player.battlefield[:MAX_PERMANENTS]):
+            abilities = permanent.activated_abilities
+            if (abilities and not abilities[0].is_mana_ability
+                    and abilities[0].could_activate()):
+                out[1 + MAX_HAND + i] = 'a %d' % i
+
+    elif kind == 'attack':
+        attackers = _attackers(player)[:MAX_PERMANENTS]
+        for i in range(len(attackers)):
+            out[1 + i] = str(i)
+        if attackers:
+            out[1 + MAX_PERMANENTS] = ' '.join(str(i) for i in range(len(attackers)))
+
+    elif kind == 'block':
+        for i in range(min(len(_blockers(player)), MAX_PERMANENTS)):
+            out[1 + i] = str(i)
+
+    elif kind == 'target':
+        targeting = request.game.targeting
+        source, criterion = targeting.choosing
+        opponent = player.opponent
+
+        def allow(index, obj, answer):
+            if targeting.is_legal(source, criterion, obj):
+                out[index] = answer
+
+        allow(1, player, 'p')
+        allow(2, opponent, 'op')
+        for i, obj in enumerate(player.battlefield[:MAX_PERMANENTS]):
+            allow(3 + i, obj, 'b %d' % i)
+        for i, obj in enumerate(opponent.battlefield[:MAX_PERMANENTS]):
+            allow(3 + MAX_PERMANENTS + i, obj, 'ob %d' % i)
+        for i, obj in enumerate(request.game.stack[:MAX_STACK]):
+            allow(3 + 2 * MAX_PERMANENTS + i, obj, 's %d' % i)
+
+    elif kind == 'discard':
+        for i in range(min(len(player.hand), MAX_HAND)):
+            out[1 + i] = str(i)
+
+    return out
+
+
+def action_index(allowed, answer, kind):
+    """ the action (index into allowed = answers(...)) that means the same
+    as answer, or -1 if none does """
+    if not isinstance(answer, str):
+        return -1
+    words = answer.split()
+    if kind in ('attack', 'block') and all(w.isdigit() for w in words):
+        # the engine ignores repeated and out-of-range creature indices
+        words = [str(i) for i in sorted({int(w) for w in words})
+                 if i < MAX_PERMANENTS and allowed[1 + i] is not None]
+    answer = ' '.join(words)
+    for i, a in enumerate(allowed):
+        if a == answer:
+            return i
+    return -1
+
+
+def features(g, player, kind):
+    """ the game from player's side (see MTG.featurizer) and the kind of
+    decision; N_FEATURES long """
+    f = g.featurizer or Featurizer(g)
+    return np.concatenate([f.vector(player.seat),
+                           np.asarray([kind == k for k in REQUEST_KINDS], dtype=np.float32)])
+
+
+class VecGame():
+    """num_games games in lockstep (see the module docstring).
+
+    make_game(seed) builds a new Game; the k-th game in row i uses seed
+    seed + first_slot + i + k * num_slots (num_slots defaults to num_games),
+    so a row's games don't depend on when the other rows' games end.
+    first_slot / num_slots place these rows in a bigger set of games (see
+    SubprocVecGame). featurize(game, player, kind) returns the 1-d
+    observation of a decision. With quiet=True the games' output (including
+    the tracebacks the engine prints for answers it rejects) is discarded.
+    """
+
+    def __init__(self, num_games, make_game=default_game, seed=0, first_slot=0,
+                 num_slots=None, featurize=features, free_mana=True, quiet=True):
+        self.num_games = num_games
+        self.make_game = make_game
+        self.featurize = featurize
+        self.free_mana = free_mana
+        self.quiet = quiet
+        self._next_seeds = [seed + first_slot + i for i in range(num_games)]
+        self.num_slots = num_slots or num_games
+
+        self.games = [None] * num_games
+        self.players = [None] * num_games  # (players leave g.players_list when they lose)
+        self.steppers = [None] * num_games
+        self.requests = [None] * num_games
+        self.seats = np.zeros(num_games, dtype=np.int64)  # who decides next
+        self._answers = [None] * num_games
+
+    def _output(self):
+        output = contextlib.ExitStack()
+        if self.quiet:
+            output.enter_context(contextlib.redirect_stdout(io.StringIO()))
+            output.enter_context(contextlib.redirect_stderr(io.StringIO()))
+        return output
+
+    def _start(self, i):
+        request = None
+        while request is None:  # (a game that never asks anything is skipped)
+            g = self.make_game(self._next_seeds[i])
+            self._next_seeds[i] += self.num_slots
+            stepper = GameStepper.for_game(g)
+            request = stepper.start()
+        self.games[i] = g
+        self.players[i] = list(g.players_list)
+        self.steppers[i] = stepper
+        self.requests[i] = request
+
+    def _observe(self):
+        obs = []
+        masks = np.zeros((self.num_games, N_ACTIONS), dtype=bool)
+        for i, request in enumerate(self.requests):
+            kind = request_kind(request)
+            self._answers[i] = answers(request, kind)
+            masks[i] = [a is not None for a in self._answers[i]]
+            self.seats[i] = request.player.seat
+            obs.append(self.featurize(request.game, request.player, kind))
+        return np.stack(obs), masks
+
+    def reset(self):
+        """ start num_games new games; (obs, masks) for their first decisions """
+        self.close()
+        with self._output():
+            for i in range(self.num_games):
+                self._start(i)
+            return self._observe()
+
+    def _answer(self, i, action):
+        answer = self._answers[i][action]
+        if answer is None:
+            raise ValueError('action %d is masked out for game %d' % (action, i))
+
+        request = self.requests[i]
+        if self.free_mana and answer[:2] == 'p ' and request.kind == 'action':
+            card = request.player.hand[int(answer[2:])]
+            if not card.is_land and approx_cmc(card) > 0:
+                request.player.mana.add_str(infer_mana_symbol(card) * approx_cmc(card))
+        return answer
+
+    def step(self, actions):
+        """ answer every game's pending decision; (obs, masks, rewards, dones, infos) """
+        rewards = np.zeros(self.num_games, dtype=np.float32)
+        dones = np.zeros(self.num_games, dtype=bool)
+        infos = [{} for _ in range(self.num_games)]
+
+        with self._output():
+            for i, action in enumerate(actions):
+                seat = self.requests[i].player.seat
+                self.requests[i] = self.steppers[i].send(self._answer(i, int(action)))
+                if self.requests[i] is not None:
+                    continue
+
+                g = self.games[i]
+                standing = [p.seat for p in self.players[i] if not p.lost]
+                winner = standing[0] if len(standing) == 1 else -1
+                rewards[i] = 0 if winner == -1 else (1 if winner == seat else -1)
+                dones[i] = True
+                infos[i] = {'winner': winner, 'turns': g.turn_num,
+                            'decisions': len(g.decisions), 'seed': g.seed}
+                self._start(i)
+
+            obs, masks = self._observe()
+        return obs, masks, rewards, dones, infos
+
+    def close(self):
+        for stepper in self.steppers:
+            if stepper is not None and not stepper.done:
+                with self._output():
+                    stepper.close()
+
+
+def _worker(conn, num_games, kwargs):
+    cards.setup_cards()
+    env = VecGame(num_games, **kwargs)
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == 'reset':
+                conn.send(env.reset())
+            elif command == 'step':
+                conn.send(env.step(data))
+            elif command == 'close':
+                break
+    finally:
+        env.close()
+        conn.close()
+
+
+class SubprocVecGame():
+    """A VecGame split across num_workers processes (same interface).
+
+    Worker w plays the rows bounds[w]:bounds[w + 1], with the seeds those
+    rows get in VecGame(num_games, seed=seed), so the games and the order of
+    the rows don't depend on how many workers there are. make_game and
+    featurize have to be picklable (module-level functions).
+    """
+
+    def __init__(self, num_games, num_workers=None, seed=0, **kwargs):
+        num_workers = min(num_workers or os.cpu_count(), num_games)
+        self.num_games = num_games
+        sizes = [num_games // num_workers + (w < num_games % num_workers)
+                 for w in range(num_workers)]
+        self.bounds = np.cumsum([0] + sizes)
+        self.conns = []
+        self.processes = []
+        for w, size in enumerate(sizes):
+            parent, child = multiprocessing.Pipe()
+            worker_kwargs = dict(kwargs, seed=seed, first_slot=int(self.bounds[w]),
+                                 num_slots=num_games)
+            process = multiprocessing.Process(target=_worker, daemon=True,
+                                              args=(child, size, worker_kwargs))
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def _gather(self):
+        results = [conn.recv() for conn in self.conns]
+        return [np.concatenate(parts) if isinstance(parts[0], np.ndarray)
+                else [x for part in parts for x in part]
+                for parts in zip(*results)]
+
+    def reset(self):
+        for conn in self.conns:
+            conn.send(('reset', None))
+        return tuple(self._gather())
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for w, conn in enumerate(self.conns):
+            conn.send(('step', actions[self.bounds[w]:self.bounds[w + 1]]))
+        return tuple(self._gather())
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(('close', None))
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.conns = []
+        self.processes = []
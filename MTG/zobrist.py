@@ -0,0 +1,195 @@
+"""A 64-bit hash of the game state, kept up to date as the game changes.
+
+    game.state_hash              # int in [0, 2**64)
+    game.zobrist.rebuild()       # the same value, from a walk over the game
+
+Zobrist hashing: every fact about the state has a fixed random 64-bit key,
+and the hash is the XOR of the keys of the facts that are true. A change
+XORs the old fact's key out and the new one's in, so nothing has to walk
+the object graph. The facts are:
+
+  * each card in a hand, library, graveyard or exile (seat, zone, name)
+  * each permanent (controller, name, tapped, damage, counters,
+    summoning sickness, attacking / blocking)
+  * the stack, in order (position, name, controller)
+  * each player's life and mana pool
+  * the step and the active player (not the turn number, so a position
+    that comes back is recognised, e.g. for loop detection)
+
+Zones hold multisets: the k-th copy of a fact has its own key, so two
+Plains in a hand don't cancel out. Library order is not part of the hash
+(it is hidden, and shuffled lazily).
+
+Keys come from blake2b over the fact, so a state hashes the same in every
+process (unlike hash()). The hasher is built on the first read of
+game.state_hash; from then on it is told what changed, like the featurizer:
+zones report objects entering and leaving (Zone._emit), and permanents
+report status, effect and counter writes (Permanent._changed). Those
+permanents, life, mana and the stack are re-hashed on the next read.
+"""
+import hashlib
+from collections import defaultdict
+
+from MTG import abilities
+from MTG.eventlog import EventType
+
+
+_keys = {}  # fact -> 64-bit key
+
+
+def key(fact):
+    """ the fixed random 64-bit key of fact (a tuple of str / int / bool) """
+    k = _keys.get(fact)
+    if k is None:
+        digest = hashlib.blake2b(repr(fact).encode(), digest_size=8).digest()
+        k = _keys[fact] = int.from_bytes(digest, 'little')
+    return k
+
+
+def _seat(obj):
+    controller = getattr(obj, 'controller', None)
+    return getattr(controller, 'seat', -1)
+
+
+def _name(obj):
+    ability = getattr(obj, 'source', None)
+    if isinstance(ability, abilities.Ability):
+        # an ability on the stack is named after str(ability), which has
+        # its card's id() and timestamp in it
+        return ('ability', ability.card.name, str(ability.effect))
+    return getattr(obj, 'name', type(obj).__name__)
+
+
+def permanent_fact(permanent):
+    status = permanent.status
+    counters = tuple(sorted((name, num) for name, num in status.counters.items() if num))
+    return ('permanent', _seat(permanent), permanent.name, bool(status.tapped),
+            status.damage_taken, counters, bool(status.summoning_sick),
+            bool(status.is_attacking), bool(status.is_blocking))
+
+
+class StateHasher():
+    def __init__(self, game):
+        self.game = game
+        self.built = False
+        self.value = 0
+        self.dirty = {}  # id(permanent) -> permanent, re-hashed on the next read
+        self._counts = defaultdict(int)  # fact -> copies of it XORed in
+        self._facts = {}  # id(permanent) -> its fact, as hashed
+        self._players = []
+        self._life = {}  # seat -> life, as hashed
+        self._mana = {}  # seat -> mana pool, as hashed
+        self._stack = 0  # the stack's part of value
+        self._stack_moved = False
+        self._turn = None  # (step, active seat), as hashed
+
+    def _add(self, fact):
+        self._counts[fact] += 1
+        self.value ^= key(fact + (self._counts[fact],))
+
+    def _discard(self, fact):
+        self.value ^= key(fact + (self._counts[fact],))
+        self._counts[fact] -= 1
+
+    def _swap(self, old, new):
+        self.value ^= key(old) ^ key(new)
+
+    def rebuild(self):
+        """ hash the whole game from scratch """
+        game = self.game
+        self.built = True
+        self.value = 0
+        self.dirty.clear()
+        self._counts.clear()
+        self._facts = {}
+        self._players = list(game.players_list)
+        for p in self._players:
+            for zone in (p.hand, p.library, p.graveyard, p.exile):
+                for obj in zone:
+                    self._add((zone.zone_type, p.seat, _name(obj)))
+            for permanent in p.battlefield:
+                fact = self._facts[id(permanent)] = permanent_fact(permanent)
+                self._add(fact)
+            self._life[p.seat] = p.life
+            self.value ^= key(('life', p.seat, p.life))
+            self._mana[p.seat] = self._pool(p)
+            self.value ^= key(('mana', p.seat, self._mana[p.seat]))
+        self._stack = self._stack_hash()
+        self.value ^= self._stack
+        self._stack_moved = False
+        self._turn = self._turn_fact()
+        self.value ^= key(self._turn)
+        return self.value
+
+    def zone_changed(self, event_type, zone, obj):
+        if zone.zone_type == 'STACK':
+            self._stack_moved = True
+            return
+        entering = event_type is EventType.ZONE_ENTER
+        if zone.zone_type == 'BATTLEFIELD':
+            if entering:
+                fact = self._facts[id(obj)] = permanent_fact(obj)
+                self._add(fact)
+            else:
+                self.dirty.pop(id(obj), None)
+                fact = self._facts.pop(id(obj), None)
+                if fact is not None:
+                    self._discard(fact)
+            return
+        fact = (zone.zone_type, zone.controller.seat, _name(obj))
+        if entering:
+            self._add(fact)
+        else:
+            self._discard(fact)
+
+    def _pool(self, player):
+        return tuple(sorted((m.value, n) for m, n in player.mana.pool.items() if n))
+
+    def _stack_hash(self):
+        h = 0
+        for i, obj in enumerate(self.game.stack):
+            h ^= key(('stack', i, _name(obj), _seat(obj)))
+        return h
+
+    def _turn_fact(self):
+        game = self.game
+        step = game.step.name if game.step is not None else None
+        current = getattr(game, 'current_player', None)
+        return ('turn', step, getattr(current, 'seat', -1))
+
+    def refresh(self):
+        """ re-hash what changed without an event; the up to date value """
+        if not self.built:
+            return self.rebuild()
+
+        for k, permanent in self.dirty.items():
+            old = self._facts.get(k)
+            if old is None:
+                continue
+            new = permanent_fact(permanent)
+            if new != old:
+                self._discard(old)
+                self._facts[k] = new
+                self._add(new)
+        self.dirty.clear()
+
+        for p in self._players:
+            if p.life != self._life[p.seat]:
+                self._swap(('life', p.seat, self._life[p.seat]), ('life', p.seat, p.life))
+                self._life[p.seat] = p.life
+            pool = self._pool(p)
+            if pool != self._mana[p.seat]:
+                self._swap(('mana', p.seat, self._mana[p.seat]), ('mana', p.seat, pool))
+                self._mana[p.seat] = pool
+
+        if self._stack_moved:
+            stack = self._stack_hash()
+            self.value ^= self._stack ^ stack
+            self._stack = stack
+            self._stack_moved = False
+
+        turn = self._turn_fact()
+        if turn != self._turn:
+            self._swap(self._turn, turn)
+            self._turn = turn
+        return self.value
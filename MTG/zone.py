@@ -1,4 +1,5 @@
 from enum import Enum
+from collections import deque
 import random, pdb
 
 from MTG import gameobject
@@ -6,6 +7,8 @@ from MTG import cards
 from MTG import card
 from MTG import permanent
 from MTG import triggers
+from MTG.eventlog import EventType
+from MTG.instrumentation import STATS
 
 
 class ZoneType(Enum):
@@ -29,9 +32,11 @@ def str_to_zone_type(z):
 
 
 class Zone():
+    zone_type = None
     is_library = False
     is_battlefield = False
     is_public = False
+    game = None
 
     def __init__(self, controller=None, elements: list=None):
         if elements is None:
@@ -44,6 +49,55 @@ class Zone():
         if controller is not None:
             self.game = self.controller.game
 
+    # Objects are indexed by id(): GameObjects compare equal only to
+    # themselves (their repr contains id()), so this is what list.remove and
+    # `in` did, without building two reprs per comparison. The ordered list
+    # (for "b 2", "oh 0", ...) is rebuilt from the index when it is needed
+    # after a removal.
+
+    @property
+    def elements(self):
+        if self._list is None:
+            self._list = list(self._objs.values())
+        return self._list
+
+    @elements.setter
+    def elements(self, value):
+        self._objs = {}
+        self._names = {}
+        self._by_name = {}
+        self._list = None
+        for obj in value:
+            self._index(obj)
+
+    def _index(self, obj):
+        key = id(obj)
+        name = getattr(obj, 'name', None)
+        self._objs[key] = obj
+        self._names[key] = name
+        self._by_name.setdefault(name, {})[key] = obj
+
+    def _unindex(self, obj):
+        """ False if obj isn't in this zone """
+        key = id(obj)
+        if self._objs.pop(key, None) is None:
+            return False
+        name = self._names.pop(key)
+        same_name = self._by_name[name]
+        del same_name[key]
+        if not same_name:
+            del self._by_name[name]
+        return True
+
+    def _append(self, obj):
+        """ False (and nothing changes) if obj is already here """
+        if id(obj) in self._objs:
+            return False
+        self._index(obj)
+        if self._list is not None:
+            self._list.append(obj)
+        return True
+
     def __repr__(self):
         return 'zone.Zone %r controlled by %r len=%s\n%r' % (self.__class__.__name__,
                                                              self.controller, len(self), self.elements)
@@ -56,29 +110,67 @@ class Zone():
 
 
     def __len__(self):
-        return len(self.elements)
+        return len(self._objs)
 
     def __bool__(self):
-        return bool(self.elements)
+        return bool(self._objs)
 
     def __getitem__(self, pos):
         return self.elements[pos]
 
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __contains__(self, obj):
+        return id(obj) in self._objs
+
     @property
     def isEmpty(self):
         return len(self) == 0
 
+    def _emit(self, event_type, obj):
+        """ count obj entering/leaving this zone; record it in the game's event log
+
+        Leaving a zone also ends the effects that last as long as obj stays.
+        """
+        if STATS.enabled:
+            STATS.count(event_type.name.lower(), self.zone_type)
+        game = self.game
+        if game is None:
+            return
+        game.board_revision += 1
+        if event_type is EventType.ZONE_LEAVE:
+            key = id(obj)
+            if key in game.effects_by_source or key in game.continuous.sources:
+                game.end_effects_from(obj)
+        if game.featurizer is not None:
+            game.featurizer.zone_changed(event_type, self, obj)
+        if game.zobrist.built:
+            game.zobrist.zone_changed(event_type, self, obj)
+        if game.event_log is None or self.zone_type is None:
+            return
+        player = self.controller if self.controller is not None else obj.controller
+        zone_type = ZoneType[self.zone_type]
+        if event_type is EventType.ZONE_ENTER:
+            self.game.emit(event_type, player, name=obj.name, to_zone=zone_type)
+        else:
+            self.game.emit(event_type, player, name=obj.name, from_zone=zone_type)
+
     def add(self, obj):
         if type(obj) is str:  # convert string (card's name) to a Card object
             obj = cards.card_from_name(obj)
 
         if type(obj) is list:
+            added = []
             for o in obj:
                 o.zone = self
                 if not isinstance(self, Stack):
                     assert isinstance(o, gameobject.GameObject)
-                o.controller = self.controller
-            self.elements.extend(obj)
+                    o.controller = self.controller
+                if self._append(o):
+                    added.append(o)
+            for o in added:
+                self._emit(EventType.ZONE_ENTER, o)
             return obj
 
         if not isinstance(self, Stack):
@@ -86,49 +178,59 @@ class Zone():
             obj.controller = self.controller
 
         obj.zone = self
-        self.elements.append(obj)
+        if self._append(obj):
+            self._emit(EventType.ZONE_ENTER, obj)
         return obj
 
     def remove(self, obj):
         if type(obj) is list:
             return all([self.remove(o) for o in obj])
 
-        try:
-            self.elements.remove(obj)
-            obj.zone = None
-            return True
-        except ValueError:
+        if not self._unindex(obj):
             return False
-
-    def filter(self, characteristics=None, filter_func=None):
-        found = set()
+        if self._list is not None:
+            if self._list and self._list[-1] is obj:
+                self._list.pop()  # e.g. the top of the stack; keep the list
+            else:
+                self._list = None
+        obj.zone = None
+        self._emit(EventType.ZONE_LEAVE, obj)
+        return True
+
+    def contents(self):
+        """ the objects in this zone, without observing any hidden order """
+        return self.elements
+
+    def _matching(self, characteristics=None, filter_func=None):
         if filter_func:
-            for ele in self:
-                if filter_func(ele):
-                    found.add(ele)
-
-        else:
-            assert (characteristics is None
-                    or isinstance(characteristics, gameobject.Characteristics))
+            return (ele for ele in self.contents() if filter_func(ele))
 
-            for ele in self:
-                if ele.characteristics.satisfy(characteristics):
-                    found.add(ele)
+        assert (characteristics is None
+                or isinstance(characteristics, gameobject.Characteristics))
+        return (ele for ele in self.contents()
+                if ele.characteristics.satisfy(characteristics))
 
-        return found
+    def filter(self, characteristics=None, filter_func=None):
+        return set(self._matching(characteristics, filter_func))
 
     def count(self, characteristics=None, filter_func=None):
-        return len(self.filter(characteristics, filter_func))
+        return sum(1 for _ in self._matching(characteristics, filter_func))
+
+    def cards_named(self, name):
+        # indexed by the name an object had when it entered the zone
+        return [obj for obj in self._by_name.get(name, {}).values() if obj.name == name]
 
     def get_card_by_name(self, name):
-        cards = self.filter(gameobject.Characteristics(name=name))
-        if cards:
-            return list(cards)[0]
-        else:
-            return None
+        for obj in self._by_name.get(name, {}).values():
+            if obj.name == name:
+                return obj
+        return None
 
     def pop(self, pos=-1):
-        return self.elements.pop(pos)
+        obj = self.elements.pop(pos)  # the list stays in step with the index
+        self._unindex(obj)
+        self._emit(EventType.ZONE_LEAVE, obj)
+        return obj
 
     def clear(self):
         # bypass triggers
@@ -152,7 +254,9 @@ class Battlefield(Zone):
         else:
             assert isinstance(obj, permanent.Permanent)
             obj.zone = self
-            self.elements.append(obj)
+            if not self._append(obj):
+                return  # already here: it doesn't enter again
+            self._emit(EventType.ZONE_ENTER, obj)
             obj.status.reset()  # reset status upon entering battlefield
             if status_mod:
                 if 'tapped' in status_mod:
@@ -196,19 +300,53 @@ class Exile(Zone):
 
 
 class Library(Zone):
+    """ The top of the library is the right end of the deque (self.elements[-1])
+
+    Shuffling is lazy: shuffle() only marks the library, and the permutation
+    is drawn from the game's rng the next time the order is observed (pop,
+    indexing, iteration, placing a card at a position). Adding, removing and
+    searching don't look at the order, so a search + shuffle + search costs
+    one permutation instead of three.
+    """
     zone_type = 'LIBRARY'
     is_library = True
     is_public = False
 
-    def shuffle(self):
-        random.shuffle(self.elements)
-
     def __init__(self, controller=None, elements: list=None):
         super(Library, self).__init__(controller, elements)
-        for ele in self.elements:
+        for ele in self._cards:
             ele.zone = self
         self.shuffle()
 
+    @property
+    def elements(self):
+        self._materialize()
+        return self._cards
+
+    @elements.setter
+    def elements(self, value):
+        Zone.elements.fset(self, value)  # the index
+        self._cards = deque(value)
+        self._needs_shuffle = False
+
+    def shuffle(self):
+        self._needs_shuffle = True
+
+    def _materialize(self):
+        if self._needs_shuffle:
+            # the game's own rng, so that a game is reproducible from its seed
+            cards = list(self._cards)
+            (self.game.rng if self.game is not None else random).shuffle(cards)
+            self._cards = deque(cards)
+            self._needs_shuffle = False
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return list(self.elements)[pos]
+        return self.elements[pos]
 
     def add(self, obj, from_top=0, shuffle=True):
         """ Note: the library is reversed; i.e. self.elements[0] is the last card
@@ -221,12 +359,21 @@ class Library(Zone):
         obj.controller = self.controller
         obj.zone = self
 
-        if from_top == 0:
-            self.elements.append(obj)
-        elif from_top == -1:  # put on bottom
-            self.elements = [obj] + self.elements
+        if id(obj) in self._objs:
+            return obj
+        self._index(obj)
+        if shuffle:  # position doesn't matter
+            self._cards.append(obj)
         else:
-            self.elements = self.elements[:-from_top] + [obj] + self.elements[-from_top:]
+            if self._needs_shuffle:
+                self._materialize()
+            if from_top == 0:
+                self._cards.append(obj)
+            elif from_top == -1:  # put on bottom
+                self._cards.appendleft(obj)
+            else:
+                self._cards.insert(max(0, len(self._cards) - from_top), obj)
+        self._emit(EventType.ZONE_ENTER, obj)
 
         if shuffle:
             self.shuffle()
@@ -234,9 +381,43 @@ class Library(Zone):
         return obj
 
     def remove(self, obj, shuffle=False):
+        # removing doesn't observe the order, so it commutes with the shuffle
         if shuffle:
             self.shuffle()
 
-        return super(Library, self).remove(obj)
+        if type(obj) is list:
+            return all([self.remove(o) for o in obj])
 
+        if not self._unindex(obj):
+            return False
+        if self._cards[-1] is obj:
+            self._cards.pop()
+        else:
+            # by identity; deque.remove would compare reprs
+            for i, card in enumerate(self._cards):
+                if card is obj:
+                    del self._cards[i]
+                    break
+        obj.zone = None
+        self._emit(EventType.ZONE_LEAVE, obj)
+        return True
+
+    def pop(self, pos=-1):
+        if self._needs_shuffle:
+            self._materialize()
+        cards = self._cards
+        if pos == -1:
+            obj = cards.pop()
+        elif pos == 0:
+            obj = cards.popleft()
+        else:
+            obj = cards[pos]
+            del cards[pos]
+        self._unindex(obj)
+        self._emit(EventType.ZONE_LEAVE, obj)
+        return obj
 
+    def contents(self):
+        # in the order the cards entered, so searching doesn't observe (or
+        # perform) a pending shuffle
+        return list(self._objs.values())
@@ -0,0 +1,162 @@
+"""
+Choose blocks by searching over block assignments.
+
+    solver = BlockSolver(time_budget=0.05)
+    block_of, score = solver.solve(attackers, blockers, legal, life)
+    # block_of[j]: the attacker blocker j blocks, or -1
+
+    planner = BlockPlanner()                   # one per agent
+    planner.answer(player, game)               # "0 2": answer to the current
+                                               # "you'd like to block X" prompt
+
+A candidate assignment is scored with combat_eval.resolve(): the value of
+the attackers it kills, minus the value of the blockers it loses, minus the
+damage taken (which costs more the lower our life is). An assignment that
+leaves us dead scores below every other one. Only legal pairs are tried:
+legal[i, j] says whether blocker j can block attacker i (flying / reach,
+intimidate, landwalk; BlockPlanner reads game.block_matrix), and every
+blocker blocks at most one attacker.
+
+The search is anytime: no blocks first, then coordinate ascent (change one
+blocker at a time while it helps), then, if the space is small enough, every
+legal assignment in chunks -- until the time budget runs out. The best
+assignment seen so far is returned.
+
+The game asks the defender once per attacker, about the attackers and
+blockers of game.block_matrix in order. BlockPlanner solves the whole
+combat on the first prompt, keeps the answer for the rest of the step, and
+hands each prompt the blockers assigned to its attacker.
+"""
+import time
+import itertools
+
+import numpy as np
+
+from agents import combat_eval
+
+
+LOSS = -1e6
+
+
+def creature_value(c):
+    """ (N,) how much each of combatants c is worth: P + T + keywords """
+    power = np.asarray(c.power, dtype=np.int64)
+    toughness = np.asarray(c.toughness, dtype=np.int64)
+    keywords = np.asarray(c.keywords, dtype=np.int64)
+    bits = sum((keywords & bit) != 0 for bit in combat_eval.KEYWORD_BITS.values())
+    return np.maximum(power, 0) + np.maximum(toughness, 0) + bits
+
+
+def damage_weight(life):
+    """ the value of one point of life; grows as life gets low """
+    return 10.0 / max(life, 1)
+
+
+def score(result, life, attacker_value, blocker_value):
+    """ (B,) the defender's value of each candidate combat """
+    killed = (result.attacker_dies * attacker_value).sum(axis=1)
+    lost = (result.blocker_dies * blocker_value).sum(axis=1)
+    value = killed - lost - result.player_damage * damage_weight(life)
+    life_after = life + result.defender_life
+    return np.where(life_after > 0, value, LOSS + life_after)
+
+
+class BlockSolver:
+    """ finds the best legal block assignment within a time budget (seconds) """
+
+    def __init__(self, time_budget=0.05, chunk_size=4096, max_exhaustive=1 << 20):
+        self.time_budget = time_budget
+        self.chunk_size = chunk_size
+        self.max_exhaustive = max_exhaustive
+
+    def solve(self, attackers, blockers, legal, life):
+        """ (block_of, score) for the best assignment found
+
+        attackers, blockers: combat_eval.Combatants
+        legal: (N, M) bool, legal[i, j] if blocker j may block attacker i
+        """
+        deadline = time.perf_counter() + self.time_budget
+        n, m = len(attackers.power), len(blockers.power)
+        legal = np.asarray(legal, dtype=bool).reshape(n, m)
+        values = (creature_value(attackers), creature_value(blockers))
+
+        def evaluate(candidates):
+            result = combat_eval.resolve(attackers, blockers, candidates)
+            return score(result, life, *values)
+
+        options = [[-1] + np.flatnonzero(legal[:, j]).tolist() for j in range(m)]
+        best = np.full(m, -1, dtype=np.int64)
+        best_score = evaluate(best[None])[0]
+        if not m or not n:
+            return best, best_score
+
+        # coordinate ascent: move one blocker at a time while it helps
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for j in range(m):
+                if len(options[j]) < 2:
+                    continue
+                candidates = np.repeat(best[None], len(options[j]), axis=0)
+                candidates[:, j] = options[j]
+                scores = evaluate(candidates)
+                k = int(np.argmax(scores))
+                if scores[k] > best_score:
+                    best, best_score = candidates[k], scores[k]
+                    improved = True
+
+        # every legal assignment, while there is time
+        total = 1
+        for o in options:
+            total *= len(o)
+        if total > self.max_exhaustive:
+            return best, best_score
+
+        assignments = itertools.product(*options)
+        while time.perf_counter() < deadline:
+            chunk = list(itertools.islice(assignments, self.chunk_size))
+            if not chunk:
+                break
+            candidates = np.array(chunk, dtype=np.int64).reshape(-1, m)
+            scores = evaluate(candidates)
+            k = int(np.argmax(scores))
+            if scores[k] > best_score:
+                best, best_score = candidates[k], scores[k]
+
+        return best, best_score
+
+
+class BlockPlanner:
+    """ answers a defender's block prompts, one solve per combat """
+
+    def __init__(self, solver=None):
+        self.solver = solver or BlockSolver()
+        self._key = None
+        self._answers = []
+        self._asked = 0
+
+    def plan(self, player, game):
+        """ one answer per attacker, in prompt order """
+        matrix = game.block_matrix.of(player)
+        attackers, blockers = matrix.attackers, matrix.blockers
+        key = (id(game), game.turn_num, game.board_revision,
+               tuple(map(id, attackers)), tuple(map(id, blockers)))
+        if key != self._key:
+            block_of, _ = self.solver.solve(
+                combat_eval.combatants(attackers), combat_eval.combatants(blockers),
+                matrix.rows, player.life)
+            self._key = key
+            self._answers = [" ".join(str(j) for j in np.flatnonzero(block_of == i))
+                             for i in range(len(attackers))]
+            self._asked = 0
+        return self._answers
+
+    def answer(self, player, game):
+        """ the answer to the next "you'd like to block X" prompt """
+        answers = self.plan(player, game)
+        if not answers:
+            return ""
+        # the game asks again from the first attacker if a block was illegal
+        answer = answers[self._asked % len(answers)]
+        self._asked += 1
+        return answer
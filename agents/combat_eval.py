@@ -0,0 +1,200 @@
+"""
+Predict how a combat ends, without touching the game.
+
+    attackers = combatants(my_attacking_creatures)     # or Combatants(...) by hand
+    blockers = combatants(their_untapped_creatures)
+    block_of = block_assignments(len(attackers.power), len(blockers.power))
+    result = resolve(attackers, blockers, block_of)    # every way they could block, at once
+    result.player_damage                               # (B,) damage to the defending player
+    result.attacker_dies, result.blocker_dies          # (B, N), (B, M)
+
+A combatant is its power, toughness, damage already marked on it and a
+keyword bitmask (FIRST_STRIKE | DOUBLE_STRIKE | DEATHTOUCH | TRAMPLE |
+LIFELINK). block_of[b, j] is the attacker (index) that blocker j blocks in
+candidate b, or -1. attacking[b, i] (all True by default) says whether
+attacker i attacks at all in candidate b, so attack subsets can be scored
+the same way (see attack_subsets).
+
+resolve() follows the damage rules (510, 702.2, 702.4, 702.7, 702.15,
+702.19): a first strike / double strike damage step happens before the
+regular one, and what died in it deals no regular damage. A blocked
+attacker assigns lethal damage to its blockers in order (index order;
+1 is lethal with deathtouch), then the rest to the last one, or to the
+player with trample. A blocked attacker whose blockers are all gone deals
+no damage unless it has trample.
+
+Everything is computed for all B candidates at once; the loops are over
+the (few) attackers and blockers only.
+"""
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+
+FIRST_STRIKE = 1
+DOUBLE_STRIKE = 2
+DEATHTOUCH = 4
+TRAMPLE = 8
+LIFELINK = 16
+
+KEYWORD_BITS = {
+    "First Strike": FIRST_STRIKE,
+    "Double Strike": DOUBLE_STRIKE,
+    "Deathtouch": DEATHTOUCH,
+    "Trample": TRAMPLE,
+    "Lifelink": LIFELINK,
+}
+
+Combatants = namedtuple("Combatants", "power toughness keywords damage")
+Combatants.__new__.__defaults__ = (None,)  # damage: none marked
+
+CombatResult = namedtuple("CombatResult", [
+    "attacker_damage",   # (B, N) damage marked on each attacker afterwards
+    "blocker_damage",    # (B, M)
+    "attacker_dies",     # (B, N) bool
+    "blocker_dies",      # (B, M) bool
+    "player_damage",     # (B,) combat damage to the defending player
+    "attacker_life",     # (B,) life change of the attacking player (lifelink)
+    "defender_life",     # (B,) life change of the defending player
+])
+
+
+def keyword_mask(permanent):
+    mask = 0
+    for name, bit in KEYWORD_BITS.items():
+        if permanent.has_ability(name):
+            mask |= bit
+    return mask
+
+
+def combatants(creatures):
+    """ Combatants for a list of creatures on the battlefield (read once) """
+    creatures = list(creatures)
+    return Combatants(
+        np.array([c.power for c in creatures], dtype=np.int64),
+        np.array([c.toughness for c in creatures], dtype=np.int64),
+        np.array([keyword_mask(c) for c in creatures], dtype=np.int64),
+        np.array([c.status.damage_taken for c in creatures], dtype=np.int64))
+
+
+def block_assignments(num_attackers, num_blockers):
+    """ (B, M) every way num_blockers creatures could block num_attackers
+    attackers ((N + 1) ** M of them, including not blocking) """
+    choices = range(-1, num_attackers)
+    return np.array(list(itertools.product(choices, repeat=num_blockers)),
+                    dtype=np.int64).reshape(-1, num_blockers)
+
+
+def attack_subsets(num_attackers):
+    """ (2 ** N, N) bool: every subset of attackers, the empty one first """
+    return np.array(list(itertools.product((False, True), repeat=num_attackers)),
+                    dtype=bool).reshape(-1, num_attackers)
+
+
+def _as_arrays(c):
+    power = np.asarray(c.power, dtype=np.int64)
+    damage = np.zeros_like(power) if c.damage is None else np.asarray(c.damage, dtype=np.int64)
+    return (power, np.asarray(c.toughness, dtype=np.int64),
+            np.asarray(c.keywords, dtype=np.int64), damage)
+
+
+def resolve(attackers, blockers, block_of, attacking=None):
+    """ the outcome of every candidate combat (see the module docstring) """
+    a_power, a_tough, a_keys, a_marked = _as_arrays(attackers)
+    b_power, b_tough, b_keys, b_marked = _as_arrays(blockers)
+    n, m = len(a_power), len(b_power)
+    block_of = np.asarray(block_of, dtype=np.int64).reshape(-1, m) if m else \
+        np.zeros((1, 0), dtype=np.int64)
+    if attacking is None:
+        attacking = np.ones((1, n), dtype=bool)
+    attacking = np.asarray(attacking, dtype=bool).reshape(-1, n)
+    num = max(len(block_of), len(attacking))
+    block_of = np.broadcast_to(block_of, (num, m))
+    attacking = np.broadcast_to(attacking, (num, n))
+
+    rows = np.arange(num)
+    # a blocker only blocks a creature that is attacking
+    blocking = block_of >= 0
+    if m:
+        blocking &= attacking[rows[:, None], np.maximum(block_of, 0)]
+    blocked = np.zeros((num, n), dtype=bool)
+    for j in range(m):
+        blocked[rows[blocking[:, j]], block_of[blocking[:, j], j]] = True
+
+    a_damage = np.broadcast_to(a_marked, (num, n)).copy()
+    b_damage = np.broadcast_to(b_marked, (num, m)).copy()
+    a_alive = attacking.copy()
+    b_alive = blocking.copy()
+    player_damage = np.zeros(num, dtype=np.int64)
+    attacker_gain = np.zeros(num, dtype=np.int64)
+    defender_gain = np.zeros(num, dtype=np.int64)
+
+    for first_strike_step in (True, False):
+        if first_strike_step:
+            a_deals = (a_keys & (FIRST_STRIKE | DOUBLE_STRIKE)) != 0
+            b_deals = (b_keys & (FIRST_STRIKE | DOUBLE_STRIKE)) != 0
+        else:
+            a_deals = ((a_keys & FIRST_STRIKE) == 0) | ((a_keys & DOUBLE_STRIKE) != 0)
+            b_deals = ((b_keys & FIRST_STRIKE) == 0) | ((b_keys & DOUBLE_STRIKE) != 0)
+
+        # damage is dealt simultaneously within a step: collect, then mark
+        to_attackers = np.zeros((num, n), dtype=np.int64)
+        to_blockers = np.zeros((num, m), dtype=np.int64)
+        a_deathtouched = np.zeros((num, n), dtype=bool)
+        b_deathtouched = np.zeros((num, m), dtype=bool)
+
+        for i in range(n):
+            if not a_deals[i] or a_power[i] <= 0:
+                continue
+            strikes = a_alive[:, i]
+            deathtouch = bool(a_keys[i] & DEATHTOUCH)
+            left = np.where(strikes, a_power[i], 0)
+            last = np.full(num, -1)
+            for j in range(m):
+                here = strikes & b_alive[:, j] & (block_of[:, j] == i)
+                if deathtouch:
+                    lethal = 1
+                else:
+                    lethal = np.maximum(b_tough[j] - b_damage[:, j], 0)
+                assigned = np.where(here, np.minimum(left, lethal), 0)
+                to_blockers[:, j] += assigned
+                left -= assigned
+                last = np.where(here, j, last)
+            # what is left: to the player if unblocked or trampling, else
+            # to the last blocker; nothing if every blocker is gone
+            to_player = strikes & (~blocked[:, i] | bool(a_keys[i] & TRAMPLE))
+            to_last = strikes & ~to_player & (last >= 0)
+            if to_last.any():
+                to_blockers[rows[to_last], last[to_last]] += left[to_last]
+            player_damage += np.where(to_player, left, 0)
+            dealt = np.where(strikes, a_power[i], 0) - np.where(strikes & ~to_player & (last < 0), left, 0)
+            if a_keys[i] & LIFELINK:
+                attacker_gain += dealt
+            if deathtouch:
+                b_deathtouched |= (to_blockers > 0) & (block_of == i)
+
+        for j in range(m):
+            if not b_deals[j] or b_power[j] <= 0:
+                continue
+            strikes = b_alive[:, j] & a_alive[rows, np.maximum(block_of[:, j], 0)]
+            target = block_of[strikes, j]
+            to_attackers[rows[strikes], target] += b_power[j]
+            if b_keys[j] & LIFELINK:
+                defender_gain += np.where(strikes, b_power[j], 0)
+            if b_keys[j] & DEATHTOUCH:
+                a_deathtouched[rows[strikes], target] = True
+
+        a_damage += to_attackers
+        b_damage += to_blockers
+        a_alive &= ~((a_damage >= a_tough) | a_deathtouched)
+        b_alive &= ~((b_damage >= b_tough) | b_deathtouched)
+
+    return CombatResult(
+        attacker_damage=a_damage,
+        blocker_damage=b_damage,
+        attacker_dies=attacking & ~a_alive,
+        blocker_dies=blocking & ~b_alive,
+        player_damage=player_damage,
+        attacker_life=attacker_gain,
+        defender_life=defender_gain - player_damage)
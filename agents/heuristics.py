@@ -1,6 +1,7 @@
 from MTG import gamesteps
 
 from agents.helpers import *
+from agents.blocking import BlockPlanner, BlockSolver
 
 # ---------------------------------------------------------
 # HeuristicAgent (Stage 1: novice heuristics)
@@ -621,4 +622,27 @@ class HeuristicAgent15(HeuristicAgent):
             return "0"
 
         # ---------- 4) Default: no choice ----------
-        return ""
\ No newline at end of file
+        return ""
+
+# ---------------------------------------------------------
+# HeuristicAgent20 (Stage 2: searched blocks)
+# ---------------------------------------------------------
+
+class HeuristicAgent20(HeuristicAgent15):
+    """
+    Stage 2.0: Stage 1.5 with blocks found by search (agents/blocking.py).
+
+    - Main phase, attacks, targets: SAME as HeuristicAgent15.
+    - Blocking:
+        * solve the whole combat once (double blocks, chump blocks against
+          lethal, legal blocks only) within a time budget
+        * answer each "block X with" prompt with the blockers assigned to X
+    """
+    def __init__(self, time_budget=0.05):
+        super().__init__()
+        self.block_planner = BlockPlanner(BlockSolver(time_budget))
+
+    def select_choice(self, player, game, prompt_string):
+        if "you'd like to block" in prompt_string.lower():
+            return self.block_planner.answer(player, game)
+        return super().select_choice(player, game, prompt_string)
@@ -0,0 +1,311 @@
+"""
+Look ahead with the real engine before deciding.
+
+    agent = SearchAgent(time_budget=0.2)        # seconds per decision, hard
+    p.agent = agent
+    ...
+    latency_percentiles(agent.latencies)        # {'p50': ..., 'p95': ..., 'p99': ...}
+
+At each decision worth searching (a main-phase action, attackers, a target)
+the agent lists the well-formed answers (vecgame.answers), its own
+heuristic answer first. For each one it forks the game (Game.fork: a copy
+re-run from the seed and the decisions so far), gives that answer in the
+fork, then plays on with HeuristicAgent20 for both sides for up to `depth`
+decisions and scores the position it reaches (evaluate). The best-scoring
+answer is given in the real game.
+
+Results go to a bounded LRU transposition table keyed by game.state_hash
+(MTG.zobrist): the position before deciding plus the answer, and the
+position right after it. A position that comes back (e.g. the same priority
+window next turn) costs nothing, and neither does a second answer that
+leads where an earlier one did.
+
+The time budget is hard, give or take the one engine step that is running
+when it ends (a few milliseconds). The heuristic answer's block search
+gets half of it. A fork re-runs the whole game so far, so its cost is kept
+per decision replayed: one is only started if it, the candidate's step and
+a shutdown are expected to fit in the time left, and one still re-running
+when only a step and a shutdown are left is aborted (Game.fork's deadline;
+its setup, about FORK_SETUP decisions' worth, can't be). Rollout steps,
+shutdowns and aborts are timed as they run and reserved the same way. The
+best answer so far is used -- the heuristic one if nothing else was scored.
+Every decision's latency is kept in agent.latencies.
+"""
+import io
+import re
+import time
+import contextlib
+from collections import OrderedDict
+
+import numpy as np
+
+from MTG import vecgame
+from MTG import gamesteps
+from MTG.exceptions import GameAbortedException
+from MTG.stepper import DecisionRequest, answer_with
+from agents.helpers import *
+from agents.heuristics import HeuristicAgent20
+
+
+WIN = 1000.0
+
+SEARCHED_KINDS = ('action', 'attack', 'target')
+
+# setting up a fork (a new Game, its decks, the opening draws) costs about
+# as much as re-running this many decisions
+FORK_SETUP = 20
+
+
+class TranspositionTable:
+    """ a bounded map key -> value that forgets the least recently used """
+
+    def __init__(self, size=4096):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _score(player):
+    return (player.life
+            + sum(c.power + c.toughness for c in player.creatures)
+            + 0.5 * len(player.lands) + 0.5 * len(player.hand))
+
+
+def evaluate(players, seat):
+    """ how good the position is for seat (players: seat -> Player) """
+    me = players[seat]
+    others = [p for s, p in players.items() if s != seat]
+    if me.lost:
+        return -WIN
+    alive = [p for p in others if not p.lost]
+    if not alive:
+        return WIN
+    return _score(me) - max(_score(p) for p in alive)
+
+
+def latency_percentiles(latencies, percentiles=(50, 95, 99)):
+    """ {'p50': seconds, ...} over a list of decision latencies """
+    if not latencies:
+        return {}
+    return {f"p{q}": float(np.percentile(latencies, q)) for q in percentiles}
+
+
+def _prompt_key(prompt):
+    # prompts name objects by id() and timestamp, which differ between forks
+    return re.sub(r'[\d.]+', '#', prompt) if prompt else None
+
+
+class SearchAgent(HeuristicAgent20):
+    """
+    Stage 3.0: HeuristicAgent20, checked by search.
+
+    - Main phase actions, attackers and targets: try each well-formed
+      answer in a fork of the game, play on with HeuristicAgent20, keep the
+      best (see module docstring).
+    - Blocks and other prompts: SAME as HeuristicAgent20.
+    """
+    def __init__(self, time_budget=0.2, depth=12, max_candidates=8,
+                 table_size=4096, rollout_block_budget=0.005):
+        super().__init__(min(0.05, time_budget / 2))
+        self.time_budget = time_budget
+        self.depth = depth
+        self.max_candidates = max_candidates
+        self.rollout_block_budget = rollout_block_budget
+        self.table = TranspositionTable(table_size)
+        self.latencies = []
+        self.searches = 0
+        # what a fork (per decision it replays, see _fork_cost), a rollout
+        # step, closing a fork and aborting one cost, in seconds: the largest
+        # seen lately, so that work is only started if it fits
+        self._fork_rate = 0.001
+        self._step_cost = 0.002
+        self._close_cost = 0.002
+        self._abort_cost = 0.002
+
+    # ---------- the agent protocol ----------
+
+    def select_action(self, player, game):
+        start = time.perf_counter()
+        try:
+            return self._decide(DecisionRequest(game, player, 'action', None), start)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    def select_choice(self, player, game, prompt_string):
+        start = time.perf_counter()
+        try:
+            return self._decide(DecisionRequest(game, player, 'choice', prompt_string), start)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    # ---------- deciding ----------
+
+    def _heuristic(self, request):
+        """ HeuristicAgent20's answer, with its side effects held back:
+        (answer, mana it put in the pool, spell role it noted) """
+        player = request.player
+        stats, self.stats = self.stats, None
+        snapshot = player.mana.snapshot()
+        try:
+            if request.kind == 'action':
+                answer = super().select_action(player, request.game)
+            else:
+                answer = super().select_choice(player, request.game, request.prompt)
+        finally:
+            self.stats = stats
+        mana = player.mana.changes_since(snapshot)
+        player.mana.apply_changes([(m, -delta) for m, delta in mana])
+        return answer, mana, self._pending_spell_role
+
+    def _decide(self, request, start):
+        player, game = request.player, request.game
+        kind = vecgame.request_kind(request)
+        default, mana, role = self._heuristic(request)
+
+        answer = default
+        if kind in SEARCHED_KINDS:
+            candidates = [default] + [a for a in vecgame.answers(request, kind)
+                                      if a is not None and a != default]
+            if len(candidates) > 1:
+                answer = self._search(request, kind, candidates[:self.max_candidates],
+                                      start + self.time_budget)
+
+        if request.kind == 'action':
+            self._count(player, game, answer)
+        if answer == default:
+            player.mana.apply_changes(mana)
+            self._pending_spell_role = role
+        elif kind == 'action' and answer.startswith('p '):
+            card = player.hand[int(answer.split()[1])]
+            if not card.is_land:
+                self._ensure_mana_for(player, card)
+            self._pending_spell_role = classify_spell_role(card)
+        return answer
+
+    def _search(self, request, kind, candidates, deadline):
+        """ the best-scoring candidate found before deadline (candidates[0]
+        if none was scored) """
+        game, seat = request.game, request.player.seat
+        root = (game.state_hash, seat, kind, _prompt_key(request.prompt))
+        self.searches += 1
+
+        best, best_value = candidates[0], None
+        with contextlib.redirect_stdout(io.StringIO()), \
+                contextlib.redirect_stderr(io.StringIO()):
+            for candidate in candidates:
+                value = self.table.get(root + (candidate,))
+                if value is None:
+                    if deadline - time.perf_counter() < self._fork_cost(game):
+                        break
+                    try:
+                        value = self._rollout(request, kind, candidate, deadline)
+                    except Exception:
+                        # a fork that fails (e.g. ReplayDivergedException)
+                        # only ends the search, never the real game
+                        value = None
+                    if value is None:
+                        break
+                    self.table.put(root + (candidate,), value)
+                if best_value is None or value > best_value:
+                    best, best_value = candidate, value
+        return best
+
+    def _rollout(self, request, kind, candidate, deadline):
+        """ the value for request.player of answering candidate, from a fork;
+        None if the fork isn't at the same decision """
+        seat = request.player.seat
+        forked_at = time.perf_counter()
+        # a fork still re-running then is aborted (GameAbortedException)
+        fork_deadline = deadline - max(self._step_cost + self._close_cost, self._abort_cost)
+        stepper = request.game.fork(fork_deadline)
+        try:
+            try:
+                r = stepper.start()
+            except GameAbortedException:
+                self._abort_cost = max(0.95 * self._abort_cost,
+                                       time.perf_counter() - fork_deadline)
+                raise
+            self._fork_rate = max(0.9 * self._fork_rate, (time.perf_counter() - forked_at)
+                                  / (len(request.game.decisions) + FORK_SETUP))
+            if r is None or r.player.seat != seat or r.kind != request.kind:
+                return None
+            if time.perf_counter() + self._step_cost + self._close_cost > deadline:
+                return None  # the fork ran long: no time to use it
+            copy = r.game
+            players = {p.seat: p for p in copy.players_list}
+            rollout = {s: HeuristicAgent20(self.rollout_block_budget) for s in players}
+
+            if kind == 'action' and candidate.startswith('p '):
+                card = r.player.hand[int(candidate.split()[1])]
+                if not card.is_land:
+                    self._ensure_mana_for(r.player, card)
+                rollout[seat]._pending_spell_role = classify_spell_role(card)
+            r = stepper.send(candidate)
+
+            after = None
+            if r is not None:
+                after = (copy.state_hash, seat, self.depth)
+                value = self.table.get(after)
+                if value is not None:
+                    return value
+
+            steps = 0
+            while (r is not None and steps < self.depth
+                   and time.perf_counter() + self._step_cost + self._close_cost < deadline):
+                stepped_at = time.perf_counter()
+                r = stepper.send(answer_with(rollout[r.player.seat], r))
+                self._step_cost = max(0.95 * self._step_cost, time.perf_counter() - stepped_at)
+                steps += 1
+
+            value = evaluate(players, seat)
+            if after is not None and steps == self.depth:
+                self.table.put(after, value)
+            return value
+        finally:
+            closed_at = time.perf_counter()
+            stepper.close()
+            self._close_cost = max(0.95 * self._close_cost, time.perf_counter() - closed_at)
+
+    def _fork_cost(self, game):
+        """ the time to set aside for one more fork of game: the fork, the
+        candidate's step and the shutdown """
+        return (self._fork_rate * (len(game.decisions) + FORK_SETUP)
+                + self._step_cost + self._close_cost)
+
+    def _count(self, player, game, answer):
+        """ the main-phase stats HeuristicAgent keeps, for the answer given """
+        s = self.stats
+        if (s is None or player is not game.current_player or not player.hand
+                or game.step.phase not in (gamesteps.Phase.PRECOMBAT_MAIN,
+                                           gamesteps.Phase.POSTCOMBAT_MAIN)):
+            return
+        s["main_phase_actions"] += 1
+        if not answer:
+            s["main_phase_passes"] += 1
+        elif answer.startswith('p '):
+            card = player.hand[int(answer.split()[1])]
+            if card.is_land:
+                s["land_plays"] += 1
+            else:
+                if card.is_creature:
+                    s["creature_casts"] += 1
+                s["approx_mana_spent"] += approx_cmc(card)
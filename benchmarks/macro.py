@@ -0,0 +1,177 @@
+"""
+Macro benchmark: whole research games per second, per agent matchup.
+
+    python -m benchmarks.macro                        # 20 games per matchup, 1 and cpu_count workers
+    python -m benchmarks.macro --games 50 --workers 1,2,4 --json macro.json
+
+Every pairing of RandomAgent, HeuristicAgent and HeuristicAgent15 (mirrors
+included) plays fixed-seed games through research_main.run_one_game. Game i
+of a matchup uses seed --seed + i for both the engine and the agents'
+`random`. It also cycles through every pairing of the research_decks
+mono-color decks, so every run plays the same games.
+
+For each matchup and worker count the benchmark reports:
+- games/sec and decisions/sec (wall clock, warm worker pool)
+- p50/p99 latency of a single agent decision (select_action/select_choice)
+- peak RSS of the largest worker
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import contextlib
+import itertools
+import multiprocessing
+from time import perf_counter_ns
+
+import numpy as np
+
+from MTG import cards
+from agents.randoms import RandomAgent
+from agents.heuristics import HeuristicAgent, HeuristicAgent15
+from research_decks import DECK_BUILDERS
+import research_main
+
+
+AGENTS = [RandomAgent, HeuristicAgent, HeuristicAgent15]
+MATCHUPS = list(itertools.combinations_with_replacement(AGENTS, 2))
+DECK_PAIRS = list(itertools.combinations(sorted(DECK_BUILDERS), 2))
+
+
+class TimedAgent():
+    """Wraps an agent and records how long each decision takes (ns)."""
+
+    def __init__(self, agent, latencies):
+        self.agent = agent
+        self.latencies = latencies
+
+    @property
+    def stats(self):
+        return self.agent.stats
+
+    @stats.setter
+    def stats(self, value):
+        self.agent.stats = value
+
+    def select_action(self, player, game):
+        start = perf_counter_ns()
+        answer = self.agent.select_action(player, game)
+        self.latencies.append(perf_counter_ns() - start)
+        return answer
+
+    def select_choice(self, player, game, prompt_string):
+        start = perf_counter_ns()
+        answer = self.agent.select_choice(player, game, prompt_string)
+        self.latencies.append(perf_counter_ns() - start)
+        return answer
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux (bytes on macOS)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _init_worker():
+    cards.setup_cards()
+
+
+def play_game(spec):
+    """ spec: (matchup index, game index, seed); returns per-game measurements """
+    matchup, i, seed = spec
+    agent0_cls, agent1_cls = MATCHUPS[matchup]
+    deck0, deck1 = DECK_PAIRS[i % len(DECK_PAIRS)]
+    latencies = []
+
+    random.seed(seed)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = perf_counter_ns()
+        research_main.run_one_game(
+            i,
+            TimedAgent(agent0_cls(), latencies),
+            TimedAgent(agent1_cls(), latencies),
+            deck0_builder=DECK_BUILDERS[deck0],
+            deck1_builder=DECK_BUILDERS[deck1],
+            seed=seed)
+        elapsed = perf_counter_ns() - start
+
+    return matchup, elapsed, latencies, peak_rss_mb()
+
+
+def run_matchup(pool, matchup, games, seed):
+    specs = [(matchup, i, seed + i) for i in range(games)]
+    start = time.perf_counter()
+    results = list(pool.imap_unordered(play_game, specs))
+    wall = time.perf_counter() - start
+
+    latencies = np.concatenate([np.asarray(r[2], dtype=np.int64) for r in results])
+    decisions = len(latencies)
+    a0, a1 = MATCHUPS[matchup]
+    return {
+        'matchup': '%s vs %s' % (a0.__name__, a1.__name__),
+        'games': games,
+        'wall_s': wall,
+        'games_per_sec': games / wall,
+        'decisions': decisions,
+        'decisions_per_sec': decisions / wall,
+        'decision_p50_us': float(np.percentile(latencies, 50)) / 1e3 if decisions else 0.0,
+        'decision_p99_us': float(np.percentile(latencies, 99)) / 1e3 if decisions else 0.0,
+        'game_mean_ms': float(np.mean([r[1] for r in results])) / 1e6,
+        'peak_rss_mb': max(r[3] for r in results),
+    }
+
+
+def run(games=20, workers=(1,), seed=0, matchups=None):
+    matchups = range(len(MATCHUPS)) if matchups is None else matchups
+    rows = []
+    for w in workers:
+        with multiprocessing.Pool(w, initializer=_init_worker) as pool:
+            pool.map(play_game, [(0, 0, seed)] * w)  # warm every worker up
+            for m in matchups:
+                row = run_matchup(pool, m, games, seed)
+                row['workers'] = w
+                rows.append(row)
+                print(format_row(row), flush=True)
+    return rows
+
+
+HEADER = '%-36s %3s %6s %9s %12s %9s %9s %8s' % (
+    'matchup', 'w', 'games', 'games/s', 'decisions/s', 'p50 us', 'p99 us', 'RSS MB')
+
+
+def format_row(row):
+    return '%-36s %3d %6d %9.2f %12.0f %9.1f %9.1f %8.1f' % (
+        row['matchup'], row['workers'], row['games'], row['games_per_sec'],
+        row['decisions_per_sec'], row['decision_p50_us'], row['decision_p99_us'],
+        row['peak_rss_mb'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=20, help='games per matchup')
+    parser.add_argument('--workers', default='1,%d' % os.cpu_count(),
+                        help='comma separated worker counts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the rows to this file')
+    args = parser.parse_args()
+
+    workers = sorted(set(int(w) for w in args.workers.split(',')))
+    print(HEADER)
+    rows = run(args.games, workers, args.seed)
+
+    for w in workers:
+        mine = [r for r in rows if r['workers'] == w]
+        games = sum(r['games'] for r in mine)
+        wall = sum(r['wall_s'] for r in mine)
+        print('total (%d workers): %d games in %.1fs = %.2f games/s'
+              % (w, games, wall, games / wall))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {'games_per_matchup': args.games, 'seed': args.seed,
+                                'cpu_count': os.cpu_count()},
+                       'rows': rows}, f, indent=2)
@@ -0,0 +1,454 @@
+"""
+Micro-benchmarks for the engine primitives that game simulation hits most.
+
+    python -m benchmarks.micro                      # run all, compare to baseline
+    python -m benchmarks.micro --filter zone        # only names containing 'zone'
+    python -m benchmarks.micro --json out.json      # also write results
+    python -m benchmarks.micro --save-baseline --runs 3   # overwrite benchmarks/baseline_micro.json
+
+Each scenario is built once (a fresh two-player game from data/decks/deck1.txt).
+It is then warmed up for --warmup seconds. The loop count is calibrated so
+one repeat takes about --repeat-time seconds, and the best ops/sec over
+--repeats repeats is reported (gc disabled, as in timeit; the median is
+kept alongside). Engine narration goes to os.devnull while measuring.
+
+Ratios against the baseline are machine-dependent. Compare runs made on the
+same machine, and re-save the baseline when you move machines.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import contextlib
+import subprocess
+
+from MTG import game
+from MTG import cards
+from MTG import combat
+from MTG import zone
+from MTG import triggers
+from MTG import gamesteps
+from MTG import utils
+from MTG import featurizer
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline_micro.json')
+
+# name -> setup(); setup builds the scenario and returns the operation to time
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def new_game():
+    decks = [cards.read_deck('data/decks/deck1.txt'),
+             cards.read_deck('data/decks/deck1.txt')]
+    g = game.Game(decks, seed=0)
+    g.setup_game()
+    for p in g.players_list:
+        p.autoPayMana = True
+        p.autoOrderTriggers = True
+    g.step = gamesteps.Step.PRECOMBAT_MAIN  # effects/timestamps need a current step
+    return g
+
+
+def sixty_cards():
+    return (cards.read_deck('data/decks/deck1.txt')
+            + cards.read_deck('data/decks/deck1.txt'))
+
+
+def fill_battlefield(player, names, n):
+    for i in range(n):
+        player.battlefield.add(names[i % len(names)])
+    return player.battlefield[-n:]
+
+
+# -----------------------------------------------------------
+# Scenarios
+# -----------------------------------------------------------
+
+@benchmark('mana.canPay.mixed')
+def bench_can_pay():
+    g = new_game()
+    pool = g.players_list[0].mana
+    pool.add_str('WWWUUUGGRR11')
+    costs = ['W', '1W', 'WW', '2WU', '4', 'UUGG', '(2/W)U', '(W/U)(W/U)', '7', 'BB']
+
+    def op():
+        for c in costs:
+            pool.canPay(c)
+    return op, len(costs)
+
+
+@benchmark('zone.add_remove.60')
+def bench_zone_add_remove():
+    g = new_game()
+    player = g.players_list[0]
+    z = zone.Graveyard(player)
+    z.add(sixty_cards())
+    card = z[30]
+
+    def op():
+        z.remove(card)
+        z.add(card)
+    return op, 1
+
+
+@benchmark('zone.filter.60')
+def bench_zone_filter():
+    g = new_game()
+    player = g.players_list[0]
+    z = zone.Graveyard(player)
+    z.add(sixty_cards())
+
+    def op():
+        z.filter(filter_func=lambda c: c.is_creature)
+    return op, 1
+
+
+@benchmark('zone.lookup.60')
+def bench_zone_lookup():
+    g = new_game()
+    player = g.players_list[0]
+    z = zone.Graveyard(player)
+    z.add(sixty_cards())
+    card = z[45]
+
+    def op():
+        card in z
+        z.get_card_by_name(card.name)
+    return op, 2
+
+
+@benchmark('game.sba.40_permanents')
+def bench_sba():
+    g = new_game()
+    p0, p1 = g.players_list
+    for p in (p0, p1):
+        fill_battlefield(p, ['Plains'], 10)
+        fill_battlefield(p, ['Soulmender', "Ajani's Pridemate", 'Sungrace Pegasus'], 10)
+
+    def op():
+        g.apply_state_based_actions()
+    return op, 1
+
+
+@benchmark('game.sba.anthems_and_eot_effects')
+def bench_sba_effects():
+    g = new_game()
+    p0, p1 = g.players_list
+    for p in (p0, p1):
+        fill_battlefield(p, ['Paragon of New Dawns'], 3)
+        for creature in fill_battlefield(p, ['Soulmender', "Ajani's Pridemate"], 12):
+            for i in range(3):
+                creature.add_effect('modifyPT', (1, 0), expiration=g.eot_time)
+
+    def op():
+        g.apply_state_based_actions()
+    return op, 1
+
+
+@benchmark('game.has_valid_target.40_permanents')
+def bench_has_valid_target():
+    g = new_game()
+    p0, p1 = g.players_list
+    for p in (p0, p1):
+        fill_battlefield(p, ['Plains'], 10)
+        fill_battlefield(p, ['Soulmender', "Ajani's Pridemate", 'Sungrace Pegasus'], 10)
+    source = p0.hand[0]
+    source.target_criterias = utils.parse_targets(['opponent creature'])
+
+    def op():
+        g.board_revision += 1  # as if something moved; no cached target sets
+        source.has_valid_target()
+    return op, 1
+
+
+@benchmark('combat.declare_blockers.10x10')
+def bench_declare_blockers():
+    g = new_game()
+    p0, p1 = g.players_list
+    attackers = fill_battlefield(p0, ['Soulmender', 'Sungrace Pegasus', 'Runeclaw Bear'], 10)
+    blockers = fill_battlefield(p1, ['Netcaster Spider'], 10)  # reach: every block is legal
+    for a in attackers:
+        a.status.is_attacking = p1
+    for a, b in zip(attackers, blockers):
+        b.status.is_blocking.append(a)
+
+    def op():
+        g.board_revision += 1  # a new declare-blockers step:
+        g.block_matrix.of(p1).rows  # who can block whom (as an agent reads it)
+        combat.check_valid_block(p0, p1)
+    return op, 1
+
+
+@benchmark('player.trigger.fanout_20')
+def bench_trigger_fanout():
+    g = new_game()
+    player = g.players_list[0]
+    fill_battlefield(player, ["Ajani's Pridemate"], 20)
+    condition = triggers.triggerConditions.onControllerLifeGain
+
+    def op():
+        player.trigger(condition, player, 1)
+        player.pending_triggers = []
+    return op, 1
+
+
+@benchmark('permanent.power.10_effects')
+def bench_power():
+    g = new_game()
+    creature = fill_battlefield(g.players_list[0], ["Ajani's Pridemate"], 1)[0]
+    for i in range(10):
+        creature.add_effect('modifyPT', (1, 1), expiration=g.eot_time)
+
+    def op():
+        creature.power
+    return op, 1
+
+
+@benchmark('game.etb_and_sba.6_anthems_20_creatures')
+def bench_anthems():
+    g = new_game()
+    player = g.players_list[0]
+    fill_battlefield(player, ['Paragon of New Dawns'], 6)
+    fill_battlefield(player, ['Soulmender'], 20)
+
+    def op():
+        # a creature enters, SBAs look at every toughness, it leaves again
+        player.battlefield.add('Soulmender')
+        g.apply_state_based_actions()
+        player.battlefield.pop()
+    return op, 1
+
+
+@benchmark('library.shuffle.60')
+def bench_library_shuffle():
+    g = new_game()
+    library = zone.Library(g.players_list[0], sixty_cards())
+
+    def op():
+        library.shuffle()
+        library[-1]  # shuffling is lazy; looking at the top performs it
+    return op, 1
+
+
+@benchmark('library.add_pop')
+def bench_library_add_pop():
+    g = new_game()
+    library = zone.Library(g.players_list[0], sixty_cards())
+
+    def op():
+        library.add(library.pop(), from_top=0, shuffle=False)
+        library.add(library.pop(), from_top=-1, shuffle=False)
+        library.add(library.pop(-1), from_top=3, shuffle=False)
+    return op, 3
+
+
+@benchmark('library.tutor.60')
+def bench_library_tutor():
+    g = new_game()
+    player = g.players_list[0]
+    library = zone.Library(player, sixty_cards())
+    hand = player.hand
+
+    def op():
+        # search for a creature, take it, shuffle; then put it back
+        card = next(iter(library.filter(filter_func=lambda c: c.is_creature)))
+        card.change_zone(hand)
+        library.shuffle()
+        card.change_zone(library)
+    return op, 1
+
+
+@benchmark('featurizer.vector.40_permanents')
+def bench_featurizer_vector():
+    g = new_game()
+    p0, p1 = g.players_list
+    for p in (p0, p1):
+        fill_battlefield(p, ['Plains'], 10)
+        fill_battlefield(p, ['Soulmender', "Ajani's Pridemate", 'Sungrace Pegasus'], 10)
+    f = featurizer.Featurizer(g)
+    creature = p0.battlefield[-1]
+
+    def op():
+        # one permanent changes between reads, as between two decisions
+        if not creature.tap():
+            creature.status.tapped = False
+        f.vector(0)
+    return op, 1
+
+
+@benchmark('game.state_hash.40_permanents')
+def bench_state_hash():
+    g = new_game()
+    p0, p1 = g.players_list
+    for p in (p0, p1):
+        fill_battlefield(p, ['Plains'], 10)
+        fill_battlefield(p, ['Soulmender', "Ajani's Pridemate", 'Sungrace Pegasus'], 10)
+    g.state_hash
+    creature = p0.battlefield[-1]
+
+    def op():
+        # one permanent changes between reads, as between two decisions
+        if not creature.tap():
+            creature.status.tapped = False
+        g.state_hash
+    return op, 1
+
+
+# -----------------------------------------------------------
+# Runner
+# -----------------------------------------------------------
+
+def _run_loop(op, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        op()
+    return time.perf_counter() - start
+
+
+def measure(op, ops_per_call, warmup=0.2, repeat_time=0.2, repeats=5):
+    # warm up (caches, allocator, branch predictors), at least 100 calls
+    n = 0
+    start = time.perf_counter()
+    while n < 100 or time.perf_counter() - start < warmup:
+        op()
+        n += 1
+
+    # calibrate the loop count so one repeat takes about repeat_time
+    loops = 1
+    while True:
+        t = _run_loop(op, loops)
+        if t >= repeat_time / 10:
+            break
+        loops *= 4
+    loops = max(1, int(loops * repeat_time / t))
+
+    # like timeit: gc off while timing, and the best repeat is the number
+    # least disturbed by the rest of the machine
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        rates = [loops * ops_per_call / _run_loop(op, loops) for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    median = statistics.median(rates)
+    return {'ops_per_sec': max(rates),
+            'median_ops_per_sec': median,
+            'spread': (max(rates) - min(rates)) / median,
+            'loops': loops,
+            'repeats': repeats}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=None, runs=1, **measure_kw):
+    """ run the suite `runs` times, keeping each benchmark's best run """
+    results = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(runs):
+            for name, setup in BENCHMARKS.items():
+                if names is not None and name not in names:
+                    continue
+                op, ops_per_call = setup()
+                r = measure(op, ops_per_call, **measure_kw)
+                if name not in results or r['ops_per_sec'] > results[name]['ops_per_sec']:
+                    results[name] = r
+    return {'meta': {'python': platform.python_version(),
+                     'platform': platform.platform(),
+                     'revision': git_revision(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def compare(current, baseline, threshold=0.1):
+    """ list of (name, ops/sec, baseline ops/sec, ratio, verdict) """
+    rows = []
+    for name, r in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            rows.append((name, r['ops_per_sec'], None, None, 'new'))
+            continue
+        ratio = r['ops_per_sec'] / base['ops_per_sec']
+        verdict = ('REGRESSION' if ratio < 1 - threshold
+                   else 'faster' if ratio > 1 + threshold
+                   else 'ok')
+        rows.append((name, r['ops_per_sec'], base['ops_per_sec'], ratio, verdict))
+    return rows
+
+
+def format_rows(rows):
+    lines = ['%-30s %14s %14s %8s  %s' % ('benchmark', 'ops/sec', 'baseline', 'ratio', '')]
+    for name, ops, base, ratio, verdict in rows:
+        lines.append('%-30s %14.0f %14s %8s  %s' % (
+            name, ops,
+            '%.0f' % base if base is not None else '-',
+            '%.2f' % ratio if ratio is not None else '-',
+            verdict))
+    return '\n'.join(lines)
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as regression/faster')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--warmup', type=float, default=0.2)
+    parser.add_argument('--repeat-time', type=float, default=0.2)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--runs', type=int, default=1,
+                        help='run the whole suite this many times and keep the best '
+                             '(use 3+ on a busy machine, and when saving a baseline)')
+    args = parser.parse_args()
+
+    cards.setup_cards()
+    names = [n for n in BENCHMARKS if args.filter in n]
+    current = run(names, runs=args.runs, warmup=args.warmup, repeat_time=args.repeat_time,
+                  repeats=args.repeats)
+
+    if args.json:
+        save_json(args.json, current)
+
+    baseline = load_json(args.baseline) if os.path.exists(args.baseline) else {}
+    rows = compare(current, baseline, args.threshold)
+    print(format_rows(rows))
+
+    if args.save_baseline:
+        save_json(args.baseline, current)
+        print('baseline written to', args.baseline)
+
+    if args.fail_on_regression and any(r[4] == 'REGRESSION' for r in rows):
+        sys.exit(1)
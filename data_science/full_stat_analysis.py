@@ -1,15 +1,19 @@
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 
+from data_science.results_store import ResultsStore, RESULTS_DIR
 
-def load_merged_csv():
-    merged_file = Path("/home/p89n90/mtg-python-engine/results/merged.csv")
-    if not merged_file.exists():
-        raise FileNotFoundError(f"Merged CSV not found: {merged_file}")
-    return pd.read_csv(merged_file)
+# Run from the repo root: python -m data_science.full_stat_analysis
+
+
+def load_merged_csv(store):
+    if not store.merged_path.exists() and not store.pending_files():
+        raise FileNotFoundError(f"No result CSVs found in: {store.results_dir}")
+    return store.load_merged()
 
 
 def prepare_long_player_stats(df):
@@ -21,24 +25,16 @@ def prepare_long_player_stats(df):
     p1['agent'] = df['agent1']
     long = pd.concat([p0.assign(player_idx=0), p1.assign(player_idx=1)], ignore_index=True)
     long = long.reset_index(drop=True)
-    long['game_idx'] = long.index // 2
-    long['won'] = long.apply(lambda r: 1 if int(df.loc[r['game_idx'], 'winner']) == r['player_idx'] else 0, axis=1)
+    # rows are all p0 rows followed by all p1 rows
+    winner = pd.to_numeric(df['winner'], errors='coerce').fillna(-1).to_numpy()
+    long['game_idx'] = np.tile(np.arange(len(df)), 2)
+    long['won'] = (np.tile(winner, 2) == long['player_idx'].to_numpy()).astype(int)
     long['util_per_land'] = long['approx_mana_spent'] / (long.get('land_plays', 0) + 1)
     return long
 
 
-def plot_win_rates(df, out_dir, tag):
-    wins, games = {}, {}
-    for _, row in df.iterrows():
-        a0 = row['agent0']
-        a1 = row['agent1']
-        games[a0] = games.get(a0, 0) + 1
-        games[a1] = games.get(a1, 0) + 1
-        winner_idx = int(row['winner'])
-        winner_agent = row['agent0'] if winner_idx == 0 else row['agent1']
-        wins[winner_agent] = wins.get(winner_agent, 0) + 1
-    stats = pd.DataFrame([{'agent': k, 'games': games[k], 'wins': wins.get(k, 0)} for k in games])
-    stats['win_rate'] = stats['wins'] / stats['games']
+def plot_win_rates(store, out_dir, tag):
+    stats = store.agent_stats().reset_index()
 
     plt.figure(figsize=(8, 4))
     sns.barplot(data=stats.sort_values('win_rate', ascending=False), x='agent', y='win_rate')
@@ -98,16 +94,17 @@ def plot_mana_waste_proxies(long_df, out_dir, tag):
 
 
 def main():
-    results_dir = Path("/home/p89n90/mtg-python-engine/results")
+    results_dir = Path(RESULTS_DIR)
     out_dir = results_dir / "figures"
     out_dir.mkdir(parents=True, exist_ok=True)
 
     tag = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    df = load_merged_csv()
-    print(f"Loaded {len(df)} games from: {results_dir}/merged.csv")
+    store = ResultsStore(results_dir)
+    df = load_merged_csv(store)
+    print(f"Loaded {len(df)} games from: {store.merged_path}")
 
-    plot_win_rates(df, out_dir, tag)
+    plot_win_rates(store, out_dir, tag)
     long = prepare_long_player_stats(df)
     plot_resource_utilization(long, out_dir, tag)
     plot_mana_waste_proxies(long, out_dir, tag)
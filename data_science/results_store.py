@@ -0,0 +1,276 @@
+"""Incremental store for the per-game CSVs written by research_main.
+
+Every research batch drops a new `<timestamp>_*.csv` into `results/`. Instead of
+re-reading all of them into one big DataFrame, the store remembers how many
+rows of each file it has already seen, reads only the new ones, appends them to
+`merged.csv` and keeps running win counts per agent, per deck and per matchup.
+Dashboards can then read the counts without touching the raw rows.
+
+A file can be read while research_main is still appending to it: a last line
+without its newline is left for the next call, and rows that are malformed or
+miss a winner / agent are skipped (but still counted as read).
+
+Run from the repo root with `python -m data_science.results_store`.
+"""
+import io
+import os
+import json
+from pathlib import Path
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+RESULTS_DIR = Path(__file__).resolve().parent.parent / "results"
+MERGED_FILE = "merged.csv"
+STATE_FILE = ".results_store.json"
+SOURCE_COLUMN = "__source_file"
+
+# matchup keys are stored as "agentA|agentB" (sorted) in the state file
+MATCHUP_SEP = "|"
+
+
+def add_derived_columns(df):
+    """Add winner_agent, winner_deck and the (sorted) matchup columns.
+
+    Everything is computed column-wise; draws (winner == -1) get no winner.
+    """
+    winner = pd.to_numeric(df["winner"], errors="coerce").fillna(-1).astype(int).to_numpy()
+    agent0 = df["agent0"].astype(str).to_numpy()
+    agent1 = df["agent1"].astype(str).to_numpy()
+
+    df["winner_agent"] = np.select([winner == 0, winner == 1], [agent0, agent1], default=None)
+    if "deck0_name" in df.columns and "deck1_name" in df.columns:
+        deck0 = df["deck0_name"].astype(str).to_numpy()
+        deck1 = df["deck1_name"].astype(str).to_numpy()
+        df["winner_deck"] = np.select([winner == 0, winner == 1], [deck0, deck1], default=None)
+
+    swap = agent0 > agent1
+    df["matchup_a"] = np.where(swap, agent1, agent0)
+    df["matchup_b"] = np.where(swap, agent0, agent1)
+    df["matchup"] = df["matchup_a"] + " vs " + df["matchup_b"]
+    # which side of the sorted matchup won: 0 -> matchup_a, 1 -> matchup_b, -1 -> draw
+    df["matchup_winner"] = np.where(winner < 0, -1, np.where(swap, 1 - winner, winner))
+    return df
+
+
+def _count(values):
+    values = pd.Series(values).dropna()
+    return Counter(values.value_counts().to_dict())
+
+
+class ResultsStore():
+    """Running aggregates over every result CSV in `results_dir`."""
+
+    def __init__(self, results_dir=RESULTS_DIR, merged_file=MERGED_FILE):
+        self.results_dir = Path(results_dir)
+        self.merged_path = self.results_dir / merged_file
+        self.state_path = self.results_dir / STATE_FILE
+
+        self.rows_ingested = {}  # filename -> number of data rows already read
+        self.sizes_ingested = {}  # filename -> file size (bytes) when last read
+        self.agent_games = Counter()
+        self.agent_wins = Counter()
+        self.deck_games = Counter()
+        self.deck_wins = Counter()
+        self.matchup_games = Counter()
+        self.matchup_wins_a = Counter()
+        self.matchup_wins_b = Counter()
+
+        if self.state_path.exists():
+            self.load()
+        elif self.merged_path.exists():
+            self.bootstrap_from_merged()
+
+    # ---------- persistence ----------
+
+    def load(self):
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.rows_ingested = state["rows_ingested"]
+        self.sizes_ingested = state.get("sizes_ingested", {})
+        for name in ("agent_games", "agent_wins", "deck_games", "deck_wins",
+                     "matchup_games", "matchup_wins_a", "matchup_wins_b"):
+            setattr(self, name, Counter(state[name]))
+
+    def save(self):
+        state = {"rows_ingested": self.rows_ingested, "sizes_ingested": self.sizes_ingested}
+        for name in ("agent_games", "agent_wins", "deck_games", "deck_wins",
+                     "matchup_games", "matchup_wins_a", "matchup_wins_b"):
+            state[name] = dict(getattr(self, name))
+
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def bootstrap_from_merged(self):
+        """Adopt an existing merged.csv (built by the old full rebuild) as already ingested."""
+        df = pd.read_csv(self.merged_path)
+        if SOURCE_COLUMN in df.columns:
+            self.rows_ingested = {k: int(v) for k, v in df[SOURCE_COLUMN].value_counts().items()}
+            for filename, rows in self.rows_ingested.items():
+                path = self.results_dir / filename
+                if path.is_file():
+                    self.sizes_ingested[filename] = self._size_of_rows(path, rows)
+        self._update_counts(df)
+        self.save()
+
+    # ---------- ingestion ----------
+
+    def pending_files(self):
+        """Result CSVs that have rows we have not read yet, as (filename, rows_already_read).
+
+        A file is pending if its size changed since it was last read; one that
+        shrank has been rewritten and is read again from the start.
+        """
+        pending = []
+        for entry in sorted(os.scandir(self.results_dir), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.endswith(".csv"):
+                continue
+            if entry.name == self.merged_path.name:
+                continue
+            size = entry.stat().st_size
+            recorded = self.sizes_ingested.get(entry.name)
+            if size == recorded:
+                continue
+            skip = self.rows_ingested.get(entry.name, 0)
+            if recorded is not None and size < recorded:
+                skip = 0
+            pending.append((entry.name, skip))
+        return pending
+
+    @staticmethod
+    def _size_of_rows(path, rows):
+        """Size in bytes of the header and the first `rows` data rows of a file."""
+        lines = path.read_bytes().split(b"\n")[:-1]
+        return sum(len(line) + 1 for line in lines[:1 + rows])
+
+    def _read_new_rows(self, filename, skip):
+        """(new rows or None, data rows read, file size) for the complete rows after the first skip."""
+        data = (self.results_dir / filename).read_bytes()
+        # the last piece has no newline yet: empty, or a row still being written
+        lines = data.split(b"\n")[:-1]
+        if not lines:
+            return None, 0, len(data)
+        header, rows = lines[0], lines[1 + skip:]
+        if not rows:
+            return None, 0, len(data)
+
+        df = pd.read_csv(io.BytesIO(b"\n".join([header] + rows)), on_bad_lines="skip",
+                         skip_blank_lines=False)
+        df = df.dropna(subset=["winner", "agent0", "agent1"])
+        if df.empty:
+            return None, len(rows), len(data)
+        df[SOURCE_COLUMN] = filename
+        return df, len(rows), len(data)
+
+    def ingest(self, verbose=True):
+        """Read rows added since the last call; returns the new rows (or None)."""
+        new_frames = []
+        pending = self.pending_files()
+        for filename, skip in pending:
+            try:
+                df, read, size = self._read_new_rows(filename, skip)
+            except Exception as e:
+                print(f"Error reading file {filename}: {e}")
+                continue
+            self.rows_ingested[filename] = skip + read
+            self.sizes_ingested[filename] = size
+            if df is None:
+                continue
+            new_frames.append(df)
+            if verbose:
+                print(f"Ingested {len(df)} new rows from {filename}")
+
+        if not new_frames:
+            if pending:
+                self.save()
+            if verbose:
+                print("No new result rows.")
+            return None
+
+        new_rows = pd.concat(new_frames, ignore_index=True, sort=True)
+        add_derived_columns(new_rows)
+        self._update_counts(new_rows)
+        self._append_merged(new_rows)
+        self.save()
+        return new_rows
+
+    def _append_merged(self, new_rows):
+        raw = new_rows.drop(columns=["winner_agent", "winner_deck", "matchup", "matchup_a",
+                                     "matchup_b", "matchup_winner"], errors="ignore")
+        if self.merged_path.exists():
+            # keep merged.csv's column order; new columns are appended at the end
+            columns = list(pd.read_csv(self.merged_path, nrows=0).columns)
+            extra = [c for c in raw.columns if c not in columns]
+            if extra:
+                merged = pd.read_csv(self.merged_path)
+                pd.concat([merged, raw], ignore_index=True, sort=False).to_csv(
+                    self.merged_path, index=False)
+                return
+            raw.reindex(columns=columns).to_csv(self.merged_path, mode="a", header=False, index=False)
+        else:
+            raw.sort_index(axis=1).to_csv(self.merged_path, index=False)
+
+    def _update_counts(self, df):
+        if "winner_agent" not in df.columns:
+            df = add_derived_columns(df.dropna(subset=["winner", "agent0", "agent1"]).copy())
+
+        self.agent_games += _count(np.concatenate([df["agent0"].to_numpy(), df["agent1"].to_numpy()]))
+        self.agent_wins += _count(df["winner_agent"])
+
+        if "winner_deck" in df.columns:
+            self.deck_games += _count(np.concatenate([df["deck0_name"].to_numpy(),
+                                                      df["deck1_name"].to_numpy()]))
+            self.deck_wins += _count(df["winner_deck"])
+
+        key = df["matchup_a"] + MATCHUP_SEP + df["matchup_b"]
+        self.matchup_games += _count(key)
+        self.matchup_wins_a += _count(key[df["matchup_winner"] == 0])
+        self.matchup_wins_b += _count(key[df["matchup_winner"] == 1])
+
+    # ---------- dashboards ----------
+
+    @staticmethod
+    def _rate_table(games, wins, index_name):
+        stats = pd.DataFrame({"games": pd.Series(games, dtype="int64"),
+                              "wins": pd.Series(wins, dtype="int64")}).fillna(0)
+        stats["wins"] = stats["wins"].astype(int)
+        stats["win_rate"] = stats["wins"] / stats["games"]
+        stats.index.name = index_name
+        return stats.sort_values("win_rate", ascending=False)
+
+    def agent_stats(self):
+        return self._rate_table(self.agent_games, self.agent_wins, "agent")
+
+    def deck_stats(self):
+        return self._rate_table(self.deck_games, self.deck_wins, "deck")
+
+    def matchup_stats(self):
+        """One row per (agent_a, agent_b) pair, agent_a <= agent_b alphabetically."""
+        keys = sorted(self.matchup_games)
+        pairs = [k.split(MATCHUP_SEP, 1) for k in keys]
+        stats = pd.DataFrame({
+            "agent_a": [a for a, b in pairs],
+            "agent_b": [b for a, b in pairs],
+            "games": [self.matchup_games[k] for k in keys],
+            "wins_a": [self.matchup_wins_a.get(k, 0) for k in keys],
+            "wins_b": [self.matchup_wins_b.get(k, 0) for k in keys],
+        })
+        stats["win_rate_a"] = stats["wins_a"] / stats["games"]
+        stats["win_rate_b"] = stats["wins_b"] / stats["games"]
+        return stats.set_index(["agent_a", "agent_b"])
+
+    def load_merged(self):
+        """All ingested rows (with derived columns) for analyses that need per-game data."""
+        self.ingest(verbose=False)
+        return add_derived_columns(pd.read_csv(self.merged_path))
+
+
+if __name__ == "__main__":
+    store = ResultsStore()
+    store.ingest()
+    print(store.agent_stats())
+    print(store.matchup_stats())
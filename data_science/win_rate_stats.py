@@ -0,0 +1,75 @@
+"""Confidence intervals for win rates.
+
+All functions take array-likes of win counts and game counts (one entry per
+agent / deck / matchup cell) and work on the whole array at once.
+"""
+import numpy as np
+import pandas as pd
+
+
+Z_95 = 1.959963984540054
+
+
+def wilson_interval(wins, games, z=Z_95):
+    """Wilson score interval; returns (low, high) arrays. Cells with 0 games get (0, 1)."""
+    wins = np.asarray(wins, dtype=float)
+    games = np.asarray(games, dtype=float)
+
+    safe_games = np.where(games > 0, games, 1.0)
+    p = np.clip(wins / safe_games, 0.0, 1.0)
+    z2 = z * z
+    denom = 1.0 + z2 / safe_games
+    center = (p + z2 / (2 * safe_games)) / denom
+    margin = z * np.sqrt(p * (1 - p) / safe_games + z2 / (4 * safe_games ** 2)) / denom
+
+    low = np.where(games > 0, np.clip(center - margin, 0.0, 1.0), 0.0)
+    high = np.where(games > 0, np.clip(center + margin, 0.0, 1.0), 1.0)
+    return low, high
+
+
+def bayes_interval(wins, games, level=0.95, prior=(1.0, 1.0), samples=4000, seed=0):
+    """Equal-tailed credible interval of the Beta(prior + wins, prior + losses) posterior.
+
+    Quantiles are estimated from `samples` posterior draws per cell (fixed seed, so
+    the result is reproducible); this avoids a scipy dependency.
+    """
+    wins = np.asarray(wins, dtype=float)
+    games = np.asarray(games, dtype=float)
+    a = prior[0] + wins
+    b = prior[1] + games - wins
+
+    rng = np.random.default_rng(seed)
+    draws = rng.beta(a[..., None], b[..., None], size=a.shape + (samples,))
+    tail = (1.0 - level) / 2
+    low, high = np.quantile(draws, [tail, 1.0 - tail], axis=-1)
+    return low, high
+
+
+def interval(wins, games, method="wilson", **kwargs):
+    if method == "wilson":
+        return wilson_interval(wins, games, **kwargs)
+    if method == "bayes":
+        return bayes_interval(wins, games, **kwargs)
+    raise ValueError(f"unknown interval method: {method}")
+
+
+def add_intervals(stats, wins_col="wins", games_col="games", prefix="", method="wilson"):
+    """Add <prefix>ci_low / ci_high / ci_half_width columns to a stats DataFrame."""
+    low, high = interval(stats[wins_col].to_numpy(), stats[games_col].to_numpy(), method)
+    stats[prefix + "ci_low"] = low
+    stats[prefix + "ci_high"] = high
+    stats[prefix + "ci_half_width"] = (high - low) / 2
+    return stats
+
+
+def is_decided(wins, games, max_half_width=0.1, min_games=20, method="wilson"):
+    """Boolean mask: cells whose interval is already tighter than max_half_width."""
+    games = np.asarray(games)
+    low, high = interval(wins, games, method)
+    return (games >= min_games) & ((high - low) / 2 <= max_half_width)
+
+
+def win_rate_table(wins, games, index=None, method="wilson"):
+    stats = pd.DataFrame({"wins": np.asarray(wins), "games": np.asarray(games)}, index=index)
+    stats["win_rate"] = stats["wins"] / stats["games"].where(stats["games"] > 0)
+    return add_intervals(stats, method=method)
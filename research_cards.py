@@ -232,3 +232,7 @@ class SimpleCard(card_mod.Card):
 
         # Calls engine Card.__init__ with a single Characteristics object
         super(SimpleCard, self).__init__(characteristics)
+        self.spec = spec
+
+    def fresh_copy(self):
+        return SimpleCard(self.name, self.spec)
@@ -210,3 +210,13 @@ def build_mono_blue_deck():
         # *["Cancel"] * 2,
     ]
     return deck_name, _cards_from_names(names)
+
+
+# deck_name (as returned by the builders / written to result CSVs) -> builder,
+# so a logged game can be rebuilt from its deck names (see research_replay.py)
+DECK_BUILDERS = {
+    "mono_red_aggro": build_mono_red_deck,
+    "mono_green_midrange": build_mono_green_deck,
+    "mono_white_control": build_mono_white_deck,
+    "mono_blue_tempo": build_mono_blue_deck,
+}
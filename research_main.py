@@ -1,11 +1,16 @@
-from MTG import game, cards
+from MTG import game, cards, replay
 from MTG import card as card_mod
 from agents.randoms import RandomAgent
 from agents.heuristics import HeuristicAgent, HeuristicAgent15
+from agents.search import SearchAgent, latency_percentiles
 from MTG.exceptions import EmptyLibraryException
+from MTG.eventlog import EventLog
+from MTG.instrumentation import STATS
+from MTG.dataset import ShardWriter, GameRecorder
 
 from research_decks import build_mono_red_deck, build_mono_green_deck
 from research_decks import build_mono_white_deck, build_mono_blue_deck
+from data_science.win_rate_stats import interval, is_decided, win_rate_table
 
 import sys
 import inspect
@@ -35,9 +40,11 @@ def make_empty_stats():
 # -----------------------------------------------------------
 
 
-def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None):
+def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None,
+                 deck0_builder=build_mono_green_deck, deck1_builder=build_mono_red_deck,
+                 event_log=None, decision_log=None, seed=None, dataset=None):
     """
-    Run a single game between two decks.
+    Run a single game between two decks (built by deck0_builder / deck1_builder).
 
     Returns:
         stats (dict) with keys:
@@ -52,19 +59,32 @@ def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None)
 
     If test=True and debug_path is not None, all console output of this game
     will be captured and appended to the given debug file.
+
+    If event_log (an MTG.eventlog.EventLog) is given, the game's structured
+    events are appended to it under this game_id.
+
+    If decision_log (a text file) is given, the game's seed and every decision
+    are appended to it as one JSON line, so the game can be re-run exactly with
+    research_replay.py. seed fixes the game's shuffles (random if None).
+
+    If dataset (an MTG.dataset.ShardWriter) is given, every decision both
+    agents make is added to it as a training row (state, mask, action,
+    outcome) once the game is over.
     """
     
     # 1) Load and parse card definitions
     cards.setup_cards()
 
     # 2) Build decks as lists of Card objects
-    # CHANGE DECKS HERE AS NEEDED
-    deck0_name, deck0 = build_mono_green_deck()
-    deck1_name, deck1 = build_mono_red_deck()
+    # CHANGE DECKS HERE AS NEEDED (or pass other builders)
+    deck0_name, deck0 = deck0_builder()
+    deck1_name, deck1 = deck1_builder()
     decks = [deck0, deck1]
 
     # 3) Create Game with the decks
-    g = game.Game(decks=decks, test=test)
+    g = game.Game(decks=decks, test=test, seed=seed)
+    g.game_id = game_id
+    g.event_log = event_log
 
     # 4) Attach agents to the two players
     #    Depending on how Game is implemented, this is usually either
@@ -99,6 +119,10 @@ def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None)
 
     p0.agent = agent0
     p1.agent = agent1
+    if dataset is not None:
+        recorder = GameRecorder(dataset, game_id)
+        p0.agent = recorder.wrap(agent0)
+        p1.agent = recorder.wrap(agent1)
 
     # 5) Run the game; catch decking as a proper loss
     end_reason = "life"
@@ -110,10 +134,7 @@ def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None)
             try:
                 g.run_game()
             except EmptyLibraryException:
-                decking_player = g.current_player
-                print(f"{decking_player.name} tried to draw from an empty library – loses by decking.")
-                decking_player.lose()
-                decking_player.opponent.won = True
+                g.lose_by_decking()
                 end_reason = "decking"
         # write captured output to debug file
         with open(debug_path, "a", encoding="utf-8") as dbg:
@@ -126,12 +147,12 @@ def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None)
         try:
             g.run_game()
         except EmptyLibraryException:
-            decking_player = g.current_player
-            print(f"{decking_player.name} tried to draw from an empty library – loses by decking.")
-            decking_player.lose()
-            decking_player.opponent.won = True
+            g.lose_by_decking()
             end_reason = "decking"
 
+    if decision_log is not None:
+        replay.write_record(decision_log, replay.record_of(g, [deck0_name, deck1_name]))
+
     # 6) Determine winner based on the saved p0/p1 references
     # (fix: after losing via HP reduction, player be removed from g.players)
     if p0.lost and not p1.lost:
@@ -143,6 +164,9 @@ def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None)
         if end_reason == "life":
             end_reason = "other"
 
+    if dataset is not None:
+        recorder.finish(winner)
+
     # 7) Collect final state metrics for logging
     p0_creatures = len(p0.battlefield.filter(filter_func=lambda c: c.is_creature))
     p1_creatures = len(p1.battlefield.filter(filter_func=lambda c: c.is_creature))
@@ -183,6 +207,133 @@ def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None)
 
     return stats
 
+# -----------------------------------------------------------
+# Sequential testing: keep playing a matchup only while its
+# win-rate interval is still wide
+# -----------------------------------------------------------
+
+
+def run_sequential_matchups(matchups, writer=None, max_half_width=0.1,
+                            min_games=20, max_games=500, batch_size=10,
+                            test=False, debug_path=None, event_log=None,
+                            decision_log=None, dataset=None, method="wilson"):
+    """
+    matchups: list of (agent0_cls, agent1_cls) pairs, e.g.
+              [(HeuristicAgent, HeuristicAgent15), (RandomAgent, HeuristicAgent15)]
+
+    Games are played in batches of batch_size. Each batch goes to the matchup
+    whose interval (for agent0's win rate; method "wilson" or "bayes", see
+    data_science.win_rate_stats) is currently the widest; a matchup is done
+    once it has min_games and a half-width <= max_half_width (is_decided),
+    or once it reaches max_games.
+
+    Every game's stats row is written to writer (a csv.DictWriter) if given,
+    and its decisions to dataset (see run_one_game).
+    Returns a list with one summary dict per matchup.
+    """
+    n = len(matchups)
+    wins = [0] * n
+    losses = [0] * n
+    games = [0] * n
+    game_id = 0
+
+    while True:
+        decided = is_decided(wins, games, max_half_width, min_games, method)
+        open_cells = [i for i in range(n) if games[i] < max_games and not decided[i]]
+        if not open_cells:
+            break
+
+        # widest interval first; ties go to the matchup with fewer games
+        low, high = interval(wins, games, method)
+        half_width = (high - low) / 2
+        i = max(open_cells, key=lambda c: (half_width[c], -games[c]))
+        agent0_cls, agent1_cls = matchups[i]
+
+        for _ in range(min(batch_size, max_games - games[i])):
+            stats = run_one_game(
+                game_id=game_id,
+                agent0=agent0_cls(),
+                agent1=agent1_cls(),
+                test=test,
+                debug_path=debug_path,
+                event_log=event_log,
+                decision_log=decision_log,
+                dataset=dataset
+            )
+            if writer is not None:
+                writer.writerow(stats)
+
+            games[i] += 1
+            if stats["winner"] == 0:
+                wins[i] += 1
+            elif stats["winner"] == 1:
+                losses[i] += 1
+            game_id += 1
+
+        low_i, high_i = interval(wins[i], games[i], method)
+        print(f"{agent0_cls.__name__} vs {agent1_cls.__name__}: "
+              f"{wins[i]}/{games[i]} wins, interval half-width {(high_i - low_i) / 2:.3f}")
+
+    table = win_rate_table(wins, games, method=method)
+    return [{"agent0": a0.__name__, "agent1": a1.__name__,
+             "games": games[i], "wins_agent0": wins[i], "wins_agent1": losses[i],
+             "ci_low": float(table["ci_low"].iloc[i]), "ci_high": float(table["ci_high"].iloc[i])}
+            for i, (a0, a1) in enumerate(matchups)]
+
+
+# -----------------------------------------------------------
+# Search agent: win rate against a baseline, and decision
+# latency against an SLA
+# -----------------------------------------------------------
+
+
+def run_search_benchmark(num_games, sla, time_budget=0.2, opponent=HeuristicAgent15,
+                         writer=None, test=False, debug_path=None, event_log=None,
+                         decision_log=None):
+    """
+    Play num_games of SearchAgent(time_budget) against opponent, swapping
+    the decks every other game.
+
+    sla: {"p50": seconds, "p95": ..., "p99": ...}, the most each percentile
+         of the search agent's decision latency may be.
+
+    Every game's stats row is written to writer (a csv.DictWriter) if given.
+    Returns a summary dict: games, wins, losses, the latency percentiles over every
+    decision, and within_sla (all percentiles at or under the SLA).
+    """
+    wins = losses = 0
+    latencies = []
+    for i in range(num_games):
+        agent = SearchAgent(time_budget=time_budget)
+        builders = (build_mono_green_deck, build_mono_red_deck)
+        if i % 2:
+            builders = builders[::-1]
+        stats = run_one_game(
+            game_id=i,
+            agent0=agent,
+            agent1=opponent(),
+            test=test,
+            debug_path=debug_path,
+            deck0_builder=builders[0],
+            deck1_builder=builders[1],
+            event_log=event_log,
+            decision_log=decision_log
+        )
+        if writer is not None:
+            writer.writerow(stats)
+        if stats["winner"] == 0:
+            wins += 1
+        elif stats["winner"] == 1:
+            losses += 1
+        latencies.extend(agent.latencies)
+
+    percentiles = latency_percentiles(latencies, [int(q[1:]) for q in sla])
+    return {"agent": "SearchAgent", "opponent": opponent.__name__,
+            "games": num_games, "wins": wins, "losses": losses, "decisions": len(latencies),
+            "latency": percentiles,
+            "within_sla": all(percentiles.get(q, 0) <= limit for q, limit in sla.items())}
+
+
 # -----------------------------------------------------------
 # Run many games and write results to a CSV file
 # -----------------------------------------------------------
@@ -191,6 +342,27 @@ def run_one_game(game_id, agent0=None, agent1=None, test=False, debug_path=None)
 if __name__ == "__main__":
     num_games = 20 # counter
 
+    # sequential mode: instead of a fixed num_games, play each matchup in
+    # SEQUENTIAL_MATCHUPS until its win-rate interval is tight enough
+    sequential = False
+    SEQUENTIAL_METHOD = "wilson"  # or "bayes" (data_science/win_rate_stats.py)
+
+    # per-step engine counters/timers (MTG/instrumentation.py), exported per batch
+    instrument = False
+
+    # every decision as a training row (MTG/dataset.py), in sharded .npy files
+    record = False
+
+    # SearchAgent vs HeuristicAgent15 for num_games, with the search agent's
+    # decision latency percentiles (seconds) checked against SEARCH_SLA
+    search = False
+    SEARCH_SLA = {"p50": 0.05, "p95": 0.3, "p99": 0.5}
+    SEQUENTIAL_MATCHUPS = [
+        (HeuristicAgent, HeuristicAgent15),
+        (RandomAgent, HeuristicAgent15),
+        (RandomAgent, HeuristicAgent),
+    ]
+
     # Create results directory
     results_dir = "results"
     os.makedirs(results_dir, exist_ok=True)
@@ -208,6 +380,21 @@ if __name__ == "__main__":
     # Filename debug format: <timestamp>_debug.txt
     debug_path = os.path.join(debug_dir, f"{timestamp}_debug.txt")
 
+    # Filename event log format: <timestamp>_events.bin (see MTG/eventlog.py)
+    events_path = os.path.join(debug_dir, f"{timestamp}_events.bin")
+
+    # Filename decision log format: <timestamp>_decisions.jsonl (see research_replay.py)
+    decisions_path = os.path.join(debug_dir, f"{timestamp}_decisions.jsonl")
+
+    # Directory dataset format: <timestamp>_dataset/shard-00000.obs.npy, ...
+    dataset_dir = os.path.join(results_dir, f"{timestamp}_dataset")
+
+    # Filename instrumentation format: <timestamp>_instrumentation.json
+    instrumentation_path = os.path.join(debug_dir, f"{timestamp}_instrumentation.json")
+    if instrument:
+        STATS.reset()
+        STATS.enable()
+
     fieldnames = [
         "game_id",
         "agent0",
@@ -245,11 +432,40 @@ if __name__ == "__main__":
     # run_one_game()
 
 
-    with open(csv_path, "w", newline="") as f:
+    with open(csv_path, "w", newline="") as f, EventLog(events_path) as event_log, \
+            open(decisions_path, "w", encoding="utf-8") as decision_log, \
+            (ShardWriter(dataset_dir) if record else contextlib.nullcontext()) as dataset:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
 
-        for i in range(num_games):
+        if sequential:
+            summary = run_sequential_matchups(SEQUENTIAL_MATCHUPS, writer,
+                                              debug_path=debug_path,
+                                              event_log=event_log,
+                                              decision_log=decision_log,
+                                              dataset=dataset,
+                                              method=SEQUENTIAL_METHOD)
+            for row in summary:
+                print(f"{row['agent0']} vs {row['agent1']}: {row['wins_agent0']}/{row['games']} "
+                      f"(95% CI {row['ci_low']:.2f}-{row['ci_high']:.2f})")
+            num_games = sum(row["games"] for row in summary)
+            wins_p0 = sum(row["wins_agent0"] for row in summary)
+            wins_p1 = sum(row["wins_agent1"] for row in summary)
+            draws = num_games - wins_p0 - wins_p1
+
+        if search:
+            row = run_search_benchmark(num_games, SEARCH_SLA, writer=writer,
+                                       event_log=event_log,
+                                       decision_log=decision_log)
+            latency = ", ".join(f"{q} {t * 1000:.1f}ms" for q, t in row["latency"].items())
+            print(f"{row['agent']} vs {row['opponent']}: {row['wins']}/{row['games']} wins; "
+                  f"latency over {row['decisions']} decisions: {latency} "
+                  f"({'within' if row['within_sla'] else 'OUTSIDE'} SLA {SEARCH_SLA})")
+            wins_p0 = row["wins"]
+            wins_p1 = row["losses"]
+            draws = num_games - wins_p0 - wins_p1
+
+        for i in range(0 if sequential or search else num_games):
             # CHANGE AGENTS HERE AS NEEDED
             agent0 = HeuristicAgent()
             agent1 = HeuristicAgent15()  
@@ -259,7 +475,10 @@ if __name__ == "__main__":
                 agent0=agent0,
                 agent1=agent1,
                 test=False,          # change debugging mode
-                debug_path=debug_path
+                debug_path=debug_path,
+                event_log=event_log,
+                decision_log=decision_log,
+                dataset=dataset
             )
             writer.writerow(stats)
 
@@ -277,4 +496,14 @@ if __name__ == "__main__":
     print("Player 0 wins:", wins_p0)
     print("Player 1 wins:", wins_p1)
     print("Draws/other :", draws)
-    print("Results written to:", csv_path)
\ No newline at end of file
+    print("Results written to:", csv_path)
+    print("Events written to:", events_path)
+    print("Decisions written to:", decisions_path)
+    if record:
+        print("Training data written to:", dataset_dir)
+
+    if instrument:
+        STATS.disable()
+        STATS.export(instrumentation_path, games=num_games, csv=csv_path)
+        print(STATS.report())
+        print("Instrumentation written to:", instrumentation_path)
\ No newline at end of file
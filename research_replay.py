@@ -0,0 +1,35 @@
+"""
+Re-run one logged research game exactly, without calling any agent.
+
+    python -m research_replay debug/<timestamp>_decisions.jsonl 42
+    python -m research_replay debug/<timestamp>_decisions.jsonl 42 --from-turn 10 --to-turn 12
+
+Turns before --from-turn are fast-forwarded silently; the game stops after
+--to-turn (or at its end) and the final board is printed.
+"""
+import argparse
+
+from MTG import cards, replay
+from research_decks import DECK_BUILDERS
+
+
+def replay_logged_game(path, game_id, from_turn=0, to_turn=None):
+    cards.setup_cards()
+    record = replay.read_record(path, game_id)
+    decks = [DECK_BUILDERS[name]()[1] for name in record.decks]
+    return replay.replay_game(record, decks, from_turn=from_turn, to_turn=to_turn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="<timestamp>_decisions.jsonl written by research_main")
+    parser.add_argument("game_id", type=int)
+    parser.add_argument("--from-turn", type=int, default=0,
+                        help="first turn to print (earlier turns are replayed silently)")
+    parser.add_argument("--to-turn", type=int, default=None,
+                        help="stop after this turn")
+    args = parser.parse_args()
+
+    g = replay_logged_game(args.path, args.game_id, args.from_turn, args.to_turn)
+    g.print_game_state()